@@ -1,3 +0,0 @@
-from app.main import app
-
-__all__ = ['app']
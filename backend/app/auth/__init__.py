@@ -4,6 +4,7 @@ from app.auth.auth_utils import (
     authenticate_user,
     create_access_token,
     get_current_user,
+    user_from_token,
     oauth2_scheme
 )
 
@@ -13,5 +14,6 @@ __all__ = [
     'authenticate_user',
     'create_access_token',
     'get_current_user',
+    'user_from_token',
     'oauth2_scheme'
 ]
@@ -38,7 +38,7 @@ def get_password_hash(password):
 
 def authenticate_user(db: Session, email: str, password: str):
     """Authenticate a user by email and password."""
-    user = db.query(User).filter(User.email == email).first()
+    user = db.query(User).filter(User.email == email, User.deleted_at.is_(None)).first()
     if not user:
         return False
     if not verify_password(password, user.password_hash):
@@ -61,27 +61,32 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-async def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    """Get the current user from the JWT token."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
+def user_from_token(db: Session, token: str):
+    """The active user a JWT access token was issued to, or None if it isn't valid."""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
         user_id: int = payload.get("user_id")
         
         if email is None or user_id is None:
-            raise credentials_exception
+            return None
             
         token_data = TokenData(email=email, user_id=user_id)
     except JWTError:
-        raise credentials_exception
+        return None
         
-    user = db.query(User).filter(User.id == token_data.user_id).first()
+    return db.query(User).filter(User.id == token_data.user_id, User.deleted_at.is_(None)).first()
+
+
+async def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    """Get the current user from the JWT token."""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    
+    user = user_from_token(db, token)
     
     if user is None:
         raise credentials_exception
@@ -1,20 +1,49 @@
 from app.crud.crud import (
     # User CRUD
-    create_user, get_user_by_email, get_user_by_id,
+    create_user, get_user_by_email, get_user_by_id, delete_user, purge_deleted_users,
     
     # Set CRUD
-    create_set, get_sets_by_user, get_set_by_id, update_set, delete_set, search_public_sets,
+    create_set, get_sets_by_user, get_set_by_id, can_access_set, update_set, delete_set, fork_set,
+    purge_deleted_sets, search_public_sets, browse_public_sets, attach_card_counts,
     
     # Card CRUD
     create_card, get_cards_by_set, get_card_by_id, update_card, delete_card,
+    move_card, rebalance_card_positions, needs_rebalance,
     
     # Progress CRUD
     update_card_progress, get_user_progress, get_set_progress
 )
+from app.crud.changes import get_set_changes, get_user_changes, is_deleted_own_set
+from app.crud.leaderboard import submit_match_score, get_match_leaderboard
+from app.crud.popularity import refresh_set_popularity, get_trending_sets, get_popular_sets
+from app.crud.suggest import refresh_suggest_index, get_suggestions
+from app.crud.similarity import refresh_set_signatures, get_similar_sets
+from app.crud.review_stats import refresh_review_rollups, get_review_stats
+from app.crud.difficulty import get_card_difficulty
+from app.crud.tags import get_tag_facets
+from app.crud.classes import (
+    create_class, get_user_classes, get_class, delete_class, join_class, reset_class_join_code, remove_class_member,
+    assign_class_set, unassign_class_set, get_class_set_progress
+)
+from app.crud.jobs import get_job, get_user_jobs
 
 __all__ = [
-    'create_user', 'get_user_by_email', 'get_user_by_id',
-    'create_set', 'get_sets_by_user', 'get_set_by_id', 'update_set', 'delete_set', 'search_public_sets',
+    'create_user', 'get_user_by_email', 'get_user_by_id', 'delete_user', 'purge_deleted_users',
+    'create_set', 'get_sets_by_user', 'get_set_by_id', 'can_access_set', 'update_set', 'delete_set', 'fork_set',
+    'purge_deleted_sets', 'search_public_sets', 'browse_public_sets', 'attach_card_counts',
     'create_card', 'get_cards_by_set', 'get_card_by_id', 'update_card', 'delete_card',
-    'update_card_progress', 'get_user_progress', 'get_set_progress'
+    'move_card', 'rebalance_card_positions', 'needs_rebalance',
+    'update_card_progress', 'get_user_progress', 'get_set_progress',
+    'get_set_changes', 'get_user_changes', 'is_deleted_own_set',
+    'submit_match_score', 'get_match_leaderboard',
+    'refresh_set_popularity', 'get_trending_sets', 'get_popular_sets',
+    'refresh_suggest_index', 'get_suggestions',
+    'refresh_set_signatures', 'get_similar_sets',
+    'refresh_review_rollups', 'get_review_stats',
+    'get_card_difficulty',
+    'get_tag_facets',
+    'create_class', 'get_user_classes', 'get_class', 'delete_class', 'join_class', 'reset_class_join_code',
+    'remove_class_member',
+    'assign_class_set', 'unassign_class_set', 'get_class_set_progress',
+    'get_job', 'get_user_jobs'
 ]
@@ -0,0 +1,147 @@
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import exists, func, insert, literal, select, or_
+from sqlalchemy.orm import Session, aliased
+from app.models.models import Set, Card, UserCardProgress, ChangeLog
+from app.crud.progress_buffer import progress_buffer
+from app.crud.progress_archive import restore_archived_progress
+from app.crud.loader import get_loader
+from app.crud.watermarks import COMMIT_GRACE_SECONDS
+
+
+def record_change(
+    db: Session,
+    entity: str,
+    entity_id: int,
+    set_id: int = None,
+    user_id: int = None,
+    deleted: bool = False
+):
+    """
+    Add a change log entry to the session.
+    It is committed together with the change it describes.
+    """
+    db.add(ChangeLog(entity=entity, entity_id=entity_id, set_id=set_id, user_id=user_id, deleted=deleted))
+
+
+def record_set_card_changes(db: Session, set_id: int, user_id: int):
+    """Log every card in a set as changed with a single INSERT ... SELECT."""
+    db.execute(
+        insert(ChangeLog).from_select(
+            ['entity', 'entity_id', 'set_id', 'user_id', 'deleted'],
+            select(literal('card'), Card.id, Card.set_id, literal(user_id), literal(False))
+            .where(Card.set_id == set_id)
+        )
+    )
+
+
+def _committed_version(db: Session, since: int):
+    """
+    The highest version after since below which every entry is committed, or
+    None if there is no recent gap. Only entries from the last
+    COMMIT_GRACE_SECONDS are checked, through the created_at index.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=COMMIT_GRACE_SECONDS)
+    previous = aliased(ChangeLog)
+    gap_end = (
+        db.query(func.min(ChangeLog.id))
+        .filter(
+            ChangeLog.created_at > cutoff,
+            ChangeLog.id > since + 1,
+            ~exists().where(previous.id == ChangeLog.id - 1)
+        )
+        .scalar()
+    )
+    if gap_end is None:
+        return None
+    return db.query(func.max(ChangeLog.id)).filter(ChangeLog.id > since, ChangeLog.id < gap_end).scalar() or since
+
+
+def _changes_since(db: Session, condition, user_id: int, since: int, limit: int):
+    query = db.query(ChangeLog).filter(condition, ChangeLog.id > since)
+    # Versions never pass an entry that may still commit, so none is skipped
+    committed = _committed_version(db, since)
+    if committed is not None:
+        query = query.filter(ChangeLog.id <= committed)
+    entries = query.order_by(ChangeLog.id).limit(limit + 1).all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    version = entries[-1].id if entries else since
+
+    # Only the latest entry per entity matters
+    latest = {}
+    for entry in entries:
+        latest[(entry.entity, entry.entity_id)] = entry
+
+    changed = {'set': set(), 'card': set(), 'progress': set()}
+    deleted = {'set': set(), 'card': set()}
+    for (entity, entity_id), entry in latest.items():
+        if entry.deleted:
+            deleted[entity].add(entity_id)
+        else:
+            changed[entity].add(entity_id)
+
+    sets = []
+    if changed['set']:
+        sets = db.query(Set).filter(Set.id.in_(changed['set']), Set.deleted_at.is_(None)).all()
+        counts = get_loader(db).card_counts.load_many([s.id for s in sets])
+        for s, count in zip(sets, counts):
+            s.card_count = count or 0
+        # Sets removed since the entry was written are reported as deleted
+        deleted['set'] |= changed['set'] - {s.id for s in sets}
+
+    cards = []
+    if changed['card']:
+        cards = db.query(Card).filter(Card.id.in_(changed['card'])).order_by(Card.position, Card.id).all()
+        deleted['card'] |= changed['card'] - {c.id for c in cards}
+
+    progress = []
+    if changed['progress']:
+        restore_archived_progress(db, user_id)
+        progress = (
+            db.query(UserCardProgress)
+            .filter(UserCardProgress.user_id == user_id, UserCardProgress.card_id.in_(changed['progress']))
+            .all()
+        )
+        progress = progress_buffer.overlay(progress)
+
+    return {
+        'version': version,
+        'has_more': has_more,
+        'sets': sets,
+        'cards': cards,
+        'progress': progress,
+        'deleted_sets': sorted(deleted['set']),
+        'deleted_cards': sorted(deleted['card']),
+    }
+
+
+def is_deleted_own_set(db: Session, set_id: int, user_id: int):
+    """Whether the set was the user's and has been deleted, going by its tombstone in the change log."""
+    tombstone = (
+        db.query(ChangeLog.id)
+        .filter(
+            ChangeLog.set_id == set_id,
+            ChangeLog.entity == 'set',
+            ChangeLog.entity_id == set_id,
+            ChangeLog.user_id == user_id,
+            ChangeLog.deleted.is_(True)
+        )
+        .first()
+    )
+    return tombstone is not None
+
+
+def get_set_changes(db: Session, set_id: int, user_id: int, since: int = 0, limit: int = 1000):
+    """
+    Get what changed in a set since a version: the set itself, its cards, and
+    the user's own progress on its cards, plus ids of deleted cards.
+    """
+    condition = (ChangeLog.set_id == set_id) & or_(
+        ChangeLog.entity != 'progress', ChangeLog.user_id == user_id
+    )
+    return _changes_since(db, condition, user_id, since, limit)
+
+
+def get_user_changes(db: Session, user_id: int, since: int = 0, limit: int = 1000):
+    """Get changes to the user's own sets, their cards and the user's progress since a version."""
+    return _changes_since(db, ChangeLog.user_id == user_id, user_id, since, limit)
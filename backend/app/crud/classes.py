@@ -0,0 +1,334 @@
+import base64
+import json
+import os
+import secrets
+import threading
+from collections import OrderedDict
+from sqlalchemy import String, and_, case, cast, func, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.models import (
+    User, Set, Card, UserCardProgress, ProgressArchive, ChangeLog, Class, ClassMember, ClassSet
+)
+from app.crud.progress_archive import unpack_progress
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Class progress matrices each worker keeps in memory
+CLASS_PROGRESS_CACHE_ENTRIES = int(os.getenv("CLASS_PROGRESS_CACHE_ENTRIES", "128"))
+
+
+class ClassProgressCache:
+    """
+    Per-worker LRU cache of encoded class progress matrices. Each entry is
+    stored with the version it was built at and only served while that is
+    still the current version, so writes made through any worker invalidate it.
+    """
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, version: str, body: bytes):
+        with self._lock:
+            self._entries[key] = (version, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+class_progress_cache = ClassProgressCache(CLASS_PROGRESS_CACHE_ENTRIES)
+
+JOIN_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+JOIN_CODE_LENGTH = 8
+
+
+def new_join_code():
+    """A random code students enter to join a class."""
+    return ''.join(secrets.choice(JOIN_CODE_ALPHABET) for _ in range(JOIN_CODE_LENGTH))
+
+
+def _insert_ignore(db: Session, model, rows, index_elements):
+    """Insert rows, skipping those whose key already exists."""
+    dialect = postgresql if db.get_bind().dialect.name == 'postgresql' else sqlite
+    db.execute(dialect.insert(model).values(rows).on_conflict_do_nothing(index_elements=index_elements))
+
+
+def _owned_class(db: Session, class_id: int, user_id: int):
+    return db.query(Class).filter(Class.id == class_id, Class.owner_id == user_id).first()
+
+
+def _bump_version(db: Session, class_ids):
+    db.query(Class).filter(Class.id.in_(class_ids)).update(
+        {Class.version: Class.version + 1}, synchronize_session=False
+    )
+
+
+def create_class(db: Session, name: str, owner_id: int):
+    """Create a class owned by the user."""
+    db_class = Class(name=name, owner_id=owner_id, version=0, join_code=new_join_code())
+    db.add(db_class)
+    db.commit()
+    db.refresh(db_class)
+    return db_class
+
+
+def get_user_classes(db: Session, user_id: int):
+    """Get the classes the user teaches or is a member of."""
+    member_of = select(ClassMember.class_id).where(ClassMember.user_id == user_id)
+    return (
+        db.query(Class)
+        .filter(or_(Class.owner_id == user_id, Class.id.in_(member_of)))
+        .order_by(Class.id)
+        .all()
+    )
+
+
+def get_class(db: Session, class_id: int, user_id: int):
+    """Get a class the user owns, with its members and assigned set IDs."""
+    db_class = _owned_class(db, class_id, user_id)
+
+    if not db_class:
+        return None
+
+    db_class.members = [
+        {'user_id': member_id, 'email': email}
+        for member_id, email in
+        db.query(User.id, User.email)
+        .join(ClassMember, ClassMember.user_id == User.id)
+        .filter(ClassMember.class_id == class_id, User.deleted_at.is_(None))
+        .order_by(User.email)
+    ]
+    db_class.set_ids = [
+        set_id for (set_id,) in
+        db.query(ClassSet.set_id)
+        .join(Set, Set.id == ClassSet.set_id)
+        .filter(ClassSet.class_id == class_id, Set.deleted_at.is_(None))
+        .order_by(ClassSet.set_id)
+    ]
+    return db_class
+
+
+def delete_class(db: Session, class_id: int, user_id: int):
+    """Delete a class the user owns, with its memberships and assignments."""
+    deleted = (
+        db.query(Class)
+        .filter(Class.id == class_id, Class.owner_id == user_id)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return deleted == 1
+
+
+def join_class(db: Session, join_code: str, user_id: int):
+    """
+    Add the user to the class with this join code. Students only ever join
+    classes themselves, so a teacher sees the progress of those who chose to
+    share it. Returns the class, or None if no class has the code.
+    """
+    db_class = db.query(Class).filter(Class.join_code == join_code.strip().upper()).first()
+
+    if not db_class:
+        return None
+
+    member = (
+        db.query(ClassMember.user_id)
+        .filter(ClassMember.class_id == db_class.id, ClassMember.user_id == user_id)
+        .first()
+    )
+    if not member:
+        _insert_ignore(db, ClassMember, [{'class_id': db_class.id, 'user_id': user_id}], ['class_id', 'user_id'])
+        _bump_version(db, [db_class.id])
+        db.commit()
+        db.refresh(db_class)
+
+    return db_class
+
+
+def reset_class_join_code(db: Session, class_id: int, user_id: int):
+    """Give a class the user owns a new join code, e.g. after the old one leaked. Members stay."""
+    db_class = _owned_class(db, class_id, user_id)
+
+    if db_class:
+        db_class.join_code = new_join_code()
+        db.commit()
+        db.refresh(db_class)
+
+    return db_class
+
+
+def remove_class_member(db: Session, class_id: int, member_id: int, user_id: int):
+    """Remove a member from a class. The class owner can remove anyone; members can leave."""
+    if member_id != user_id and not _owned_class(db, class_id, user_id):
+        return False
+
+    removed = (
+        db.query(ClassMember)
+        .filter(ClassMember.class_id == class_id, ClassMember.user_id == member_id)
+        .delete(synchronize_session=False)
+    )
+    if removed:
+        _bump_version(db, [class_id])
+    db.commit()
+    return removed == 1
+
+
+def invalidate_member_classes(db: Session, user_id: int):
+    """Invalidate the cached progress of every class the user is in, e.g. when the account is deleted."""
+    _bump_version(db, select(ClassMember.class_id).where(ClassMember.user_id == user_id))
+
+
+def assign_class_set(db: Session, class_id: int, set_id: int, user_id: int):
+    """Assign a set to a class the user owns. The caller checks the user can access the set."""
+    if not _owned_class(db, class_id, user_id):
+        return False
+
+    _insert_ignore(db, ClassSet, [{'class_id': class_id, 'set_id': set_id}], ['class_id', 'set_id'])
+    db.commit()
+    return True
+
+
+def unassign_class_set(db: Session, class_id: int, set_id: int, user_id: int):
+    """Remove a set from a class the user owns."""
+    if not _owned_class(db, class_id, user_id):
+        return False
+
+    removed = (
+        db.query(ClassSet)
+        .filter(ClassSet.class_id == class_id, ClassSet.set_id == set_id)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return removed == 1
+
+
+def _bitset(positions, size: int):
+    """Base64 of a little-endian bitset with the given bit positions set: bit i is byte i // 8, bit i % 8."""
+    bits = 0
+    for position in positions:
+        bits |= 1 << position
+    return base64.b64encode(bits.to_bytes((size + 7) // 8, 'little')).decode()
+
+
+def _build_class_progress(db: Session, class_id: int, set_id: int, version: str):
+    """
+    Encode the class's progress on a set as JSON: the set's card IDs in order,
+    and per student how many cards they studied and know plus a bitset of
+    each over the card list. Progress comes from one query grouped by student.
+    """
+    card_ids = [
+        card_id for (card_id,) in
+        db.query(Card.id).filter(Card.set_id == set_id).order_by(Card.position, Card.id)
+    ]
+    index = {card_id: position for position, card_id in enumerate(card_ids)}
+
+    progress = (
+        select(UserCardProgress.user_id, UserCardProgress.card_id, UserCardProgress.mastery_level)
+        .join(Card, Card.id == UserCardProgress.card_id)
+        .join(ClassMember, and_(
+            ClassMember.user_id == UserCardProgress.user_id, ClassMember.class_id == class_id
+        ))
+        .where(Card.set_id == set_id)
+        .subquery()
+    )
+    card_id = cast(progress.c.card_id, String)
+    rows = (
+        db.query(
+            ClassMember.user_id,
+            User.email,
+            func.aggregate_strings(card_id, ','),
+            func.aggregate_strings(case((progress.c.mastery_level == 1, card_id)), ','),
+        )
+        .join(User, User.id == ClassMember.user_id)
+        .outerjoin(progress, progress.c.user_id == ClassMember.user_id)
+        .filter(ClassMember.class_id == class_id, User.deleted_at.is_(None))
+        .group_by(ClassMember.user_id, User.email)
+        .order_by(User.email)
+        .all()
+    )
+
+    # Inactive students' progress sits in the archive until they come back
+    archived = {
+        member_id: unpack_progress(data)
+        for member_id, data in
+        db.query(ProgressArchive.user_id, ProgressArchive.data)
+        .join(ClassMember, ClassMember.user_id == ProgressArchive.user_id)
+        .filter(ClassMember.class_id == class_id)
+    }
+
+    def positions(ids):
+        # Cards added since card_ids was read are left out
+        return {index[card] for card in map(int, ids.split(',')) if card in index} if ids else set()
+
+    students = []
+    for member_id, email, studied_ids, known_ids in rows:
+        studied = positions(studied_ids)
+        known = positions(known_ids)
+        for card, mastery_level, _ in archived.get(member_id, ()):
+            if card in index:
+                studied.add(index[card])
+                if mastery_level == 1:
+                    known.add(index[card])
+
+        students.append({
+            'user_id': member_id,
+            'email': email,
+            'studied': len(studied),
+            'known': len(known),
+            'completion': round(len(known) / len(card_ids), 4) if card_ids else 0.0,
+            'studied_bits': _bitset(studied, len(card_ids)),
+            'known_bits': _bitset(known, len(card_ids)),
+        })
+
+    return json.dumps({
+        'class_id': class_id,
+        'set_id': set_id,
+        'version': version,
+        'card_ids': card_ids,
+        'students': students,
+    }, separators=(',', ':')).encode()
+
+
+def get_class_set_progress(db: Session, class_id: int, set_id: int, user_id: int):
+    """
+    Get the students x cards progress matrix of a set assigned to a class the
+    user owns, as (version, JSON body), or None if there's no such
+    assignment. The version moves with every change to the set's cards or
+    progress (from the change log) and to the class's membership, and the
+    encoded matrix is cached until it does, so repeat requests cost two
+    indexed lookups.
+    """
+    db_class = _owned_class(db, class_id, user_id)
+
+    if not db_class:
+        return None
+
+    assigned = (
+        db.query(ClassSet.set_id)
+        .join(Set, Set.id == ClassSet.set_id)
+        .filter(ClassSet.class_id == class_id, ClassSet.set_id == set_id, Set.deleted_at.is_(None))
+        .first()
+    )
+    if not assigned:
+        return None
+
+    set_version = db.query(func.max(ChangeLog.id)).filter(ChangeLog.set_id == set_id).scalar() or 0
+    version = f"{class_id}.{set_id}.{db_class.version}.{set_version}"
+
+    body = class_progress_cache.get((class_id, set_id), version)
+    if body is None:
+        body = _build_class_progress(db, class_id, set_id, version)
+        class_progress_cache.put((class_id, set_id), version, body)
+
+    return version, body
@@ -1,8 +1,36 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.models.models import User, Set, Card, UserCardProgress
-from app.schemas import UserCreate, SetCreate, SetUpdate, CardCreate, CardUpdate, ProgressCreate
+import os
+from datetime import datetime, timezone
+from sqlalchemy.orm import Session, load_only
+from sqlalchemy import func, insert, literal, select, tuple_, update
+from app.models.models import User, Set, Card, UserCardProgress, ReviewEvent
+from app.schemas import UserCreate, SetCreate, SetUpdate, CardCreate, CardUpdate, CardMove, ProgressCreate
 from app.auth import get_password_hash
+from app.crud.progress_buffer import progress_buffer
+from app.crud.progress_archive import restore_archived_progress
+from app.crud.ordering import key_between, sequential_keys
+from app.crud.changes import record_change, record_set_card_changes
+from app.crud.review_stats import review_event
+from app.crud.difficulty import difficulty_counts, add_difficulty_counts
+from app.crud.tags import normalize_tags, listed_tags, update_tag_index, unlist_user_sets, browse_set_ids
+from app.crud.loader import get_loader
+from app.crud.classes import invalidate_member_classes
+
+# Position keys longer than this trigger a rebalance of the set's card order
+MAX_POSITION_LENGTH = 12
+
+# Rows deleted per transaction when purging deleted sets and accounts
+PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", "1000"))
+
+
+def load_fields(model, fields=None):
+    """
+    Query options that load only the columns behind the requested response
+    fields, plus the primary key. None loads whole rows.
+    """
+    if fields is None:
+        return []
+    columns = model.__mapper__.column_attrs
+    return [load_only(model.id, *(getattr(model, name) for name in fields if name in columns))]
 
 
 # User CRUD operations
@@ -26,6 +54,44 @@ def get_user_by_id(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
 
 
+def delete_user(db: Session, user_id: int):
+    """
+    Mark a user account and all of its sets as deleted.
+    The rows are removed later by purge_deleted_users in small chunks.
+    """
+    now = datetime.now(timezone.utc)
+    deleted = (
+        db.query(User)
+        .filter(User.id == user_id, User.deleted_at.is_(None))
+        .update({User.deleted_at: now}, synchronize_session=False)
+    )
+    
+    if not deleted:
+        return False
+    
+    unlist_user_sets(db, user_id)
+    invalidate_member_classes(db, user_id)
+    db.query(Set).filter(Set.user_id == user_id, Set.deleted_at.is_(None)).update(
+        {Set.deleted_at: now}, synchronize_session=False
+    )
+    db.commit()
+    return True
+
+
+def purge_deleted_users(db: Session, chunk_size: int = PURGE_CHUNK_SIZE):
+    """Permanently remove accounts marked as deleted, a bounded chunk per transaction."""
+    user_ids = [user_id for (user_id,) in db.query(User.id).filter(User.deleted_at.isnot(None))]
+    
+    for user_id in user_ids:
+        purge_deleted_sets(db, chunk_size, user_id=user_id)
+        _delete_in_chunks(db, UserCardProgress, UserCardProgress.user_id == user_id, chunk_size)
+        _delete_in_chunks(db, ReviewEvent, ReviewEvent.user_id == user_id, chunk_size)
+        db.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+        db.commit()
+    
+    return len(user_ids)
+
+
 # Set CRUD operations
 def create_set(db: Session, set_data: SetCreate, user_id: int):
     """Create a new flashcard set."""
@@ -33,50 +99,75 @@ def create_set(db: Session, set_data: SetCreate, user_id: int):
         title=set_data.title,
         description=set_data.description,
         is_public=set_data.is_public,
+        tags=normalize_tags(set_data.tags),
         user_id=user_id
     )
     db.add(db_set)
+    db.flush()
+    update_tag_index(db, db_set.id, set(), listed_tags(db_set))
+    record_change(db, 'set', db_set.id, set_id=db_set.id, user_id=user_id)
     db.commit()
     db.refresh(db_set)
     return db_set
 
 
-def get_sets_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    """Get all flashcard sets for a user."""
-    sets = db.query(Set).filter(Set.user_id == user_id).offset(skip).limit(limit).all()
+def get_sets_by_user(db: Session, user_id: int, skip: int = 0, limit: int = 100, fields=None):
+    """Get all flashcard sets for a user, loading only the given response fields if any."""
+    sets = (
+        db.query(Set)
+        .options(*load_fields(Set, fields))
+        .filter(Set.user_id == user_id, Set.deleted_at.is_(None))
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    return attach_card_counts(db, sets, fields)
+
+
+def _readable_set(db: Session, set_id: int, user_id: int = None):
+    """The set if the user owns it or it is public, loaded at most once per request."""
+    set_item = get_loader(db).sets.load(set_id)
     
-    # Count cards for each set
-    for s in sets:
-        s.card_count = db.query(func.count(Card.id)).filter(Card.set_id == s.id).scalar()
+    # Only public sets are accessible if no user_id
+    if set_item and (set_item.is_public or (user_id and set_item.user_id == user_id)):
+        return set_item
+    return None
+
+
+def _owned_set(db: Session, set_id: int, user_id: int):
+    """The set if the user owns it, loaded at most once per request."""
+    set_item = get_loader(db).sets.load(set_id)
     
-    return sets
+    if set_item and set_item.user_id == user_id:
+        return set_item
+    return None
+
 
+def can_access_set(db: Session, set_id: int, user_id: int = None):
+    """Whether the user owns the set or it is public."""
+    return _readable_set(db, set_id, user_id) is not None
 
-def get_set_by_id(db: Session, set_id: int, user_id: int = None):
+
+def get_set_by_id(db: Session, set_id: int, user_id: int = None, fields=None):
     """
     Get a flashcard set by ID.
     If user_id is provided, check if user owns the set or the set is public.
     """
-    query = db.query(Set).filter(Set.id == set_id)
-    
-    if user_id:
-        # User can access their own sets or public sets
-        set_item = query.filter((Set.user_id == user_id) | (Set.is_public == True)).first()
-    else:
-        # Only public sets are accessible if no user_id
-        set_item = query.filter(Set.is_public == True).first()
+    set_item = _readable_set(db, set_id, user_id)
     
-    if set_item:
-        set_item.card_count = db.query(func.count(Card.id)).filter(Card.set_id == set_item.id).scalar()
+    if set_item and (fields is None or 'card_count' in fields):
+        set_item.card_count = get_loader(db).card_counts.load(set_item.id) or 0
     
     return set_item
 
 
 def update_set(db: Session, set_id: int, set_data: SetUpdate, user_id: int):
     """Update a flashcard set."""
-    db_set = db.query(Set).filter(Set.id == set_id, Set.user_id == user_id).first()
+    db_set = _owned_set(db, set_id, user_id)
     
     if db_set:
+        old_tags = listed_tags(db_set)
+        
         # Update only the fields that were provided
         if set_data.title is not None:
             db_set.title = set_data.title
@@ -84,7 +175,11 @@ def update_set(db: Session, set_id: int, set_data: SetUpdate, user_id: int):
             db_set.description = set_data.description
         if set_data.is_public is not None:
             db_set.is_public = set_data.is_public
+        if set_data.tags is not None:
+            db_set.tags = normalize_tags(set_data.tags)
         
+        update_tag_index(db, db_set.id, old_tags, listed_tags(db_set))
+        record_change(db, 'set', db_set.id, set_id=db_set.id, user_id=user_id)
         db.commit()
         db.refresh(db_set)
     
@@ -92,92 +187,203 @@ def update_set(db: Session, set_id: int, set_data: SetUpdate, user_id: int):
 
 
 def delete_set(db: Session, set_id: int, user_id: int):
-    """Delete a flashcard set."""
-    db_set = db.query(Set).filter(Set.id == set_id, Set.user_id == user_id).first()
+    """
+    Delete a flashcard set.
+    The set is only marked as deleted here so large sets return immediately;
+    purge_deleted_sets removes its rows afterwards.
+    """
+    db_set = _owned_set(db, set_id, user_id)
     
     if db_set:
-        db.delete(db_set)
+        update_tag_index(db, db_set.id, listed_tags(db_set), set())
+        db_set.deleted_at = datetime.now(timezone.utc)
+        record_change(db, 'set', db_set.id, set_id=db_set.id, user_id=user_id, deleted=True)
         db.commit()
         return True
     
     return False
 
 
-def search_public_sets(db: Session, query: str, skip: int = 0, limit: int = 20):
+def _delete_in_chunks(db: Session, model, condition, chunk_size: int):
+    """Delete rows matching condition, committing after every chunk_size rows."""
+    primary_key = list(model.__table__.primary_key.columns)
+    key = primary_key[0] if len(primary_key) == 1 else tuple_(*primary_key)
+    while True:
+        chunk = select(*primary_key).where(condition).limit(chunk_size)
+        deleted = db.query(model).filter(key.in_(chunk)).delete(synchronize_session=False)
+        db.commit()
+        if deleted < chunk_size:
+            break
+
+
+def purge_deleted_sets(db: Session, chunk_size: int = PURGE_CHUNK_SIZE, user_id: int = None):
+    """
+    Permanently remove sets marked as deleted, optionally only those of one user.
+    Progress rows and cards go first in bounded chunks, each in its own short
+    transaction, so concurrent writers are never blocked for long.
+    """
+    query = db.query(Set.id).filter(Set.deleted_at.isnot(None))
+    if user_id is not None:
+        query = query.filter(Set.user_id == user_id)
+    set_ids = [set_id for (set_id,) in query]
+    
+    for set_id in set_ids:
+        card_ids = select(Card.id).where(Card.set_id == set_id)
+        _delete_in_chunks(db, UserCardProgress, UserCardProgress.card_id.in_(card_ids), chunk_size)
+        _delete_in_chunks(db, Card, Card.set_id == set_id, chunk_size)
+        db.query(Set).filter(Set.id == set_id).delete(synchronize_session=False)
+        db.commit()
+    
+    return len(set_ids)
+
+
+def fork_set(db: Session, set_id: int, user_id: int):
+    """
+    Copy a set the user can access into a new private set owned by the user.
+    The cards are copied with a single INSERT ... SELECT so no card rows are
+    loaded into Python, however large the source set is.
+    """
+    source = get_set_by_id(db, set_id, user_id)
+
+    if not source:
+        return None
+
+    db_set = Set(
+        title=source.title,
+        description=source.description,
+        is_public=False,
+        tags=source.tags,
+        user_id=user_id,
+        forked_from_id=source.id
+    )
+    db.add(db_set)
+    db.flush()
+
+    copy_cards = insert(Card).from_select(
+        ['set_id', 'term', 'definition', 'image_url', 'audio_url', 'position'],
+        select(literal(db_set.id), Card.term, Card.definition, Card.image_url, Card.audio_url, Card.position)
+        .where(Card.set_id == source.id)
+    )
+    db.execute(copy_cards)
+    record_change(db, 'set', db_set.id, set_id=db_set.id, user_id=user_id)
+    record_set_card_changes(db, db_set.id, user_id)
+    db.commit()
+    db.refresh(db_set)
+
+    db_set.card_count = source.card_count
+    return db_set
+
+
+def attach_card_counts(db: Session, sets, fields=None):
+    """Set card_count on each set using one grouped query, unless the fields leave it out."""
+    if fields is not None and 'card_count' not in fields:
+        return sets
+    
+    counts = get_loader(db).card_counts.load_many([s.id for s in sets])
+    for s, count in zip(sets, counts):
+        s.card_count = count or 0
+    
+    return sets
+
+
+def search_public_sets(db: Session, query: str, skip: int = 0, limit: int = 20, fields=None):
     """Search for public flashcard sets by title or description."""
     search = f"%{query}%"
     sets = (
         db.query(Set)
-        .filter(Set.is_public == True)
+        .options(*load_fields(Set, fields))
+        .filter(Set.is_public == True, Set.deleted_at.is_(None))
         .filter((Set.title.ilike(search)) | (Set.description.ilike(search)))
         .offset(skip)
         .limit(limit)
         .all()
     )
-    
-    # Count cards for each set
-    for s in sets:
-        s.card_count = db.query(func.count(Card.id)).filter(Card.set_id == s.id).scalar()
-    
-    return sets
+    return attach_card_counts(db, sets, fields)
+
+
+def browse_public_sets(db: Session, tags, before: int = None, limit: int = 20):
+    """Public sets tagged with every one of tags, newest first, from the tag index."""
+    set_ids = browse_set_ids(db, normalize_tags(tags), before, limit)
+    sets = {s.id: s for s in db.query(Set).filter(Set.id.in_(set_ids))}
+    return attach_card_counts(db, [sets[set_id] for set_id in set_ids if set_id in sets])
 
 
 # Card CRUD operations
 def create_card(db: Session, card: CardCreate, set_id: int, user_id: int):
     """Create a new flashcard."""
     # Verify that the set belongs to the user
-    db_set = db.query(Set).filter(Set.id == set_id, Set.user_id == user_id).first()
+    db_set = _owned_set(db, set_id, user_id)
     
     if not db_set:
         return None
     
+    # New cards go to the end of the set
+    last_position = db.query(func.max(Card.position)).filter(Card.set_id == set_id).scalar()
+    
     db_card = Card(
         set_id=set_id,
         term=card.term,
         definition=card.definition,
         image_url=card.image_url,
-        audio_url=card.audio_url
+        audio_url=card.audio_url,
+        position=key_between(last_position, None)
     )
     
     db.add(db_card)
+    db.flush()
+    record_change(db, 'card', db_card.id, set_id=set_id, user_id=user_id)
     db.commit()
     db.refresh(db_card)
     
     return db_card
 
 
-def get_cards_by_set(db: Session, set_id: int, user_id: int = None):
+def get_cards_by_set(db: Session, set_id: int, user_id: int = None, skip: int = 0, limit: int = None, fields=None):
     """
-    Get all flashcards for a set.
+    Get the flashcards for a set in their saved order, loading only the given
+    response fields if any.
     If user_id is provided, check if user owns the set or the set is public.
     """
     # First check if the set exists and is accessible to the user
-    set_item = get_set_by_id(db, set_id, user_id)
+    set_item = _readable_set(db, set_id, user_id)
     
     if not set_item:
         return []
     
-    return db.query(Card).filter(Card.set_id == set_id).all()
+    return (
+        db.query(Card)
+        .options(*load_fields(Card, fields))
+        .filter(Card.set_id == set_id)
+        .order_by(Card.position, Card.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
 
 
-def get_card_by_id(db: Session, card_id: int, set_id: int, user_id: int = None):
+def get_card_by_id(db: Session, card_id: int, set_id: int, user_id: int = None, fields=None):
     """
     Get a flashcard by ID.
     If user_id is provided, check if user owns the set or the set is public.
     """
     # First check if the set exists and is accessible to the user
-    set_item = get_set_by_id(db, set_id, user_id)
+    set_item = _readable_set(db, set_id, user_id)
     
     if not set_item:
         return None
     
-    return db.query(Card).filter(Card.id == card_id, Card.set_id == set_id).first()
+    return (
+        db.query(Card)
+        .options(*load_fields(Card, fields))
+        .filter(Card.id == card_id, Card.set_id == set_id)
+        .first()
+    )
 
 
 def update_card(db: Session, card_id: int, set_id: int, card_data: CardUpdate, user_id: int):
     """Update a flashcard."""
     # Verify that the set belongs to the user
-    db_set = db.query(Set).filter(Set.id == set_id, Set.user_id == user_id).first()
+    db_set = _owned_set(db, set_id, user_id)
     
     if not db_set:
         return None
@@ -195,6 +401,7 @@ def update_card(db: Session, card_id: int, set_id: int, card_data: CardUpdate, u
         if card_data.audio_url is not None:
             db_card.audio_url = card_data.audio_url
         
+        record_change(db, 'card', db_card.id, set_id=set_id, user_id=user_id)
         db.commit()
         db.refresh(db_card)
     
@@ -204,7 +411,7 @@ def update_card(db: Session, card_id: int, set_id: int, card_data: CardUpdate, u
 def delete_card(db: Session, card_id: int, set_id: int, user_id: int):
     """Delete a flashcard."""
     # Verify that the set belongs to the user
-    db_set = db.query(Set).filter(Set.id == set_id, Set.user_id == user_id).first()
+    db_set = _owned_set(db, set_id, user_id)
     
     if not db_set:
         return False
@@ -213,21 +420,102 @@ def delete_card(db: Session, card_id: int, set_id: int, user_id: int):
     
     if db_card:
         db.delete(db_card)
+        record_change(db, 'card', db_card.id, set_id=set_id, user_id=user_id, deleted=True)
         db.commit()
         return True
     
     return False
 
 
+def move_card(db: Session, card_id: int, set_id: int, move: CardMove, user_id: int):
+    """
+    Move a flashcard to directly after another card in the same set, or to
+    the start of the set. Only the moved card's row is rewritten.
+    """
+    # Verify that the set belongs to the user
+    db_set = _owned_set(db, set_id, user_id)
+    
+    if not db_set:
+        return None
+    
+    db_card = db.query(Card).filter(Card.id == card_id, Card.set_id == set_id).first()
+    
+    if not db_card:
+        return None
+    
+    before = None
+    if move.after_id is not None:
+        if move.after_id == card_id:
+            return db_card
+        before = (
+            db.query(Card.position)
+            .filter(Card.id == move.after_id, Card.set_id == set_id)
+            .scalar()
+        )
+        if before is None:
+            return None
+    
+    # The card that currently follows the target slot bounds the new key.
+    # Cards are ordered by (position, id), so one sharing the target's key
+    # still comes after it.
+    following = db.query(Card.position).filter(Card.set_id == set_id, Card.id != card_id)
+    if before is not None:
+        following = following.filter(tuple_(Card.position, Card.id) > tuple_(before, move.after_id))
+    after = following.order_by(Card.position, Card.id).limit(1).scalar()
+    
+    if before is not None and after == before:
+        # Duplicate keys, e.g. from concurrent creates, can only be split by a rebalance
+        rebalance_card_positions(db, set_id)
+        return move_card(db, card_id, set_id, move, user_id)
+    
+    db_card.position = key_between(before, after)
+    record_change(db, 'card', db_card.id, set_id=set_id, user_id=user_id)
+    db.commit()
+    db.refresh(db_card)
+    
+    return db_card
+
+
+def rebalance_card_positions(db: Session, set_id: int):
+    """Rewrite a set's card positions as short, evenly spaced keys, keeping their order."""
+    card_ids = [
+        card_id for (card_id,) in
+        db.query(Card.id).filter(Card.set_id == set_id).order_by(Card.position, Card.id)
+    ]
+    
+    if card_ids:
+        db.execute(
+            update(Card),
+            [{'id': card_id, 'position': key} for card_id, key in zip(card_ids, sequential_keys(len(card_ids)))]
+        )
+        owner_id = db.query(Set.user_id).filter(Set.id == set_id).scalar()
+        record_set_card_changes(db, set_id, owner_id)
+        db.commit()
+    
+    return len(card_ids)
+
+
+def needs_rebalance(card: Card):
+    """Whether repeated moves have grown this card's position key past the limit."""
+    return len(card.position) > MAX_POSITION_LENGTH
+
+
 # Progress CRUD operations
 def update_card_progress(db: Session, progress_data: ProgressCreate, user_id: int):
     """Update the progress status for a flashcard."""
-    # Check if the card exists
-    card = db.query(Card).filter(Card.id == progress_data.card_id).first()
+    # Check if the card exists and its set hasn't been deleted
+    card = (
+        db.query(Card)
+        .join(Set)
+        .filter(Card.id == progress_data.card_id, Set.deleted_at.is_(None))
+        .first()
+    )
     
     if not card:
         return None
     
+    restore_archived_progress(db, user_id)
+    
     # Check if progress already exists
     progress = (
         db.query(UserCardProgress)
@@ -235,6 +523,15 @@ def update_card_progress(db: Session, progress_data: ProgressCreate, user_id: in
         .first()
     )
     
+    if progress and progress_buffer.enabled:
+        # Defer the write so repeated flips of the same card cost one update
+        return progress_buffer.add(progress, progress_data.mastery_level, card.set_id)
+
+    db.add(ReviewEvent(**review_event(user_id, card.id, card.set_id, progress_data.mastery_level, is_new=progress is None)))
+    add_difficulty_counts(db, [difficulty_counts(
+        user_id, card.id, card.set_id, progress.mastery_level if progress else None, progress_data.mastery_level
+    )])
+    
     if progress:
         # Update existing progress
         progress.mastery_level = progress_data.mastery_level
@@ -247,6 +544,7 @@ def update_card_progress(db: Session, progress_data: ProgressCreate, user_id: in
         )
         db.add(progress)
     
+    record_change(db, 'progress', card.id, set_id=card.set_id, user_id=user_id)
     db.commit()
     db.refresh(progress)
     return progress
@@ -254,7 +552,9 @@ def update_card_progress(db: Session, progress_data: ProgressCreate, user_id: in
 
 def get_user_progress(db: Session, user_id: int):
     """Get all progress records for a user."""
-    return db.query(UserCardProgress).filter(UserCardProgress.user_id == user_id).all()
+    restore_archived_progress(db, user_id)
+    progress = db.query(UserCardProgress).filter(UserCardProgress.user_id == user_id).all()
+    return progress_buffer.overlay(progress)
 
 
 def get_set_progress(db: Session, set_id: int, user_id: int):
@@ -262,8 +562,10 @@ def get_set_progress(db: Session, set_id: int, user_id: int):
     cards = db.query(Card).filter(Card.set_id == set_id).all()
     card_ids = [card.id for card in cards]
     
-    return (
+    restore_archived_progress(db, user_id)
+    progress = (
         db.query(UserCardProgress)
         .filter(UserCardProgress.user_id == user_id, UserCardProgress.card_id.in_(card_ids))
         .all()
     )
+    return progress_buffer.overlay(progress)
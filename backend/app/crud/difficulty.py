@@ -0,0 +1,108 @@
+import os
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.models import Card, CardDifficulty
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Counter rows per card. Learners are spread over them by user id, so more
+# shards let more learners review the same card without waiting on each other.
+CARD_DIFFICULTY_SHARDS = int(os.getenv("CARD_DIFFICULTY_SHARDS", "8"))
+# Weight, in attempts, of the prior pulling rarely reviewed cards towards 50/50
+DIFFICULTY_PRIOR = 5
+
+COUNTERS = ('attempts', 'known', 'learned', 'forgotten', 'learners')
+
+
+def difficulty_counts(user_id: int, card_id: int, set_id: int, old_level: int, new_level: int):
+    """
+    Counter increments for one review taking a learner's card from old_level
+    to new_level. old_level is None the first time the learner reviews it.
+    """
+    return {
+        'card_id': card_id,
+        'shard': user_id % CARD_DIFFICULTY_SHARDS,
+        'set_id': set_id,
+        'attempts': 1,
+        'known': int(new_level == 1),
+        'learned': int(old_level == 0 and new_level == 1),
+        'forgotten': int(old_level == 1 and new_level == 0),
+        'learners': int(old_level is None),
+    }
+
+
+def merge_difficulty_counts(merged: dict, counts: dict):
+    """Add counter increments into merged, keyed by (card_id, shard)."""
+    key = (counts['card_id'], counts['shard'])
+    if key in merged:
+        for counter in COUNTERS:
+            merged[key][counter] += counts[counter]
+    else:
+        merged[key] = dict(counts)
+    return merged
+
+
+def add_difficulty_counts(db: Session, rows):
+    """
+    Add counter increments in the caller's transaction with a single upsert.
+    Rows are written in key order so concurrent batches lock them in the same
+    order and can't deadlock.
+    """
+    if not rows:
+        return
+
+    dialect = postgresql if db.get_bind().dialect.name == 'postgresql' else sqlite
+    stmt = dialect.insert(CardDifficulty).values(sorted(rows, key=lambda row: (row['card_id'], row['shard'])))
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=['card_id', 'shard'],
+        set_={counter: getattr(CardDifficulty, counter) + getattr(stmt.excluded, counter) for counter in COUNTERS}
+    ))
+
+
+def get_card_difficulty(db: Session, set_id: int, limit: int = 20):
+    """
+    The set's reviewed cards, hardest first, from one read of its counter rows.
+    Difficulty is the share of attempts that left the card unknown, smoothed
+    so a card missed once or twice doesn't outrank ones missed by hundreds.
+    """
+    attempts = func.sum(CardDifficulty.attempts)
+    known = func.sum(CardDifficulty.known)
+    difficulty = (attempts - known + DIFFICULTY_PRIOR / 2) / (attempts + DIFFICULTY_PRIOR)
+
+    rows = (
+        db.query(
+            Card.id,
+            Card.term,
+            Card.definition,
+            attempts,
+            known,
+            func.sum(CardDifficulty.learned),
+            func.sum(CardDifficulty.forgotten),
+            func.sum(CardDifficulty.learners),
+            difficulty,
+        )
+        .join(Card, Card.id == CardDifficulty.card_id)
+        .filter(CardDifficulty.set_id == set_id)
+        .group_by(Card.id, Card.term, Card.definition)
+        .order_by(difficulty.desc(), attempts.desc(), Card.id)
+        .limit(limit)
+        .all()
+    )
+
+    return [
+        {
+            'card_id': card_id,
+            'term': term,
+            'definition': definition,
+            'attempts': attempts,
+            'known': known,
+            'learned': learned,
+            'forgotten': forgotten,
+            'learners': learners,
+            'difficulty': round(float(difficulty), 4),
+        }
+        for card_id, term, definition, attempts, known, learned, forgotten, learners, difficulty in rows
+    ]
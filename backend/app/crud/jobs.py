@@ -0,0 +1,300 @@
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.models import Job, JobSchedule
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+# Retry delay after the first failed attempt, doubling after each further one up to the maximum
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+# Finished jobs are kept this long for the status endpoint
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "7"))
+# Finished jobs removed per transaction when pruning
+PRUNE_BATCH_SIZE = 1000
+
+FINISHED = ('succeeded', 'failed')
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _claimable(now: datetime):
+    """Queued jobs that are due, and running ones whose runner stopped renewing its claim."""
+    return or_(
+        and_(Job.status == 'queued', Job.run_at <= now),
+        and_(Job.status == 'running', Job.locked_until < now, Job.attempts < Job.max_attempts),
+    )
+
+
+def retry_delay(attempts: int):
+    """Seconds to wait after a job's attempts-th failure: exponential backoff with jitter."""
+    delay = min(JOB_RETRY_MAX_SECONDS, JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def enqueue_job(
+    db: Session,
+    name: str,
+    args: dict = None,
+    user_id: int = None,
+    delay: float = 0,
+    max_attempts: int = JOB_MAX_ATTEMPTS,
+    dedupe_key: str = None
+):
+    """
+    Queue a job and commit it. If a queued job already holds dedupe_key, that
+    job is returned instead, so repeated requests for the same work coalesce
+    until a runner picks it up.
+    """
+    if dedupe_key is not None:
+        existing = db.query(Job).filter(Job.dedupe_key == dedupe_key).first()
+        if existing:
+            return existing
+
+    job = Job(
+        name=name,
+        args=args or {},
+        user_id=user_id,
+        status='queued',
+        attempts=0,
+        max_attempts=max_attempts,
+        run_at=_now() + timedelta(seconds=delay),
+        dedupe_key=dedupe_key
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request queued the same work first
+        db.rollback()
+        return db.query(Job).filter(Job.dedupe_key == dedupe_key).first()
+
+    db.refresh(job)
+    return job
+
+
+def claim_job(db: Session, names, worker: str, lease_seconds: float):
+    """
+    Claim the next due job with one of the given names for worker, or return
+    None. The claim is a conditional UPDATE, so when several runners go for
+    the same job only one of them gets it; on PostgreSQL the candidate row is
+    also locked with SKIP LOCKED so the others move straight on to the next.
+    """
+    now = _now()
+    job_id = (
+        db.query(Job.id)
+        .filter(Job.name.in_(names), _claimable(now))
+        .order_by(Job.run_at, Job.id)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+        .scalar()
+    )
+
+    if job_id is None:
+        db.rollback()
+        return None
+
+    claimed = (
+        db.query(Job)
+        .filter(Job.id == job_id, _claimable(now))
+        .update({
+            Job.status: 'running',
+            Job.locked_by: worker,
+            Job.locked_until: now + timedelta(seconds=lease_seconds),
+            Job.attempts: Job.attempts + 1,
+            Job.started_at: now,
+            # A new request for the same work can queue again from here
+            Job.dedupe_key: None,
+        }, synchronize_session=False)
+    )
+    db.commit()
+
+    if not claimed:
+        return None
+    return db.query(Job).filter(Job.id == job_id).first()
+
+
+def renew_job_claims(db: Session, job_ids, worker: str, lease_seconds: float):
+    """Push back the lapse time of worker's running jobs. Returns how many it still holds."""
+    if not job_ids:
+        return 0
+
+    renewed = (
+        db.query(Job)
+        .filter(Job.id.in_(job_ids), Job.locked_by == worker, Job.status == 'running')
+        .update({Job.locked_until: _now() + timedelta(seconds=lease_seconds)}, synchronize_session=False)
+    )
+    db.commit()
+    return renewed
+
+
+def complete_job(db: Session, job_id: int, worker: str, result=None):
+    """Mark a job worker holds as succeeded. Returns False if its claim lapsed and was taken over."""
+    completed = (
+        db.query(Job)
+        .filter(Job.id == job_id, Job.locked_by == worker, Job.status == 'running')
+        .update({
+            Job.status: 'succeeded',
+            Job.result: result,
+            Job.last_error: None,
+            Job.locked_by: None,
+            Job.locked_until: None,
+            Job.finished_at: _now(),
+        }, synchronize_session=False)
+    )
+    db.commit()
+    return completed == 1
+
+
+def fail_job(db: Session, job_id: int, worker: str, error: str):
+    """
+    Record a failed attempt of a job worker holds. The job is queued again
+    after a backoff delay until it runs out of attempts, then marked failed.
+    Returns False if its claim lapsed and was taken over.
+    """
+    job = db.query(Job).filter(Job.id == job_id, Job.locked_by == worker, Job.status == 'running').first()
+
+    if job is None:
+        db.rollback()
+        return False
+
+    now = _now()
+    if job.attempts < job.max_attempts:
+        values = {Job.status: 'queued', Job.run_at: now + timedelta(seconds=retry_delay(job.attempts))}
+    else:
+        values = {Job.status: 'failed', Job.finished_at: now}
+    values.update({Job.last_error: error, Job.locked_by: None, Job.locked_until: None})
+
+    failed = (
+        db.query(Job)
+        .filter(Job.id == job_id, Job.locked_by == worker, Job.status == 'running')
+        .update(values, synchronize_session=False)
+    )
+    db.commit()
+    return failed == 1
+
+
+def fail_abandoned_jobs(db: Session):
+    """Mark failed the jobs whose runner stopped renewing its claim on their last attempt."""
+    now = _now()
+    abandoned = and_(Job.status == 'running', Job.locked_until < now, Job.attempts >= Job.max_attempts)
+
+    # Look before writing, as every runner checks this each poll
+    if db.query(Job.id).filter(abandoned).first() is None:
+        db.rollback()
+        return 0
+
+    failed = (
+        db.query(Job)
+        .filter(abandoned)
+        .update({
+            Job.status: 'failed',
+            Job.last_error: 'Runner stopped before the job finished',
+            Job.locked_by: None,
+            Job.locked_until: None,
+            Job.finished_at: now,
+        }, synchronize_session=False)
+    )
+    db.commit()
+    return failed
+
+
+def enqueue_due_schedules(db: Session, schedules):
+    """
+    Queue a job for each periodic schedule that is due. schedules maps a
+    schedule name to (job name, interval seconds). Moving a schedule's next
+    run time is a conditional UPDATE, so however many runners check at once,
+    each run is queued by exactly one of them. A run isn't queued while the
+    previous one is still waiting, so a backlog never piles up.
+    """
+    if not schedules:
+        return []
+
+    now = _now()
+    due = dict(
+        db.query(JobSchedule.name, JobSchedule.next_run_at <= now)
+        .filter(JobSchedule.name.in_(schedules))
+    )
+    db.rollback()
+    queued = []
+
+    for schedule, (name, interval) in schedules.items():
+        if schedule not in due:
+            db.add(JobSchedule(name=schedule, next_run_at=now))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another runner created it first
+                db.rollback()
+        elif not due[schedule]:
+            continue
+
+        claimed = (
+            db.query(JobSchedule)
+            .filter(JobSchedule.name == schedule, JobSchedule.next_run_at <= now)
+            .update({JobSchedule.next_run_at: now + timedelta(seconds=interval)}, synchronize_session=False)
+        )
+
+        if not claimed:
+            db.rollback()
+            continue
+
+        dedupe_key = f"schedule:{schedule}"
+        if db.query(Job.id).filter(Job.dedupe_key == dedupe_key).scalar() is None:
+            db.add(Job(
+                name=name,
+                args={},
+                status='queued',
+                attempts=0,
+                max_attempts=1,  # the next scheduled run is the retry
+                run_at=now,
+                dedupe_key=dedupe_key
+            ))
+            queued.append(schedule)
+        db.commit()
+
+    return queued
+
+
+def get_job(db: Session, job_id: int, user_id: int):
+    """Get a job run on behalf of the user."""
+    return db.query(Job).filter(Job.id == job_id, Job.user_id == user_id).first()
+
+
+def get_user_jobs(db: Session, user_id: int, limit: int = 20):
+    """Get the user's most recent jobs, newest first."""
+    return (
+        db.query(Job)
+        .filter(Job.user_id == user_id)
+        .order_by(Job.id.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def prune_finished_jobs(db: Session, retention_days: int = JOB_RETENTION_DAYS, batch_size: int = PRUNE_BATCH_SIZE):
+    """Delete jobs that finished more than retention_days ago, a batch per transaction."""
+    cutoff = _now() - timedelta(days=retention_days)
+    pruned = 0
+
+    while True:
+        job_ids = [
+            job_id for (job_id,) in
+            db.query(Job.id)
+            .filter(Job.status.in_(FINISHED), Job.finished_at < cutoff)
+            .limit(batch_size)
+        ]
+        if not job_ids:
+            return pruned
+
+        db.query(Job).filter(Job.id.in_(job_ids)).delete(synchronize_session=False)
+        db.commit()
+        pruned += len(job_ids)
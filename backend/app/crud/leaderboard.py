@@ -0,0 +1,197 @@
+import bisect
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from sqlalchemy import case, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.models import MatchScore
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Number of sets whose leaderboards each worker keeps in memory
+LEADERBOARD_CACHE_SETS = int(os.getenv("LEADERBOARD_CACHE_SETS", "256"))
+# Seconds before a cached leaderboard is reloaded to pick up other workers' scores
+LEADERBOARD_CACHE_TTL = int(os.getenv("LEADERBOARD_CACHE_TTL", "60"))
+# Entries kept per cached leaderboard, the most a request can ask for
+LEADERBOARD_SIZE = 100
+
+
+class SetLeaderboard:
+    """
+    The LEADERBOARD_SIZE best times for one set, kept sorted so the top K is
+    a slice, plus how many players the set has.
+    """
+
+    def __init__(self, rows, players: int):
+        self.entries = [(time_ms, user_id) for user_id, time_ms in rows]
+        self.players = players
+        self.loaded_at = time.monotonic()
+
+    def record(self, user_id: int, time_ms: int, previous: int = None):
+        """Place a player's new time given their previous best, replacing it if it was listed."""
+        if previous is not None and previous <= time_ms:
+            return
+        # The board may have been loaded after the time was stored
+        listed = next((listed for listed, player_id in self.entries if player_id == user_id), None)
+        if listed is not None:
+            if listed <= time_ms:
+                return
+            self.entries.remove((listed, user_id))
+        elif previous is None:
+            self.players += 1
+        bisect.insort(self.entries, (time_ms, user_id))
+        del self.entries[LEADERBOARD_SIZE:]
+
+    def rank(self, time_ms: int):
+        """
+        1-based rank of a time by binary search, or None when players faster
+        than it may have fallen off the kept entries.
+        """
+        if len(self.entries) < self.players and (not self.entries or time_ms > self.entries[-1][0]):
+            return None
+        return bisect.bisect_left(self.entries, (time_ms,)) + 1
+
+    def top(self, k: int):
+        """The k best (rank, user_id, time_ms) entries."""
+        top = []
+        for time_ms, user_id in self.entries[:k]:
+            rank = top[-1][0] if top and top[-1][2] == time_ms else len(top) + 1
+            top.append((rank, user_id, time_ms))
+        return top
+
+
+class LeaderboardCache:
+    """Per-worker LRU cache of set leaderboards, loaded from match_scores on demand."""
+
+    def __init__(self, max_sets: int, ttl: int):
+        self._max_sets = max_sets
+        self._ttl = ttl
+        self._boards = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, db: Session, set_id: int):
+        with self._lock:
+            board = self._boards.get(set_id)
+            if board is not None and time.monotonic() - board.loaded_at < self._ttl:
+                self._boards.move_to_end(set_id)
+                return board
+
+        # Both read straight off the (set_id, best_time_ms) index
+        rows = (
+            db.query(MatchScore.user_id, MatchScore.best_time_ms)
+            .filter(MatchScore.set_id == set_id)
+            .order_by(MatchScore.best_time_ms, MatchScore.user_id)
+            .limit(LEADERBOARD_SIZE)
+            .all()
+        )
+        players = db.query(func.count()).select_from(MatchScore).filter(MatchScore.set_id == set_id).scalar()
+        board = SetLeaderboard(rows, players)
+
+        with self._lock:
+            self._boards[set_id] = board
+            self._boards.move_to_end(set_id)
+            while len(self._boards) > self._max_sets:
+                self._boards.popitem(last=False)
+        return board
+
+    def record(self, set_id: int, user_id: int, time_ms: int, previous: int = None):
+        """Update a cached leaderboard; one that isn't cached is loaded fresh when next read."""
+        with self._lock:
+            board = self._boards.get(set_id)
+            if board is not None:
+                board.record(user_id, time_ms, previous)
+
+
+leaderboards = LeaderboardCache(LEADERBOARD_CACHE_SETS, LEADERBOARD_CACHE_TTL)
+
+
+def _rank(db: Session, set_id: int, time_ms: int):
+    """
+    1-based rank of a time; players with equal times share a rank. Times
+    within the cached board are ranked by binary search; deeper ones count
+    the faster players off the (set_id, best_time_ms) index, which reads
+    O(rank) index entries.
+    """
+    rank = leaderboards.get(db, set_id).rank(time_ms)
+    if rank is not None:
+        return rank
+    faster = (
+        db.query(func.count())
+        .select_from(MatchScore)
+        .filter(MatchScore.set_id == set_id, MatchScore.best_time_ms < time_ms)
+        .scalar()
+    )
+    return faster + 1
+
+
+def submit_match_score(db: Session, set_id: int, user_id: int, time_ms: int):
+    """Record a finished match game, keeping only the player's best time for the set."""
+    # Locks the player's row, so their concurrent submits are counted one after another
+    previous = (
+        db.query(MatchScore.best_time_ms)
+        .filter(MatchScore.set_id == set_id, MatchScore.user_id == user_id)
+        .with_for_update()
+        .scalar()
+    )
+    is_personal_best = previous is None or time_ms < previous
+
+    # An upsert, so two first submits at once don't collide and no play is lost
+    dialect = postgresql if db.get_bind().dialect.name == 'postgresql' else sqlite
+    insert = dialect.insert(MatchScore).values(
+        set_id=set_id, user_id=user_id, best_time_ms=time_ms, plays=1, achieved_at=datetime.now(timezone.utc)
+    )
+    improved = insert.excluded.best_time_ms < MatchScore.best_time_ms
+    db.execute(insert.on_conflict_do_update(
+        index_elements=['set_id', 'user_id'],
+        set_={
+            'plays': MatchScore.plays + 1,
+            'best_time_ms': case((improved, insert.excluded.best_time_ms), else_=MatchScore.best_time_ms),
+            'achieved_at': case((improved, insert.excluded.achieved_at), else_=MatchScore.achieved_at),
+        }
+    ))
+    best_time_ms, plays = (
+        db.query(MatchScore.best_time_ms, MatchScore.plays)
+        .filter(MatchScore.set_id == set_id, MatchScore.user_id == user_id)
+        .one()
+    )
+    db.commit()
+
+    leaderboards.record(set_id, user_id, time_ms, previous)
+    rank = _rank(db, set_id, best_time_ms)
+
+    return {
+        'time_ms': time_ms,
+        'best_time_ms': best_time_ms,
+        'is_personal_best': is_personal_best,
+        'rank': rank,
+        'plays': plays
+    }
+
+
+def get_match_leaderboard(db: Session, set_id: int, user_id: int = None, limit: int = 10):
+    """Get the fastest match times for a set, plus the user's own best and rank."""
+    board = leaderboards.get(db, set_id)
+
+    personal_best = None
+    if user_id is not None:
+        time_ms = (
+            db.query(MatchScore.best_time_ms)
+            .filter(MatchScore.set_id == set_id, MatchScore.user_id == user_id)
+            .scalar()
+        )
+        if time_ms is not None:
+            personal_best = {'rank': _rank(db, set_id, time_ms), 'user_id': user_id, 'time_ms': time_ms}
+
+    return {
+        'players': board.players,
+        'entries': [
+            {'rank': rank, 'user_id': player_id, 'time_ms': time_ms}
+            for rank, player_id, time_ms in board.top(limit)
+        ],
+        'personal_best': personal_best
+    }
@@ -0,0 +1,69 @@
+"""
+Request-scoped loader for crud lookups (the dataloader pattern).
+
+A request's Session carries one Loader in session.info. Each KeyLoader
+memoizes what it has fetched, and keys queued with prime() are fetched
+together with the next load() in a single IN query. Everything is dropped
+when the session commits or rolls back, so a write is never followed by
+a stale read in the same request.
+"""
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from app.models.models import Set, Card
+
+
+class KeyLoader:
+    """Memoizes batch_fn(keys) -> {key: value} results; missing keys load as None."""
+
+    def __init__(self, batch_fn):
+        self._batch_fn = batch_fn
+        self._cache = {}
+        self._pending = set()
+
+    def prime(self, *keys):
+        """Queue keys to be fetched with the next load."""
+        self._pending.update(key for key in keys if key not in self._cache)
+
+    def load(self, key):
+        return self.load_many([key])[0]
+
+    def load_many(self, keys):
+        self.prime(*keys)
+        if self._pending:
+            pending, self._pending = self._pending, set()
+            found = self._batch_fn(pending)
+            for key in pending:
+                self._cache[key] = found.get(key)
+        return [self._cache[key] for key in keys]
+
+    def clear(self):
+        self._cache.clear()
+        self._pending.clear()
+
+
+class Loader:
+    def __init__(self, db: Session):
+        # Sets that haven't been deleted, by id
+        self.sets = KeyLoader(
+            lambda ids: {s.id: s for s in db.query(Set).filter(Set.id.in_(ids), Set.deleted_at.is_(None))}
+        )
+        self.card_counts = KeyLoader(
+            lambda set_ids: {
+                set_id: count for set_id, count in
+                db.query(Card.set_id, func.count(Card.id)).filter(Card.set_id.in_(set_ids)).group_by(Card.set_id)
+            }
+        )
+
+    def clear(self, *args):
+        self.sets.clear()
+        self.card_counts.clear()
+
+
+def get_loader(db: Session):
+    """The loader for this session, created on first use."""
+    loader = db.info.get('loader')
+    if loader is None:
+        loader = db.info['loader'] = Loader(db)
+        event.listen(db, 'after_commit', loader.clear)
+        event.listen(db, 'after_rollback', loader.clear)
+    return loader
@@ -0,0 +1,160 @@
+"""
+Fractional indexing for card positions.
+
+Positions are base-62 strings that sort lexicographically. A key can always be
+generated between any two existing keys, so moving a card only rewrites that
+card's row. Keys start with a length-prefixed integer part ("a0", "a1", ...,
+"az", "b00", ...) followed by an optional fractional part, following the
+scheme used by the fractional-indexing library.
+"""
+
+DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+SMALLEST_INTEGER = "A" + DIGITS[0] * 26
+
+
+def _midpoint(a: str, b: str = None):
+    """Fractional part strictly between a and b, where b=None means the end of the range."""
+    if b is not None and a >= b:
+        raise ValueError(f"{a!r} is not less than {b!r}")
+    if a.endswith(DIGITS[0]) or (b and b.endswith(DIGITS[0])):
+        raise ValueError("Fractional part must not end with a zero digit")
+
+    if b is not None:
+        # Skip the common prefix, treating a as zero-padded
+        n = 0
+        while (a[n] if n < len(a) else DIGITS[0]) == b[n]:
+            n += 1
+        if n > 0:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    digit_a = DIGITS.index(a[0]) if a else 0
+    digit_b = DIGITS.index(b[0]) if b is not None else len(DIGITS)
+    if digit_b - digit_a > 1:
+        return DIGITS[(digit_a + digit_b + 1) // 2]
+    if b is not None and len(b) > 1:
+        return b[:1]
+    return DIGITS[digit_a] + _midpoint(a[1:], None)
+
+
+def _integer_length(head: str):
+    if "a" <= head <= "z":
+        return ord(head) - ord("a") + 2
+    if "A" <= head <= "Z":
+        return ord("Z") - ord(head) + 2
+    raise ValueError(f"Invalid position key head {head!r}")
+
+
+def _integer_part(key: str):
+    length = _integer_length(key[0])
+    if length > len(key):
+        raise ValueError(f"Invalid position key {key!r}")
+    return key[:length]
+
+
+def _validate(key: str):
+    if key == SMALLEST_INTEGER:
+        raise ValueError(f"Invalid position key {key!r}")
+    fraction = key[len(_integer_part(key)):]
+    if fraction.endswith(DIGITS[0]):
+        raise ValueError(f"Invalid position key {key!r}")
+
+
+def _increment_integer(x: str):
+    head, digits = x[0], list(x[1:])
+    i = len(digits) - 1
+    while i >= 0:
+        d = DIGITS.index(digits[i]) + 1
+        if d < len(DIGITS):
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = DIGITS[0]
+        i -= 1
+
+    # Every digit carried over, so the integer part grows by one digit
+    if head == "Z":
+        return "a" + DIGITS[0]
+    if head == "z":
+        return None
+    head = chr(ord(head) + 1)
+    if head > "a":
+        digits.append(DIGITS[0])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def _decrement_integer(x: str):
+    head, digits = x[0], list(x[1:])
+    i = len(digits) - 1
+    while i >= 0:
+        d = DIGITS.index(digits[i]) - 1
+        if d >= 0:
+            digits[i] = DIGITS[d]
+            return head + "".join(digits)
+        digits[i] = DIGITS[-1]
+        i -= 1
+
+    if head == "a":
+        return "Z" + DIGITS[-1]
+    if head == "A":
+        return None
+    head = chr(ord(head) - 1)
+    if head < "Z":
+        digits.append(DIGITS[-1])
+    else:
+        digits.pop()
+    return head + "".join(digits)
+
+
+def key_between(a: str = None, b: str = None):
+    """
+    Generate a position key that sorts strictly between a and b.
+    Pass a=None to generate a key before b, and b=None for a key after a.
+    """
+    if a is not None:
+        _validate(a)
+    if b is not None:
+        _validate(b)
+    if a is not None and b is not None and a >= b:
+        raise ValueError(f"{a!r} is not less than {b!r}")
+
+    if a is None:
+        if b is None:
+            return "a" + DIGITS[0]
+        int_b = _integer_part(b)
+        fraction_b = b[len(int_b):]
+        if int_b == SMALLEST_INTEGER:
+            return int_b + _midpoint("", fraction_b)
+        if int_b < b:
+            return int_b
+        result = _decrement_integer(int_b)
+        if result is None:
+            raise ValueError("Cannot generate a position key before the smallest key")
+        return result
+
+    int_a = _integer_part(a)
+    fraction_a = a[len(int_a):]
+    if b is None:
+        result = _increment_integer(int_a)
+        return int_a + _midpoint(fraction_a, None) if result is None else result
+
+    int_b = _integer_part(b)
+    fraction_b = b[len(int_b):]
+    if int_a == int_b:
+        return int_a + _midpoint(fraction_a, fraction_b)
+    result = _increment_integer(int_a)
+    if result is None:
+        raise ValueError("Cannot generate a position key after the largest key")
+    if result < b:
+        return result
+    return int_a + _midpoint(fraction_a, None)
+
+
+def sequential_keys(count: int):
+    """Generate count evenly spaced, increasing position keys starting from the first key."""
+    keys = []
+    key = None
+    for _ in range(count):
+        key = key_between(key, None)
+        keys.append(key)
+    return keys
@@ -0,0 +1,178 @@
+import math
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.models import User, Set, ChangeLog, SetPopularity, SetStudier
+from app.crud.crud import attach_card_counts, load_fields
+from app.crud.watermarks import COMMIT_GRACE_SECONDS, get_watermark, committed_end, advance_watermark
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Time for a set's trending score to halve without new activity
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "24"))
+# A new learner counts as much as this many reviews towards trending
+STUDIER_WEIGHT = 5
+# Change log entries aggregated per query when refreshing
+POPULARITY_BATCH_SIZE = 10000
+# (set, learner) pairs looked up or inserted per query
+STUDIER_CHUNK_SIZE = 500
+
+TRENDING_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+WATERMARK = 'set_popularity'
+
+
+def _log2_add(a: float, b: float):
+    """log2(2**a + 2**b) without overflowing."""
+    if a is None:
+        return b
+    high, low = max(a, b), min(a, b)
+    return high + math.log2(1 + 2 ** (low - high))
+
+
+def _half_lives_since_epoch(when: datetime):
+    return (when - TRENDING_EPOCH).total_seconds() / (TRENDING_HALF_LIFE_HOURS * 3600)
+
+
+def _record_studiers(db: Session, learners):
+    """
+    Add set_id -> learner IDs to set_studiers. Returns set_id -> how many of
+    them had never studied the set before.
+    """
+    pairs = [(set_id, user_id) for set_id, user_ids in learners.items() for user_id in user_ids]
+    known = set()
+    for i in range(0, len(pairs), STUDIER_CHUNK_SIZE):
+        chunk = pairs[i:i + STUDIER_CHUNK_SIZE]
+        known.update(
+            tuple(pair) for pair in
+            db.query(SetStudier.set_id, SetStudier.user_id)
+            .filter(tuple_(SetStudier.set_id, SetStudier.user_id).in_(chunk))
+        )
+
+    new_pairs = [pair for pair in pairs if pair not in known]
+    if not new_pairs:
+        return {}
+
+    # Change log entries outlive purged sets and accounts
+    set_ids = {set_id for (set_id,) in db.query(Set.id).filter(Set.id.in_({s for s, _ in new_pairs}))}
+    user_ids = {user_id for (user_id,) in db.query(User.id).filter(User.id.in_({u for _, u in new_pairs}))}
+    new_pairs = [(s, u) for s, u in new_pairs if s in set_ids and u in user_ids]
+
+    dialect = postgresql if db.get_bind().dialect.name == 'postgresql' else sqlite
+    for i in range(0, len(new_pairs), STUDIER_CHUNK_SIZE):
+        db.execute(
+            dialect.insert(SetStudier)
+            .values([{'set_id': s, 'user_id': u} for s, u in new_pairs[i:i + STUDIER_CHUNK_SIZE]])
+            .on_conflict_do_nothing(index_elements=['set_id', 'user_id'])
+        )
+
+    new_studiers = {}
+    for set_id, _ in new_pairs:
+        new_studiers[set_id] = new_studiers.get(set_id, 0) + 1
+    return new_studiers
+
+
+def refresh_set_popularity(db: Session, batch_size: int = POPULARITY_BATCH_SIZE):
+    """
+    Fold study activity logged since the last refresh into set_popularity.
+    Only sets with new progress entries in the change log are touched, and
+    their studier counts grow by the learners new to them. Safe to run from
+    several workers: the watermark only advances once.
+    """
+    start = get_watermark(db, WATERMARK)
+    # Stop short of entries that may still be committing so none is skipped
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=COMMIT_GRACE_SECONDS)
+    end = start
+    while True:
+        batch_end = committed_end(db, ChangeLog.id, ChangeLog.created_at, cutoff, end, batch_size)
+        if batch_end == end:
+            break
+        end = batch_end
+    if end <= start:
+        return 0
+
+    reviews = {}  # set_id -> progress entries
+    learners = {}  # set_id -> IDs of the users behind them
+    for low in range(start, end, batch_size):
+        rows = (
+            db.query(ChangeLog.set_id, ChangeLog.user_id, func.count(ChangeLog.id))
+            .filter(
+                ChangeLog.id > low,
+                ChangeLog.id <= min(low + batch_size, end),
+                ChangeLog.entity == 'progress'
+            )
+            .group_by(ChangeLog.set_id, ChangeLog.user_id)
+        )
+        for set_id, user_id, count in rows:
+            reviews[set_id] = reviews.get(set_id, 0) + count
+            learners.setdefault(set_id, set()).add(user_id)
+
+    new_studiers = _record_studiers(db, learners)
+
+    public_ids = [
+        set_id for (set_id,) in
+        db.query(Set.id).filter(Set.id.in_(learners), Set.is_public == True, Set.deleted_at.is_(None))
+    ]
+    # Sets that went private or were deleted drop out of the feeds
+    db.query(SetPopularity).filter(
+        SetPopularity.set_id.in_(set(learners) - set(public_ids))
+    ).delete(synchronize_session=False)
+
+    existing = {
+        row.set_id: row for row in
+        db.query(SetPopularity).filter(SetPopularity.set_id.in_(public_ids))
+    }
+    # Sets joining the feeds start from everyone who has ever studied them
+    joining = [set_id for set_id in public_ids if set_id not in existing]
+    studiers = dict(
+        db.query(SetStudier.set_id, func.count(SetStudier.user_id))
+        .filter(SetStudier.set_id.in_(joining))
+        .group_by(SetStudier.set_id)
+    ) if joining else {}
+
+    now = _half_lives_since_epoch(datetime.now(timezone.utc))
+    for set_id in public_ids:
+        row = existing.get(set_id)
+        previous_score = row.trending_score if row is not None else None
+        if row is None:
+            row = SetPopularity(set_id=set_id, reviews=0, studiers=studiers.get(set_id, 0))
+            db.add(row)
+        else:
+            row.studiers += new_studiers.get(set_id, 0)
+        row.reviews += reviews[set_id]
+        activity = reviews[set_id] + STUDIER_WEIGHT * len(learners[set_id])
+        row.trending_score = _log2_add(previous_score, math.log2(activity) + now)
+
+    if not advance_watermark(db, WATERMARK, start, end):
+        db.rollback()
+        return 0
+
+    db.commit()
+    return len(public_ids)
+
+
+def _feed(db: Session, order_by, skip: int, limit: int, fields=None):
+    sets = (
+        db.query(Set)
+        .options(*load_fields(Set, fields))
+        .join(SetPopularity, SetPopularity.set_id == Set.id)
+        .filter(Set.is_public == True, Set.deleted_at.is_(None))
+        .order_by(*order_by)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    return attach_card_counts(db, sets, fields)
+
+
+def get_trending_sets(db: Session, skip: int = 0, limit: int = 20, fields=None):
+    """Public sets with the most recent study activity, newest activity weighted highest."""
+    return _feed(db, [SetPopularity.trending_score.desc()], skip, limit, fields)
+
+
+def get_popular_sets(db: Session, skip: int = 0, limit: int = 20, fields=None):
+    """Public sets studied by the most learners of all time."""
+    return _feed(db, [SetPopularity.studiers.desc(), SetPopularity.reviews.desc()], skip, limit, fields)
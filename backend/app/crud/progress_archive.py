@@ -0,0 +1,142 @@
+import os
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from app.models.models import Card, UserCardProgress, ProgressArchive
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Users who have not studied for this many days have their progress archived; 0 disables it
+PROGRESS_ARCHIVE_AFTER_DAYS = int(os.getenv("PROGRESS_ARCHIVE_AFTER_DAYS", "180"))
+# Users examined per query while looking for inactive ones
+ARCHIVE_BATCH_SIZE = 500
+
+# card_id, mastery_level, last_studied in microseconds since the Unix epoch
+ROW = struct.Struct('<IBq')
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _to_micros(when: datetime):
+    if when.tzinfo is None:
+        # SQLite hands back naive UTC timestamps
+        when = when.replace(tzinfo=timezone.utc)
+    return (when - EPOCH) // timedelta(microseconds=1)
+
+
+def pack_progress(rows):
+    """Compress (card_id, mastery_level, last_studied) rows into an archive blob."""
+    return zlib.compress(b''.join(
+        ROW.pack(card_id, mastery_level or 0, _to_micros(last_studied))
+        for card_id, mastery_level, last_studied in rows
+    ))
+
+
+def unpack_progress(data: bytes):
+    """(card_id, mastery_level, last_studied) rows from an archive blob."""
+    return [
+        (card_id, mastery_level, EPOCH + timedelta(microseconds=micros))
+        for card_id, mastery_level, micros in ROW.iter_unpack(zlib.decompress(data))
+    ]
+
+
+def archive_inactive_progress(db: Session, inactive_days: int = PROGRESS_ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE):
+    """
+    Move the progress rows of users who have not studied for inactive_days
+    into one compressed archive row per user. Walks the table once in user
+    order, one short transaction per user. Returns the number of users archived.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=inactive_days)
+    archived = 0
+    after = 0
+
+    while True:
+        user_ids = [
+            user_id for (user_id,) in
+            db.query(UserCardProgress.user_id)
+            .filter(UserCardProgress.user_id > after)
+            .group_by(UserCardProgress.user_id)
+            .having(func.max(UserCardProgress.last_studied) < cutoff)
+            .order_by(UserCardProgress.user_id)
+            .limit(batch_size)
+        ]
+        db.rollback()
+
+        for user_id in user_ids:
+            rows = (
+                db.query(UserCardProgress.card_id, UserCardProgress.mastery_level, UserCardProgress.last_studied)
+                .filter(UserCardProgress.user_id == user_id)
+                .all()
+            )
+            deleted = (
+                db.query(UserCardProgress)
+                .filter(UserCardProgress.user_id == user_id, UserCardProgress.last_studied < cutoff)
+                .delete(synchronize_session=False)
+            )
+            if deleted != len(rows):
+                # The user studied in the meantime
+                db.rollback()
+                continue
+
+            existing = db.query(ProgressArchive).filter(ProgressArchive.user_id == user_id).first()
+            if existing is not None:
+                merged = {row[0]: row for row in unpack_progress(existing.data)}
+                merged.update((row[0], row) for row in rows)
+                rows = list(merged.values())
+                db.delete(existing)
+                db.flush()
+            db.add(ProgressArchive(user_id=user_id, row_count=len(rows), data=pack_progress(rows)))
+            db.commit()
+            archived += 1
+
+        if len(user_ids) < batch_size:
+            return archived
+        after = user_ids[-1]
+
+
+def restore_archived_progress(db: Session, user_id: int):
+    """
+    Move a returning user's archived progress back into user_card_progress.
+    Called before reading or writing a user's progress; costs one primary
+    key lookup when nothing is archived. Returns the number of rows restored.
+    """
+    archive = db.query(ProgressArchive).filter(ProgressArchive.user_id == user_id).first()
+    if archive is None:
+        return 0
+
+    rows = unpack_progress(archive.data)
+    # Only one concurrent request gets to claim the archive
+    claimed = (
+        db.query(ProgressArchive)
+        .filter(ProgressArchive.user_id == user_id)
+        .delete(synchronize_session=False)
+    )
+    if not claimed:
+        db.rollback()
+        return 0
+
+    # Cards may have been deleted, and rows written since archiving are newer
+    card_ids = [card_id for card_id, _, _ in rows]
+    existing_cards = set()
+    live = set()
+    for start in range(0, len(card_ids), ARCHIVE_BATCH_SIZE):
+        chunk = card_ids[start:start + ARCHIVE_BATCH_SIZE]
+        existing_cards.update(card_id for (card_id,) in db.query(Card.id).filter(Card.id.in_(chunk)))
+        live.update(
+            card_id for (card_id,) in
+            db.query(UserCardProgress.card_id)
+            .filter(UserCardProgress.user_id == user_id, UserCardProgress.card_id.in_(chunk))
+        )
+
+    restored = [
+        {'user_id': user_id, 'card_id': card_id, 'mastery_level': mastery_level, 'last_studied': last_studied}
+        for card_id, mastery_level, last_studied in rows
+        if card_id in existing_cards and card_id not in live
+    ]
+    if restored:
+        db.execute(insert(UserCardProgress), restored)
+    db.commit()
+    return len(restored)
@@ -0,0 +1,195 @@
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from sqlalchemy import bindparam, insert, tuple_, update
+from sqlalchemy.orm.attributes import set_committed_value
+from app.database import SessionLocal
+from app.models.models import UserCardProgress, Card, ChangeLog, ReviewEvent
+from app.crud.review_stats import review_event
+from app.crud.difficulty import difficulty_counts, merge_difficulty_counts, add_difficulty_counts
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+PROGRESS_WRITE_BEHIND = os.getenv("PROGRESS_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+PROGRESS_FLUSH_INTERVAL_MS = int(os.getenv("PROGRESS_FLUSH_INTERVAL_MS", "2000"))
+PROGRESS_FLUSH_MAX_EVENTS = int(os.getenv("PROGRESS_FLUSH_MAX_EVENTS", "500"))
+
+logger = logging.getLogger(__name__)
+
+# Plain executemany UPDATE: a row whose card was deleted while its update was
+# buffered is skipped instead of failing the batch
+UPDATE_PROGRESS = (
+    update(UserCardProgress.__table__)
+    .where(
+        UserCardProgress.user_id == bindparam('key_user_id'),
+        UserCardProgress.card_id == bindparam('key_card_id'),
+    )
+)
+
+
+class ProgressWriteBuffer:
+    """
+    Write-behind buffer for progress updates.
+
+    Updates to an existing progress row are coalesced per (user_id, card_id)
+    so only the latest state is kept, though each one is still logged as a
+    review event and counted towards the card's difficulty. A background
+    thread writes them in one batched transaction every flush interval or
+    once enough updates are pending. The buffer lives in the worker process,
+    so reads served by the same worker see pending updates through overlay().
+    """
+
+    def __init__(self, session_factory, interval_ms: int, max_events: int, enabled: bool = True):
+        self.enabled = enabled
+        self._session_factory = session_factory
+        self._interval = interval_ms / 1000
+        self._max_events = max_events
+        self._pending = {}
+        self._flushing = {}
+        self._events = []
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background flush thread."""
+        if not self.enabled or self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="progress-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flush thread and write out everything still pending."""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def add(self, progress: UserCardProgress, mastery_level: int, set_id: int):
+        """Queue a new mastery level for an existing progress row and reflect it on the row."""
+        studied_at = datetime.now(timezone.utc)
+        key = (progress.user_id, progress.card_id)
+        with self._lock:
+            # The row may be behind an update that hasn't been written yet
+            previous = self._pending.get(key) or self._flushing.get(key)
+            old_level = previous["mastery_level"] if previous else progress.mastery_level
+            self._pending[key] = {
+                "set_id": set_id,
+                "mastery_level": mastery_level,
+                "last_studied": studied_at,
+            }
+            self._events.append(review_event(progress.user_id, progress.card_id, set_id, mastery_level))
+            merge_difficulty_counts(
+                self._counts, difficulty_counts(progress.user_id, progress.card_id, set_id, old_level, mastery_level)
+            )
+            full = len(self._events) >= self._max_events
+        if full:
+            self._wakeup.set()
+
+        set_committed_value(progress, "mastery_level", mastery_level)
+        set_committed_value(progress, "last_studied", studied_at)
+        return progress
+
+    def overlay(self, rows):
+        """Apply pending updates to progress rows loaded from the database."""
+        if not self.enabled:
+            return rows
+
+        with self._lock:
+            if not self._pending and not self._flushing:
+                return rows
+            for row in rows:
+                key = (row.user_id, row.card_id)
+                pending = self._pending.get(key) or self._flushing.get(key)
+                if pending:
+                    set_committed_value(row, "mastery_level", pending["mastery_level"])
+                    set_committed_value(row, "last_studied", pending["last_studied"])
+        return rows
+
+    def flush(self):
+        """Write all pending updates in a single transaction. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                self._flushing, self._pending = self._pending, {}
+                events, self._events = self._events, []
+                counts, self._counts = self._counts, {}
+                flushing = dict(self._flushing)
+
+            db = self._session_factory()
+            try:
+                # Cards, sets and accounts deleted since the updates were
+                # buffered took their progress rows with them; drop their updates
+                existing = set(
+                    db.query(UserCardProgress.user_id, UserCardProgress.card_id)
+                    .filter(tuple_(UserCardProgress.user_id, UserCardProgress.card_id).in_(list(flushing)))
+                )
+                card_ids = {card_id for (card_id,) in db.query(Card.id).filter(
+                    Card.id.in_({card_id for card_id, _ in counts})
+                )}
+                batch = [
+                    {
+                        "key_user_id": user_id,
+                        "key_card_id": card_id,
+                        "mastery_level": p["mastery_level"],
+                        "last_studied": p["last_studied"],
+                    }
+                    for (user_id, card_id), p in flushing.items() if (user_id, card_id) in existing
+                ]
+                changes = [
+                    {"entity": "progress", "entity_id": card_id, "set_id": p["set_id"], "user_id": user_id}
+                    for (user_id, card_id), p in flushing.items() if (user_id, card_id) in existing
+                ]
+                events = [event for event in events if (event["user_id"], event["card_id"]) in existing]
+
+                if batch:
+                    db.execute(UPDATE_PROGRESS, batch)
+                    # Sync clients only learn about the updates once they are written
+                    db.execute(insert(ChangeLog), changes)
+                if events:
+                    db.execute(insert(ReviewEvent), events)
+                add_difficulty_counts(db, [row for (card_id, _), row in counts.items() if card_id in card_ids])
+                db.commit()
+            except Exception:
+                db.rollback()
+                # Put the batch back without clobbering anything newer
+                with self._lock:
+                    self._flushing.update(self._pending)
+                    self._pending, self._flushing = self._flushing, {}
+                    self._events = events + self._events
+                    for row in counts.values():
+                        merge_difficulty_counts(self._counts, row)
+                raise
+            finally:
+                db.close()
+
+            with self._lock:
+                self._flushing = {}
+            return len(batch)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self._interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to flush buffered progress updates")
+
+
+progress_buffer = ProgressWriteBuffer(
+    SessionLocal,
+    PROGRESS_FLUSH_INTERVAL_MS,
+    PROGRESS_FLUSH_MAX_EVENTS,
+    enabled=PROGRESS_WRITE_BEHIND
+)
@@ -0,0 +1,132 @@
+import time
+from datetime import date, timedelta
+from sqlalchemy import case, func, tuple_
+from sqlalchemy.orm import Session
+from app.models.models import ReviewEvent, DailyReviewStats
+from app.crud.watermarks import COMMIT_GRACE_SECONDS, get_watermark, committed_end, advance_watermark
+
+# Review events rolled up per query when refreshing
+REVIEW_ROLLUP_BATCH_SIZE = 10000
+MAX_STATS_DAYS = 365
+
+SECONDS_PER_DAY = 86400
+EPOCH = date(1970, 1, 1)
+WATERMARK = 'review_rollups'
+
+
+def review_event(user_id: int, card_id: int, set_id: int, mastery_level: int, is_new: bool = False):
+    """Column values for a review event happening now."""
+    now = int(time.time())
+    return {
+        'user_id': user_id,
+        'card_id': card_id,
+        'set_id': set_id,
+        'mastery_level': mastery_level,
+        'is_new': int(is_new),
+        'day': now // SECONDS_PER_DAY,
+        'created_at': now,
+    }
+
+
+def refresh_review_rollups(db: Session, batch_size: int = REVIEW_ROLLUP_BATCH_SIZE):
+    """
+    Fold review events logged since the last refresh into daily_review_stats,
+    in batches until caught up. Each batch's watermark is claimed before its
+    rollups are written, so a second worker refreshing at the same time waits
+    and then finds nothing to do.
+    """
+    refreshed = 0
+
+    while True:
+        start = get_watermark(db, WATERMARK)
+        end = committed_end(
+            db, ReviewEvent.id, ReviewEvent.created_at, time.time() - COMMIT_GRACE_SECONDS, start, batch_size
+        )
+        if end <= start:
+            return refreshed
+
+        if not advance_watermark(db, WATERMARK, start, end):
+            db.rollback()
+            return refreshed
+
+        totals = (
+            db.query(
+                ReviewEvent.user_id,
+                ReviewEvent.day,
+                func.count(ReviewEvent.id),
+                func.sum(case((ReviewEvent.mastery_level == 1, 1), else_=0)),
+                func.sum(ReviewEvent.is_new),
+            )
+            .filter(ReviewEvent.id > start, ReviewEvent.id <= end)
+            .group_by(ReviewEvent.user_id, ReviewEvent.day)
+            .all()
+        )
+        existing = {
+            (row.user_id, row.day): row for row in
+            db.query(DailyReviewStats).filter(
+                tuple_(DailyReviewStats.user_id, DailyReviewStats.day).in_([(u, d) for u, d, _, _, _ in totals])
+            )
+        }
+
+        for user_id, day, reviews, known, new_cards in totals:
+            row = existing.get((user_id, day))
+            if row is None:
+                row = DailyReviewStats(user_id=user_id, day=day, reviews=0, known=0, new_cards=0)
+                db.add(row)
+            row.reviews += reviews
+            row.known += known
+            row.new_cards += new_cards
+
+        db.commit()
+        refreshed += len(totals)
+
+
+def _streaks(active_days, today: int):
+    """Current and longest runs of consecutive active days."""
+    longest = run = 0
+    previous = None
+    for day in active_days:
+        run = run + 1 if previous == day - 1 else 1
+        longest = max(longest, run)
+        previous = day
+    # A streak is still current if the user hasn't studied yet today
+    current = run if previous is not None and previous >= today - 1 else 0
+    return current, longest
+
+
+def get_review_stats(db: Session, user_id: int, days: int = 90):
+    """
+    Daily review counts and streaks over the last `days` days, today included.
+    Reads one rollup row per active day and never touches raw events, so
+    reviews show up once the next rollup refresh has run.
+    """
+    today = int(time.time()) // SECONDS_PER_DAY
+    first_day = today - days + 1
+    rows = (
+        db.query(DailyReviewStats)
+        .filter(DailyReviewStats.user_id == user_id, DailyReviewStats.day >= first_day)
+        .order_by(DailyReviewStats.day)
+        .all()
+    )
+
+    current_streak, longest_streak = _streaks([row.day for row in rows], today)
+    return {
+        'range_days': days,
+        'start_date': EPOCH + timedelta(days=first_day),
+        'end_date': EPOCH + timedelta(days=today),
+        'total_reviews': sum(row.reviews for row in rows),
+        'total_known': sum(row.known for row in rows),
+        'new_cards': sum(row.new_cards for row in rows),
+        'active_days': len(rows),
+        'current_streak': current_streak,
+        'longest_streak': longest_streak,
+        'days': [
+            {
+                'date': EPOCH + timedelta(days=row.day),
+                'reviews': row.reviews,
+                'known': row.known,
+                'new_cards': row.new_cards,
+            }
+            for row in rows
+        ],
+    }
@@ -0,0 +1,216 @@
+"""
+"Similar sets" recommendations and near-duplicate detection.
+
+Each public set gets a MinHash signature of its normalized card terms and
+definitions, split into bands that are stored as LSH buckets. Sets sharing
+a bucket with the query are the only ones compared, and those candidates are
+re-ranked by exact Jaccard similarity of their card contents.
+"""
+import hashlib
+import os
+import random
+import struct
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.models import Set, Card, ChangeLog, SetSignature, LshBucket
+from app.crud.crud import attach_card_counts
+from app.crud.suggest import normalize
+from app.crud.watermarks import COMMIT_GRACE_SECONDS, get_watermark, committed_end, advance_watermark
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Sets at least this similar to an older public set are flagged as near-duplicates
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+# Change log entries processed per transaction
+SIGNATURE_BATCH_SIZE = 10000
+# Candidates re-ranked by exact similarity per lookup
+MAX_CANDIDATES = 100
+
+# 42 bands of 3 rows: sets around 30% similar or more are likely to collide
+NUM_PERMUTATIONS = 128
+ROWS = 3
+BANDS = NUM_PERMUTATIONS // ROWS
+
+WATERMARK = 'set_signatures'
+MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20261019)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+SIGNATURE = struct.Struct(f'<{NUM_PERMUTATIONS}I')
+
+
+def _elements(db: Session, set_ids):
+    """set_id -> set of normalized card terms and definitions."""
+    elements = {set_id: set() for set_id in set_ids}
+    rows = db.query(Card.set_id, Card.term, Card.definition).filter(Card.set_id.in_(set_ids))
+    for set_id, term, definition in rows:
+        for text in (term, definition):
+            text = normalize(text)
+            if text:
+                elements[set_id].add(text)
+    return elements
+
+
+def minhash(elements):
+    """MinHash signature of a non-empty set of strings."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(e.encode('utf-8'), digest_size=8).digest(), 'little')
+        for e in elements
+    ]
+    return [min((a * x + b) % MERSENNE_PRIME for x in hashes) & 0xFFFFFFFF for a, b in PERMUTATIONS]
+
+
+def _bands(signature):
+    """
+    (band, bucket) pairs. The band is hashed into the bucket so lookups can
+    match on buckets alone; they are signed 64-bit ints to fit a BIGINT.
+    """
+    pairs = []
+    for band in range(BANDS):
+        rows = struct.pack(f'<H{ROWS}I', band, *signature[band * ROWS:(band + 1) * ROWS])
+        bucket = int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), 'little', signed=True)
+        pairs.append((band, bucket))
+    return pairs
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _candidates(db: Session, set_id: int, signature):
+    """Other sets sharing at least one bucket, most shared bands first."""
+    shared = func.count(LshBucket.set_id)
+    return [
+        candidate_id for candidate_id, _ in
+        db.query(LshBucket.set_id, shared)
+        .filter(LshBucket.bucket.in_([bucket for _, bucket in _bands(signature)]), LshBucket.set_id != set_id)
+        .group_by(LshBucket.set_id)
+        .order_by(shared.desc(), LshBucket.set_id)
+        .limit(MAX_CANDIDATES)
+    ]
+
+
+def _score(db: Session, set_id: int, elements, signature):
+    """(candidate set_id, exact similarity) for the LSH candidates of a set."""
+    candidate_ids = _candidates(db, set_id, signature)
+    if not candidate_ids:
+        return []
+    candidate_elements = _elements(db, candidate_ids)
+    return [(candidate_id, jaccard(elements, candidate_elements[candidate_id])) for candidate_id in candidate_ids]
+
+
+def _update_signature(db: Session, set_id: int, elements):
+    """Replace a public set's signature and buckets, and re-check near-duplicates around it."""
+    db.query(LshBucket).filter(LshBucket.set_id == set_id).delete(synchronize_session=False)
+    row = db.query(SetSignature).filter(SetSignature.set_id == set_id).first()
+    if not elements:
+        if row is not None:
+            db.delete(row)
+        db.query(SetSignature).filter(SetSignature.duplicate_of == set_id).update(
+            {SetSignature.duplicate_of: None}, synchronize_session=False
+        )
+        return
+
+    signature = minhash(elements)
+    if row is None:
+        row = SetSignature(set_id=set_id)
+        db.add(row)
+    row.signature = SIGNATURE.pack(*signature)
+    row.element_count = len(elements)
+
+    # The older of two near-duplicates is treated as the original
+    scores = dict(_score(db, set_id, elements, signature))
+    originals = [other for other, similarity in scores.items() if other < set_id and similarity >= NEAR_DUPLICATE_THRESHOLD]
+    row.duplicate_of = min(originals) if originals else None
+    copies = [other for other, similarity in scores.items() if other > set_id and similarity >= NEAR_DUPLICATE_THRESHOLD]
+    # Sets no longer similar enough, including ones that stopped being candidates
+    db.query(SetSignature).filter(
+        SetSignature.duplicate_of == set_id, SetSignature.set_id.notin_(copies)
+    ).update({SetSignature.duplicate_of: None}, synchronize_session='fetch')
+    for other in db.query(SetSignature).filter(SetSignature.set_id.in_(copies)):
+        if other.duplicate_of is None or other.duplicate_of > set_id:
+            other.duplicate_of = set_id
+
+    db.add_all([LshBucket(band=band, bucket=bucket, set_id=set_id) for band, bucket in _bands(signature)])
+    db.flush()
+
+
+def refresh_set_signatures(db: Session, batch_size: int = SIGNATURE_BATCH_SIZE):
+    """
+    Recompute signatures for sets whose cards changed since the last refresh,
+    working through the change log in batches until it is caught up. Private,
+    deleted and empty sets lose their signature and buckets. Safe to run from
+    several workers: the watermark only advances once per batch.
+    """
+    end = db.query(func.max(ChangeLog.id)).scalar() or 0
+    refreshed = 0
+
+    while True:
+        start = get_watermark(db, WATERMARK)
+        # Stop short of entries that may still be committing so none is skipped
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=COMMIT_GRACE_SECONDS)
+        high = min(end, committed_end(db, ChangeLog.id, ChangeLog.created_at, cutoff, start, batch_size))
+        if high <= start:
+            return refreshed
+
+        changed = {
+            set_id for (set_id,) in
+            db.query(ChangeLog.set_id)
+            .filter(ChangeLog.id > start, ChangeLog.id <= high, ChangeLog.entity.in_(['set', 'card']))
+            .distinct()
+        }
+        public_ids = {
+            set_id for (set_id,) in
+            db.query(Set.id).filter(Set.id.in_(changed), Set.is_public == True, Set.deleted_at.is_(None))
+        }
+        elements = _elements(db, public_ids)
+        for set_id in sorted(changed):
+            _update_signature(db, set_id, elements.get(set_id))
+
+        if not advance_watermark(db, WATERMARK, start, high):
+            # Another worker took this batch
+            db.rollback()
+            return refreshed
+
+        db.commit()
+        refreshed += len(changed)
+
+
+def get_similar_sets(db: Session, set_id: int, limit: int = 10):
+    """
+    Public sets with the most similar cards to a set, best first, each with
+    its similarity and whether it is a near-duplicate.
+    The set's own signature is computed from its current cards, so private
+    sets and sets edited since the last refresh get recommendations too.
+    """
+    elements = _elements(db, [set_id])[set_id]
+    if not elements:
+        return []
+
+    scores = [(other, similarity) for other, similarity in _score(db, set_id, elements, minhash(elements)) if similarity > 0]
+    public = {
+        s.id: s for s in
+        db.query(Set).filter(
+            Set.id.in_([other for other, _ in scores]), Set.is_public == True, Set.deleted_at.is_(None)
+        )
+    }
+
+    similar = []
+    for other, similarity in sorted(scores, key=lambda score: (-score[1], score[0])):
+        s = public.get(other)
+        if s is None:
+            continue
+        s.similarity = round(similarity, 4)
+        s.near_duplicate = similarity >= NEAR_DUPLICATE_THRESHOLD
+        similar.append(s)
+        if len(similar) == limit:
+            break
+
+    return attach_card_counts(db, similar)
@@ -0,0 +1,412 @@
+"""
+Typeahead suggestions over public set titles and popular card terms.
+
+The index is a sorted, memory-mapped file, so every worker process on a host
+shares one copy through the page cache. Prefixes of up to HOT_PREFIX_LENGTH
+characters, and longer prefixes matching more than SCAN_LIMIT entries, have
+their best matches precomputed; other prefixes binary search the sorted keys
+and rank the few entries they match. Set changes logged after the
+file was built are applied from the change log as a small in-memory overlay
+until the next rebuild.
+
+File layout (little-endian):
+    header      magic, change log watermark, entry count, hot prefix count
+    offsets     uint32 offset of every entry, in key order
+    hot offsets uint32 offset of every hot prefix record, in prefix order
+    entries     kind, ref_id, weight, key, display text
+    hot records prefix, indices of its best entries
+"""
+import fcntl
+import heapq
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import unicodedata
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.models.models import Set, Card, ChangeLog, SetPopularity
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+SUGGEST_INDEX_PATH = os.getenv("SUGGEST_INDEX_PATH", "suggest.idx")
+# Rebuild the file after this many seconds, or once this many sets changed since
+SUGGEST_REBUILD_SECONDS = int(os.getenv("SUGGEST_REBUILD_SECONDS", "3600"))
+SUGGEST_MAX_OVERLAY = int(os.getenv("SUGGEST_MAX_OVERLAY", "5000"))
+# Card terms are taken from this many of the most studied public sets
+SUGGEST_TERM_SETS = int(os.getenv("SUGGEST_TERM_SETS", "1000"))
+
+MAX_SUGGESTIONS = 20
+HOT_PREFIX_LENGTH = 3
+# Longer prefixes matching more entries than this get precomputed best matches
+SCAN_LIMIT = 1000
+MAX_TEXT_BYTES = 200
+
+KIND_SET = 0
+KIND_TERM = 1
+KIND_NAMES = {KIND_SET: 'set', KIND_TERM: 'term'}
+
+MAGIC = b'SSPIDX01'
+HEADER = struct.Struct('<8sQII')
+ENTRY = struct.Struct('<BIIH')
+LENGTH = struct.Struct('<H')
+OFFSET = struct.Struct('<I')
+
+logger = logging.getLogger(__name__)
+
+
+def normalize(text: str):
+    """Lowercase, strip accents and collapse whitespace so lookups ignore them."""
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return ' '.join(text.lower().split())
+
+
+def _truncate(text: str):
+    return text.encode('utf-8')[:MAX_TEXT_BYTES].decode('utf-8', 'ignore')
+
+
+def _collect_entries(db: Session):
+    """(key, display, kind, ref_id, weight) for every public set title and popular card term."""
+    entries = []
+
+    titles = (
+        db.query(Set.id, Set.title, func.coalesce(SetPopularity.studiers, 0))
+        .outerjoin(SetPopularity, SetPopularity.set_id == Set.id)
+        .filter(Set.is_public == True, Set.deleted_at.is_(None))
+        .yield_per(10000)
+    )
+    for set_id, title, studiers in titles:
+        key = normalize(title)
+        if key:
+            entries.append((_truncate(key), _truncate(title.strip()), KIND_SET, set_id, studiers + 1))
+
+    popular = (
+        db.query(SetPopularity.set_id, SetPopularity.studiers)
+        .join(Set, Set.id == SetPopularity.set_id)
+        .filter(Set.is_public == True, Set.deleted_at.is_(None))
+        .order_by(SetPopularity.studiers.desc())
+        .limit(SUGGEST_TERM_SETS)
+        .subquery()
+    )
+    terms = {}
+    rows = db.query(Card.term, popular.c.studiers).join(popular, popular.c.set_id == Card.set_id).yield_per(10000)
+    for term, studiers in rows:
+        key = normalize(term)
+        if key:
+            display, weight = terms.get(key, (term.strip(), 0))
+            terms[key] = (display, weight + studiers + 1)
+    for key, (display, weight) in terms.items():
+        entries.append((_truncate(key), _truncate(display), KIND_TERM, 0, weight))
+
+    return entries
+
+
+def _best_indices(candidates, limit: int):
+    """Indices of the highest weighted candidates with distinct keys."""
+    best, seen = [], set()
+    for weight, index, key in sorted(candidates, key=lambda c: (-c[0], c[1])):
+        if key not in seen:
+            seen.add(key)
+            best.append(index)
+            if len(best) == limit:
+                break
+    return best
+
+
+def _crowded_prefixes(keys):
+    """(prefix, start, end) for prefixes longer than HOT_PREFIX_LENGTH matching more than SCAN_LIMIT sorted keys."""
+    crowded = []
+    runs, length = [(0, len(keys))], HOT_PREFIX_LENGTH
+    while runs:
+        length += 1
+        longer_runs = []
+        for start, end in runs:
+            index = start
+            while index < end:
+                prefix = keys[index][:length]
+                stop = index + 1
+                while stop < end and keys[stop][:length] == prefix:
+                    stop += 1
+                # Only a crowded prefix can have crowded extensions
+                if len(prefix) == length and stop - index > SCAN_LIMIT:
+                    crowded.append((prefix, index, stop))
+                    longer_runs.append((index, stop))
+                index = stop
+        runs = longer_runs
+    return crowded
+
+
+def build_suggest_index(db: Session, path: str = SUGGEST_INDEX_PATH):
+    """Write a new index file and atomically replace the old one. Returns the number of entries."""
+    watermark = db.query(func.max(ChangeLog.id)).scalar() or 0
+    entries = sorted(_collect_entries(db), key=lambda e: (e[0].encode('utf-8'), -e[4]))
+
+    # Best entries for every short prefix
+    hot = {}
+    for index, (key, _, _, _, weight) in enumerate(entries):
+        for length in range(1, min(len(key), HOT_PREFIX_LENGTH) + 1):
+            candidates = hot.setdefault(key[:length].encode('utf-8'), [])
+            heapq.heappush(candidates, (weight, -index, key))
+            if len(candidates) > MAX_SUGGESTIONS * 2:
+                heapq.heappop(candidates)
+    # and for longer prefixes too many entries match to rank at query time
+    keys = [key for key, _, _, _, _ in entries]
+    for prefix, start, end in _crowded_prefixes(keys):
+        hot[prefix.encode('utf-8')] = heapq.nlargest(
+            MAX_SUGGESTIONS * 2, ((entries[i][4], -i, keys[i]) for i in range(start, end))
+        )
+
+    entry_blobs = []
+    for key, display, kind, ref_id, weight in entries:
+        key_bytes, display_bytes = key.encode('utf-8'), display.encode('utf-8')
+        entry_blobs.append(
+            ENTRY.pack(kind, ref_id, weight, len(key_bytes)) + key_bytes
+            + LENGTH.pack(len(display_bytes)) + display_bytes
+        )
+    hot_blobs = []
+    for prefix in sorted(hot):
+        best = _best_indices([(w, -i, k) for w, i, k in hot[prefix]], MAX_SUGGESTIONS * 2)
+        hot_blobs.append(
+            bytes([len(prefix)]) + prefix + bytes([len(best)])
+            + b''.join(OFFSET.pack(i) for i in best)
+        )
+
+    offset = HEADER.size + OFFSET.size * (len(entry_blobs) + len(hot_blobs))
+    entry_offsets = []
+    for blob in entry_blobs:
+        entry_offsets.append(offset)
+        offset += len(blob)
+    hot_offsets = []
+    for blob in hot_blobs:
+        hot_offsets.append(offset)
+        offset += len(blob)
+
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, watermark, len(entry_blobs), len(hot_blobs)))
+        f.write(b''.join(OFFSET.pack(o) for o in entry_offsets))
+        f.write(b''.join(OFFSET.pack(o) for o in hot_offsets))
+        f.writelines(entry_blobs)
+        f.writelines(hot_blobs)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+    return len(entries)
+
+
+class PrefixIndex:
+    """Read-only view of an index file through mmap."""
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self.stat = os.fstat(f.fileno())
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.watermark, self.count, self.hot_count = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a suggestion index")
+        self._hot_base = HEADER.size + OFFSET.size * self.count
+
+    def close(self):
+        self._buf.close()
+
+    def _offset(self, index: int):
+        return OFFSET.unpack_from(self._buf, HEADER.size + OFFSET.size * index)[0]
+
+    def _key(self, index: int):
+        offset = self._offset(index)
+        key_length = ENTRY.unpack_from(self._buf, offset)[3]
+        start = offset + ENTRY.size
+        return self._buf[start:start + key_length]
+
+    def entry(self, index: int):
+        """(key, display, kind, ref_id, weight) of the entry at index."""
+        offset = self._offset(index)
+        kind, ref_id, weight, key_length = ENTRY.unpack_from(self._buf, offset)
+        start = offset + ENTRY.size
+        key = self._buf[start:start + key_length]
+        start += key_length
+        display_length = LENGTH.unpack_from(self._buf, start)[0]
+        start += LENGTH.size
+        display = self._buf[start:start + display_length]
+        return key.decode('utf-8'), display.decode('utf-8'), kind, ref_id, weight
+
+    def _hot(self, prefix: bytes):
+        low, high = 0, self.hot_count
+        while low < high:
+            middle = (low + high) // 2
+            offset = OFFSET.unpack_from(self._buf, self._hot_base + OFFSET.size * middle)[0]
+            length = self._buf[offset]
+            candidate = self._buf[offset + 1:offset + 1 + length]
+            if candidate == prefix:
+                start = offset + 1 + length
+                n = self._buf[start]
+                return [OFFSET.unpack_from(self._buf, start + 1 + OFFSET.size * i)[0] for i in range(n)]
+            if candidate < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        return []
+
+    def search(self, prefix: str):
+        """Indices of the best entries whose keys start with prefix, best first."""
+        encoded = prefix.encode('utf-8')
+        best = self._hot(encoded)
+        if best or len(prefix) <= HOT_PREFIX_LENGTH:
+            return best
+
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+
+        # Without a hot record the prefix matches at most SCAN_LIMIT entries
+        candidates = []
+        for index in range(low, min(low + SCAN_LIMIT, self.count)):
+            key = self._key(index)
+            if not key.startswith(encoded):
+                break
+            weight = ENTRY.unpack_from(self._buf, self._offset(index))[2]
+            candidates.append((weight, index, key))
+        return _best_indices(candidates, MAX_SUGGESTIONS * 2)
+
+
+class SuggestIndex:
+    """
+    The current index file plus an overlay of sets changed since it was built.
+    refresh() runs periodically on every worker; only the worker holding the
+    lock file rebuilds, and the others pick the new file up by its inode.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._index = None
+        self._overlay = {}
+        self._overlay_watermark = 0
+        self._lock = threading.Lock()
+
+    def refresh(self, db: Session):
+        stat = None
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            pass
+
+        stale = (
+            stat is None
+            or time.time() - stat.st_mtime > SUGGEST_REBUILD_SECONDS
+            or len(self._overlay) > SUGGEST_MAX_OVERLAY
+        )
+        if stale and self._rebuild(db):
+            stat = os.stat(self.path)
+
+        if stat is not None and (self._index is None or self._index.stat.st_ino != stat.st_ino):
+            self._load()
+
+        self._apply_changes(db)
+
+    def _rebuild(self, db: Session):
+        with open(f"{self.path}.lock", 'w') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another worker is rebuilding
+                return False
+            try:
+                count = build_suggest_index(db, self.path)
+                logger.info("Rebuilt suggestion index with %d entries", count)
+                return True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self):
+        index = PrefixIndex(self.path)
+        with self._lock:
+            previous, self._index = self._index, index
+            self._overlay = {}
+            self._overlay_watermark = index.watermark
+        # Requests already holding the old view keep it alive until they finish
+        del previous
+
+    def _apply_changes(self, db: Session):
+        changes = (
+            db.query(ChangeLog.id, ChangeLog.entity_id)
+            .filter(ChangeLog.id > self._overlay_watermark, ChangeLog.entity == 'set')
+            .order_by(ChangeLog.id)
+            .all()
+        )
+        if not changes:
+            return
+
+        set_ids = {set_id for _, set_id in changes}
+        current = {
+            set_id: (title, studiers) for set_id, title, studiers in
+            db.query(Set.id, Set.title, func.coalesce(SetPopularity.studiers, 0))
+            .outerjoin(SetPopularity, SetPopularity.set_id == Set.id)
+            .filter(Set.id.in_(set_ids), Set.is_public == True, Set.deleted_at.is_(None))
+        }
+
+        # Readers iterate the overlay without the lock, so replace it rather than mutate it
+        overlay = dict(self._overlay)
+        for set_id in set_ids:
+            title, studiers = current.get(set_id, ('', 0))
+            key = normalize(title)
+            # None hides the set's entry in the file: it was deleted or made private
+            overlay[set_id] = (_truncate(key), _truncate(title.strip()), KIND_SET, set_id, studiers + 1) if key else None
+        with self._lock:
+            self._overlay = overlay
+            self._overlay_watermark = changes[-1][0]
+
+    def suggest(self, prefix: str, limit: int = 10):
+        """Best suggestions for a prefix as (display, kind, ref_id) tuples."""
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            index, overlay = self._index, self._overlay
+
+        candidates = []
+        if index is not None:
+            for position, entry_index in enumerate(index.search(prefix)):
+                entry = index.entry(entry_index)
+                if entry[2] == KIND_SET and entry[3] in overlay:
+                    continue
+                candidates.append((entry, position))
+        for entry in overlay.values():
+            if entry is not None and entry[0].startswith(prefix):
+                candidates.append((entry, -1))
+
+        results, seen = [], set()
+        for (key, display, kind, ref_id, weight), _ in sorted(candidates, key=lambda c: (-c[0][4], c[1])):
+            if key in seen:
+                continue
+            seen.add(key)
+            results.append((display, KIND_NAMES[kind], ref_id if kind == KIND_SET else None))
+            if len(results) == limit:
+                break
+        return results
+
+
+suggest_index = SuggestIndex(SUGGEST_INDEX_PATH)
+
+
+def refresh_suggest_index(db: Session):
+    """Pick up set changes, and rebuild or reload the index file when due."""
+    suggest_index.refresh(db)
+
+
+def get_suggestions(prefix: str, limit: int = 10):
+    """Typeahead suggestions for a search prefix."""
+    return [
+        {'text': display, 'kind': kind, 'set_id': set_id}
+        for display, kind, set_id in suggest_index.suggest(prefix, min(limit, MAX_SUGGESTIONS))
+    ]
@@ -0,0 +1,114 @@
+import re
+from sqlalchemy import and_, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased
+from app.models.models import Set, TagPosting, TagCount
+
+# Tags a browse query can combine
+MAX_BROWSE_TAGS = 5
+FACET_LIMIT = 30
+
+
+def normalize_tags(tags):
+    """Lowercased tags with whitespace collapsed and duplicates dropped, in the order given."""
+    normalized = []
+    for tag in tags or []:
+        tag = re.sub(r"\s+", " ", tag).strip().lower()
+        if tag and tag not in normalized:
+            normalized.append(tag)
+    return normalized
+
+
+def listed_tags(set_item: Set):
+    """The tags a set is indexed under: all of them while it is public and not deleted, else none."""
+    if set_item.is_public and set_item.deleted_at is None:
+        return set(set_item.tags or [])
+    return set()
+
+
+def _add_tag_counts(db: Session, deltas: dict):
+    """Apply per-tag count changes with one upsert, dropping tags no set carries any more."""
+    deltas = {tag: delta for tag, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    dialect = postgresql if db.get_bind().dialect.name == 'postgresql' else sqlite
+    stmt = dialect.insert(TagCount).values([{'tag': tag, 'set_count': deltas[tag]} for tag in sorted(deltas)])
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=['tag'],
+        set_={'set_count': TagCount.set_count + stmt.excluded.set_count}
+    ))
+    db.query(TagCount).filter(TagCount.tag.in_(deltas), TagCount.set_count <= 0).delete(synchronize_session=False)
+
+
+def update_tag_index(db: Session, set_id: int, old_tags: set, new_tags: set):
+    """
+    Move a set's postings from old_tags to new_tags and adjust the facet
+    counts to match, in the caller's transaction. Pass listed_tags() of the
+    set from before and after the change.
+    """
+    removed = old_tags - new_tags
+    added = new_tags - old_tags
+
+    if removed:
+        db.query(TagPosting).filter(
+            TagPosting.set_id == set_id, TagPosting.tag.in_(removed)
+        ).delete(synchronize_session=False)
+    if added:
+        db.execute(insert(TagPosting), [{'tag': tag, 'set_id': set_id} for tag in sorted(added)])
+
+    deltas = {tag: 1 for tag in added}
+    deltas.update({tag: -1 for tag in removed})
+    _add_tag_counts(db, deltas)
+
+
+def unlist_user_sets(db: Session, user_id: int):
+    """Remove every listed set of a user from the index, e.g. before the account is deleted."""
+    sets = db.query(Set).filter(Set.user_id == user_id, Set.is_public == True, Set.deleted_at.is_(None)).all()
+    deltas = {}
+    for set_item in sets:
+        for tag in listed_tags(set_item):
+            deltas[tag] = deltas.get(tag, 0) - 1
+
+    if deltas:
+        db.query(TagPosting).filter(
+            TagPosting.set_id.in_([set_item.id for set_item in sets])
+        ).delete(synchronize_session=False)
+        _add_tag_counts(db, deltas)
+
+
+def browse_set_ids(db: Session, tags, before: int = None, limit: int = 20):
+    """
+    Ids of the public sets carrying every one of tags, newest first. Pass the
+    last id of a page as before to get the next one.
+
+    The posting list of the rarest tag drives the query and each other tag is
+    a primary key lookup per candidate, so a page costs about the same however
+    many sets the catalog holds.
+    """
+    counts = dict(db.query(TagCount.tag, TagCount.set_count).filter(TagCount.tag.in_(tags)))
+    if len(counts) < len(tags):
+        # Some tag isn't on any public set
+        return []
+
+    rarest, *others = sorted(tags, key=lambda tag: counts[tag])
+    driver = aliased(TagPosting)
+    query = db.query(driver.set_id).filter(driver.tag == rarest)
+    for tag in others:
+        posting = aliased(TagPosting)
+        query = query.join(posting, and_(posting.tag == tag, posting.set_id == driver.set_id))
+    if before is not None:
+        query = query.filter(driver.set_id < before)
+
+    return [set_id for (set_id,) in query.order_by(driver.set_id.desc()).limit(limit)]
+
+
+def get_tag_facets(db: Session, limit: int = FACET_LIMIT):
+    """The tags on the most public sets, with their set counts."""
+    return [
+        {'tag': tag, 'count': count}
+        for tag, count in
+        db.query(TagCount.tag, TagCount.set_count)
+        .order_by(TagCount.set_count.desc())
+        .limit(limit)
+    ]
@@ -0,0 +1,59 @@
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.models import Watermark
+
+# Ids are allocated before commit, so a missing id can be a transaction that
+# hasn't committed yet. Incremental jobs stop at the first one until a row
+# after it is this many seconds old, and only then treat it as rolled back or
+# purged.
+COMMIT_GRACE_SECONDS = 300
+
+
+def get_watermark(db: Session, name: str):
+    """Get how far an incremental job has got, creating its watermark at 0 the first time."""
+    position = db.query(Watermark.position).filter(Watermark.name == name).scalar()
+
+    if position is None:
+        db.add(Watermark(name=name, position=0))
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker created it first
+            db.rollback()
+        position = db.query(Watermark.position).filter(Watermark.name == name).scalar()
+
+    return position
+
+
+def committed_end(db: Session, id_column, created_column, cutoff, start: int, batch_size: int):
+    """
+    The highest id in the next batch_size rows after start that a job can
+    read up to without skipping rows still being committed. Rows created
+    after cutoff are recent enough that a gap before them may yet fill.
+    """
+    rows = (
+        db.query(id_column, created_column > cutoff)
+        .filter(id_column > start)
+        .order_by(id_column)
+        .limit(batch_size)
+    )
+    end = start
+    for row_id, recent in rows:
+        if row_id != end + 1 and recent:
+            break
+        end = row_id
+    return end
+
+
+def advance_watermark(db: Session, name: str, old: int, new: int):
+    """
+    Move a watermark from old to new inside the caller's transaction.
+    Returns False if another worker moved it first, in which case the caller
+    should roll back the work it did for that range.
+    """
+    updated = (
+        db.query(Watermark)
+        .filter(Watermark.name == name, Watermark.position == old)
+        .update({Watermark.position: new}, synchronize_session=False)
+    )
+    return updated == 1
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
@@ -18,12 +18,45 @@ engine = create_engine(
     connect_args={"check_same_thread": False}  # Needed for SQLite
 )
 
+
+@event.listens_for(engine, "connect")
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """SQLite only enforces foreign keys, including ON DELETE CASCADE, when asked to."""
+    if engine.dialect.name == "sqlite":
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+# Number of pooled connections each worker opens before reporting ready
+POOL_WARM_SIZE = int(os.getenv("DB_POOL_WARM_SIZE", "2"))
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # Base class for our models
 Base = declarative_base()
 
+def warm_pool(size: int = POOL_WARM_SIZE):
+    """Open pooled connections up front so the first requests don't pay for them."""
+    connections = [engine.connect() for _ in range(size)]
+    try:
+        for connection in connections:
+            connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def run_in_session(func, *args, **kwargs):
+    """Call a crud function with its own session, for work done outside a request."""
+    db = SessionLocal()
+    try:
+        return func(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
 # Dependency to get DB session
 def get_db():
     db = SessionLocal()
@@ -0,0 +1,213 @@
+"""
+Background jobs kept in the database.
+
+Routers queue work with job_runner.enqueue() and return straight away. Every
+API worker process, and any process started with worker.py, runs a JobRunner
+whose threads claim due jobs from the jobs table and call the registered
+crud function with its own session. Claims are conditional UPDATEs and lapse
+unless the runner keeps renewing them, so a job runs in one process at a time
+and is picked up again if the process holding it dies. Jobs must therefore be
+safe to run again from the start, like the purges and refreshes below.
+"""
+import logging
+import os
+import socket
+import threading
+import traceback
+import uuid
+from app.database import SessionLocal, run_in_session
+from app.crud import purge_deleted_sets, purge_deleted_users, rebalance_card_positions
+from app.crud.jobs import (
+    JOB_MAX_ATTEMPTS, enqueue_job, claim_job, renew_job_claims, complete_job, fail_job,
+    fail_abandoned_jobs, enqueue_due_schedules, prune_finished_jobs
+)
+from app.crud.popularity import refresh_set_popularity
+from app.crud.similarity import refresh_set_signatures
+from app.crud.progress_archive import archive_inactive_progress, PROGRESS_ARCHIVE_AFTER_DAYS
+from app.crud.review_stats import refresh_review_rollups
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Threads running jobs in each process; 0 leaves jobs to worker.py processes
+JOB_WORKER_THREADS = int(os.getenv("JOB_WORKER_THREADS", "2"))
+# Seconds between checks for due jobs when none were queued by this process
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "1"))
+# Seconds a claim lasts without renewal before another runner may take the job over
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+
+
+class JobRunner:
+    """Claims and runs registered jobs on a pool of daemon threads, and queues periodic ones."""
+
+    def __init__(self, threads: int = JOB_WORKER_THREADS, poll_interval: float = JOB_POLL_SECONDS,
+                 lease_seconds: float = JOB_LEASE_SECONDS):
+        self.threads = threads
+        self.worker = None
+        self._poll_interval = poll_interval
+        self._lease_seconds = lease_seconds
+        self._handlers = {}
+        self._limits = {}
+        self._schedules = {}
+        self._running = {}  # job id -> name, for the jobs this process holds
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._threads = []
+
+    def register(self, name: str, func, concurrency: int = None):
+        """
+        Run jobs called name with func(db, **args). concurrency caps how many
+        of them this process runs at once.
+        """
+        self._handlers[name] = func
+        if concurrency is not None:
+            self._limits[name] = concurrency
+
+    def schedule(self, name: str, interval: float, enabled: bool = True):
+        """Queue the registered job called name every interval seconds across all runners."""
+        if enabled:
+            self._schedules[name] = (name, interval)
+
+    def enqueue(self, db, name: str, args: dict = None, user_id: int = None, dedupe_key: str = None,
+                delay: float = 0, max_attempts: int = JOB_MAX_ATTEMPTS):
+        """Queue a registered job, committing it, and wake this process's runner."""
+        if name not in self._handlers:
+            raise ValueError(f"Unknown job {name}")
+        job = enqueue_job(db, name, args, user_id=user_id, delay=delay,
+                          max_attempts=max_attempts, dedupe_key=dedupe_key)
+        self._wakeup.set()
+        return job
+
+    def start(self):
+        if self.threads <= 0 or self._threads:
+            return
+        # Named here rather than on import, as serve.py imports the app before forking workers
+        self.worker = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stopping.clear()
+        targets = [self._schedule_loop, self._renew_loop]
+        targets += [self._work_loop] * self.threads
+        for number, target in enumerate(targets):
+            thread = threading.Thread(target=target, name=f"job-runner-{number}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Stop claiming jobs and wait for the ones already running to finish."""
+        if self._threads:
+            self._stopping.set()
+            self._wakeup.set()
+            for thread in self._threads:
+                thread.join()
+            self._threads = []
+
+    def _claimable_names(self):
+        with self._lock:
+            running = list(self._running.values())
+        return [
+            name for name in self._handlers
+            if name not in self._limits or running.count(name) < self._limits[name]
+        ]
+
+    def _work_loop(self):
+        while not self._stopping.is_set():
+            try:
+                ran = self._run_next()
+            except Exception:
+                logger.exception("Job runner %s failed to claim a job", self.worker)
+                ran = False
+            if not ran:
+                self._wakeup.wait(self._poll_interval)
+                self._wakeup.clear()
+
+    def _run_next(self):
+        """Claim and run one job. Returns False if none was due."""
+        names = self._claimable_names()
+        if not names:
+            return False
+
+        job = run_in_session(claim_job, names, self.worker, self._lease_seconds)
+        if job is None:
+            return False
+
+        with self._lock:
+            self._running[job.id] = job.name
+        try:
+            self._execute(job)
+        finally:
+            with self._lock:
+                del self._running[job.id]
+        return True
+
+    def _execute(self, job):
+        db = SessionLocal()
+        try:
+            result = self._handlers[job.name](db, **job.args)
+        except Exception:
+            db.rollback()
+            logger.exception("Job %s (%s) failed on attempt %s", job.id, job.name, job.attempts)
+            recorded = fail_job(db, job.id, self.worker, traceback.format_exc(limit=5))
+        else:
+            recorded = complete_job(db, job.id, self.worker, result if _is_json(result) else None)
+        finally:
+            db.close()
+
+        if not recorded:
+            logger.warning("Job %s (%s) outlived its claim and was taken over", job.id, job.name)
+
+    def _schedule_loop(self):
+        while not self._stopping.wait(self._poll_interval):
+            try:
+                run_in_session(fail_abandoned_jobs)
+                if run_in_session(enqueue_due_schedules, self._schedules):
+                    self._wakeup.set()
+            except Exception:
+                logger.exception("Job runner %s failed to queue scheduled jobs", self.worker)
+
+    def _renew_loop(self):
+        while not self._stopping.wait(self._lease_seconds / 3):
+            with self._lock:
+                job_ids = list(self._running)
+            try:
+                run_in_session(renew_job_claims, job_ids, self.worker, self._lease_seconds)
+            except Exception:
+                logger.exception("Job runner %s failed to renew its claims", self.worker)
+
+
+def _is_json(value):
+    return value is None or isinstance(value, (bool, int, float, str, list, dict))
+
+
+job_runner = JobRunner()
+
+# Work queued by requests
+job_runner.register("purge_deleted_sets", purge_deleted_sets)
+job_runner.register("purge_deleted_users", purge_deleted_users, concurrency=1)
+job_runner.register("rebalance_card_positions", rebalance_card_positions)
+
+# Recompute trending and popular scores for sets with new study activity
+job_runner.register("refresh_set_popularity", refresh_set_popularity)
+job_runner.schedule("refresh_set_popularity", int(os.getenv("POPULARITY_REFRESH_SECONDS", "300")))
+
+# Recompute MinHash signatures of sets whose cards changed
+job_runner.register("refresh_set_signatures", refresh_set_signatures)
+job_runner.schedule("refresh_set_signatures", int(os.getenv("SIGNATURE_REFRESH_SECONDS", "60")))
+
+# Move progress of long inactive users into the compact archive table
+job_runner.register("archive_inactive_progress", archive_inactive_progress)
+job_runner.schedule(
+    "archive_inactive_progress",
+    int(os.getenv("PROGRESS_ARCHIVE_INTERVAL_SECONDS", "86400")),
+    enabled=PROGRESS_ARCHIVE_AFTER_DAYS > 0
+)
+
+# Roll new review events up into per-user daily stats
+job_runner.register("refresh_review_rollups", refresh_review_rollups)
+job_runner.schedule("refresh_review_rollups", int(os.getenv("REVIEW_ROLLUP_SECONDS", "60")))
+
+# Drop finished jobs past their retention
+job_runner.register("prune_finished_jobs", prune_finished_jobs)
+job_runner.schedule("prune_finished_jobs", 3600)
@@ -0,0 +1,393 @@
+"""
+Live multiplayer quiz games over WebSockets.
+
+A host opens a game on a set and students join it with the game's code. The
+host moves the game through the questions; students answer each one against
+the clock and see a leaderboard after it closes.
+
+Games are kept in memory by the process that created them, so every socket of
+a game has to reach that process. Run live games on a single process with
+live.py and route /live to it (see the README); serve.py's workers don't
+share games with each other.
+
+Each message is serialized once per game and the same text is queued on every
+socket. A writer task per socket drains its queue, so a slow client can't hold
+up the others; one that falls LIVE_SEND_QUEUE messages behind is dropped.
+Answers are only queued as they arrive and are scored in batches every
+LIVE_TICK_MS, which also sends the answer counts, so the work per answer stays
+small however many students are playing.
+"""
+import asyncio
+import bisect
+import json
+import logging
+import os
+import random
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+LIVE_MAX_PLAYERS = int(os.getenv("LIVE_MAX_PLAYERS", "2000"))
+# Milliseconds between scoring the queued answers and sending answer counts
+LIVE_TICK_MS = int(os.getenv("LIVE_TICK_MS", "100"))
+# Messages queued for a socket before it's dropped as too slow to keep up
+LIVE_SEND_QUEUE = int(os.getenv("LIVE_SEND_QUEUE", "64"))
+# Games with nobody connected are removed after this many seconds
+LIVE_IDLE_SECONDS = int(os.getenv("LIVE_IDLE_SECONDS", "600"))
+
+MAX_OPTIONS = 4
+LEADERBOARD_SIZE = 10
+# Points for a correct answer, plus up to as many again for answering quickly
+BASE_POINTS = 500
+CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+CODE_LENGTH = 6
+
+# Close codes sent to clients
+CLOSE_REPLACED = 4000
+CLOSE_UNAUTHORIZED = 4401
+CLOSE_NOT_FOUND = 4404
+CLOSE_TOO_SLOW = 4408
+CLOSE_FULL = 4409
+
+
+def encode(message: dict):
+    return json.dumps(message, separators=(',', ':'))
+
+
+def build_questions(cards, count: int):
+    """
+    Multiple choice questions from (term, definition) pairs: each picked
+    card's definition shuffled in among up to three others from the set.
+    """
+    definitions = list(dict.fromkeys(definition for _, definition in cards))
+    questions = []
+    for term, definition in random.sample(cards, min(count, len(cards))):
+        others = [other for other in definitions if other != definition]
+        options = random.sample(others, min(MAX_OPTIONS - 1, len(others))) + [definition]
+        random.shuffle(options)
+        questions.append({'term': term, 'options': options, 'answer': options.index(definition)})
+    return questions
+
+
+class LiveLeaderboard:
+    """Scores kept sorted as they change, so the top K is a slice and a player's rank is a binary search."""
+
+    def __init__(self):
+        self.entries = []  # (-score, user_id)
+        self.scores = {}
+
+    def add(self, user_id: int):
+        if user_id not in self.scores:
+            self.scores[user_id] = 0
+            bisect.insort(self.entries, (0, user_id))
+
+    def add_points(self, user_id: int, points: int):
+        score = self.scores[user_id]
+        del self.entries[bisect.bisect_left(self.entries, (-score, user_id))]
+        self.scores[user_id] = score + points
+        bisect.insort(self.entries, (-(score + points), user_id))
+
+    def rank(self, user_id: int):
+        """1-based rank; players with equal scores share a rank."""
+        return bisect.bisect_left(self.entries, (-self.scores[user_id],)) + 1
+
+    def top(self, k: int, names):
+        top = []
+        for negative_score, user_id in self.entries[:k]:
+            rank = top[-1]['rank'] if top and top[-1]['score'] == -negative_score else len(top) + 1
+            top.append({'rank': rank, 'user_id': user_id, 'name': names[user_id], 'score': -negative_score})
+        return top
+
+
+class Connection:
+    """A socket with its own send queue, drained by a writer task."""
+
+    def __init__(self, websocket, user_id: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.closed = False
+        self._queue = asyncio.Queue(LIVE_SEND_QUEUE)
+        self._writer = asyncio.create_task(self._write())
+
+    def send(self, text: str):
+        if self.closed:
+            return
+        try:
+            self._queue.put_nowait(text)
+        except asyncio.QueueFull:
+            logger.info("Dropping live game socket of user %s, too far behind", self.user_id)
+            self.close(CLOSE_TOO_SLOW)
+
+    def close(self, code: int = 1000):
+        """Close straight away, dropping anything still queued."""
+        if not self.closed:
+            self.closed = True
+            self._writer.cancel()
+            asyncio.create_task(self._close(code))
+
+    async def finish(self, code: int = 1000, timeout: float = 10):
+        """Close once everything queued has been sent, or after timeout seconds."""
+        if not self.closed:
+            self.closed = True
+            try:
+                await asyncio.wait_for(self._drain(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            await self._close(code)
+
+    async def _drain(self):
+        await self._queue.put(None)
+        await self._writer
+
+    async def _write(self):
+        try:
+            while True:
+                text = await self._queue.get()
+                if text is None:
+                    return
+                await self.websocket.send_text(text)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The socket went away; its reader notices and leaves the game
+            self.closed = True
+
+    async def _close(self, code: int):
+        try:
+            await self.websocket.close(code)
+        except Exception:
+            pass
+
+
+class LiveGame:
+    """One game's state, changed only from the event loop so it needs no locks."""
+
+    def __init__(self, games, code: str, host_id: int, set_id: int, title: str, questions, question_seconds: int):
+        self.code = code
+        self.host_id = host_id
+        self.set_id = set_id
+        self.title = title
+        self.questions = questions
+        self.question_seconds = question_seconds
+        self.state = 'lobby'  # lobby, question, results or ended
+        self.index = -1
+        self.host = None
+        self.players = {}  # user_id -> Connection of the players connected now
+        self.names = {}  # user_id -> name, kept for players who dropped out
+        self.leaderboard = LiveLeaderboard()
+        self._games = games
+        self._loop = asyncio.get_running_loop()
+        self._deadline = None
+        self._pending = []  # (user_id, option, answered at) waiting to be scored
+        self._answered = set()
+        self._counts = []
+        self._points = {}
+        self._question_message = None
+        self._answered_message = None
+        self._sent_counts = None
+        self._idle_since = self._loop.time()
+        self._task = asyncio.create_task(self._run())
+
+    def summary(self):
+        return {
+            'code': self.code,
+            'set_id': self.set_id,
+            'title': self.title,
+            'questions': len(self.questions),
+            'question_seconds': self.question_seconds,
+            'state': self.state,
+            'players': len(self.players),
+        }
+
+    def join(self, websocket, user_id: int, name: str):
+        """Add a socket to the game, replacing the user's earlier one. Returns None if the player can't join."""
+        if user_id == self.host_id:
+            previous, self.host = self.host, Connection(websocket, user_id)
+            connection = self.host
+        else:
+            if self.state == 'ended' or (user_id not in self.players and len(self.players) >= LIVE_MAX_PLAYERS):
+                return None
+            previous = self.players.get(user_id)
+            connection = self.players[user_id] = Connection(websocket, user_id)
+            self.names[user_id] = name
+            self.leaderboard.add(user_id)
+
+        if previous is not None:
+            previous.close(CLOSE_REPLACED)
+
+        connection.send(encode({
+            'type': 'joined',
+            'role': 'host' if user_id == self.host_id else 'player',
+            'game': self.summary(),
+        }))
+        if self.state == 'question':
+            connection.send(self._question_message)
+            if user_id in self._answered:
+                connection.send(self._answered_message)
+        return connection
+
+    def leave(self, connection: Connection):
+        if connection is self.host:
+            self.host = None
+        elif self.players.get(connection.user_id) is connection:
+            del self.players[connection.user_id]
+        if not self.players and self.host is None:
+            self._idle_since = self._loop.time()
+
+    def handle(self, connection: Connection, message):
+        """Act on a message from a socket: the host's next and end, or a player's answer."""
+        kind = message.get('type') if isinstance(message, dict) else None
+
+        if connection is self.host:
+            if kind in ('start', 'next') and self.state in ('lobby', 'results'):
+                if self.index + 1 < len(self.questions):
+                    self._open_question()
+                else:
+                    self._end()
+            elif kind == 'end' and self.state != 'ended':
+                self._end()
+        elif kind == 'answer' and self.state == 'question':
+            option = message.get('option')
+            if (
+                message.get('index') == self.index
+                and connection.user_id not in self._answered
+                and isinstance(option, int) and 0 <= option < len(self._counts)
+            ):
+                self._answered.add(connection.user_id)
+                self._pending.append((connection.user_id, option, self._loop.time()))
+                connection.send(self._answered_message)
+
+    def broadcast(self, text: str):
+        if self.host is not None:
+            self.host.send(text)
+        for connection in list(self.players.values()):
+            connection.send(text)
+
+    def _open_question(self):
+        self.index += 1
+        self.state = 'question'
+        question = self.questions[self.index]
+        self._deadline = self._loop.time() + self.question_seconds
+        self._pending = []
+        self._answered = set()
+        self._points = {}
+        self._counts = [0] * len(question['options'])
+        self._sent_counts = None
+        self._question_message = encode({
+            'type': 'question',
+            'index': self.index,
+            'count': len(self.questions),
+            'term': question['term'],
+            'options': question['options'],
+            'seconds': self.question_seconds,
+        })
+        self._answered_message = encode({'type': 'answered', 'index': self.index})
+        self.broadcast(self._question_message)
+
+    def _score_pending(self):
+        answer = self.questions[self.index]['answer']
+        for user_id, option, answered_at in self._pending:
+            self._counts[option] += 1
+            if option == answer:
+                remaining = max(0.0, self._deadline - answered_at) / self.question_seconds
+                points = BASE_POINTS + round(BASE_POINTS * remaining)
+                self._points[user_id] = points
+                self.leaderboard.add_points(user_id, points)
+        self._pending = []
+
+    def _close_question(self):
+        self._score_pending()
+        self.state = 'results'
+        self.broadcast(encode({
+            'type': 'results',
+            'index': self.index,
+            'answer': self.questions[self.index]['answer'],
+            'counts': self._counts,
+            'leaderboard': self.leaderboard.top(LEADERBOARD_SIZE, self.names),
+            'last': self.index + 1 == len(self.questions),
+        }))
+        self._send_scores()
+
+    def _send_scores(self):
+        # The only per-player messages: each player's own points and rank
+        for user_id, connection in list(self.players.items()):
+            connection.send(encode({
+                'type': 'score',
+                'index': self.index,
+                'points': self._points.get(user_id, 0),
+                'score': self.leaderboard.scores[user_id],
+                'rank': self.leaderboard.rank(user_id),
+            }))
+
+    def _end(self):
+        if self.state == 'question':
+            self._close_question()
+        self.state = 'ended'
+        self.broadcast(encode({
+            'type': 'ended',
+            'leaderboard': self.leaderboard.top(LEADERBOARD_SIZE, self.names),
+            'players': len(self.leaderboard.scores),
+        }))
+
+    def _tick(self):
+        """Score the answers queued since the last tick and send what changed."""
+        if self.state == 'question':
+            self._score_pending()
+            everyone_answered = self.players and self._answered.issuperset(self.players)
+            if self._loop.time() >= self._deadline or everyone_answered:
+                self._close_question()
+                return
+            counts = (len(self._answered), len(self.players))
+            if counts != self._sent_counts:
+                self._sent_counts = counts
+                self.broadcast(encode({
+                    'type': 'answers', 'index': self.index, 'answered': counts[0], 'players': counts[1]
+                }))
+        elif self.state == 'lobby':
+            counts = (0, len(self.players))
+            if counts != self._sent_counts:
+                self._sent_counts = counts
+                self.broadcast(encode({'type': 'lobby', 'players': counts[1]}))
+
+    async def _run(self):
+        try:
+            while self.state != 'ended':
+                await asyncio.sleep(LIVE_TICK_MS / 1000)
+                self._tick()
+                idle = not self.players and self.host is None
+                if idle and self._loop.time() - self._idle_since > LIVE_IDLE_SECONDS:
+                    self.state = 'ended'
+            # Let everyone receive the final leaderboard before hanging up
+            connections = list(self.players.values()) + ([self.host] if self.host else [])
+            await asyncio.gather(*(connection.finish() for connection in connections))
+        except Exception:
+            logger.exception("Live game %s failed", self.code)
+        finally:
+            self._games.remove(self.code)
+
+
+class LiveGames:
+    """The live games held by this process, by code."""
+
+    def __init__(self):
+        self._games = {}
+
+    def create(self, host_id: int, set_id: int, title: str, questions, question_seconds: int):
+        """Start a game in the lobby. Must be called from the event loop."""
+        code = ''.join(random.choices(CODE_ALPHABET, k=CODE_LENGTH))
+        while code in self._games:
+            code = ''.join(random.choices(CODE_ALPHABET, k=CODE_LENGTH))
+        game = self._games[code] = LiveGame(self, code, host_id, set_id, title, questions, question_seconds)
+        return game
+
+    def get(self, code: str):
+        return self._games.get(code.upper())
+
+    def remove(self, code: str):
+        self._games.pop(code, None)
+
+
+live_games = LiveGames()
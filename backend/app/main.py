@@ -1,17 +1,50 @@
-from fastapi import FastAPI
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, sets, cards, progress, search
-from app.database import engine
+from starlette.concurrency import run_in_threadpool
+from app.routers import auth, sets, cards, progress, search, sync, match, classes, live, jobs
+from app.database import engine, warm_pool, run_in_session
+from app.crud.progress_buffer import progress_buffer
+from app.crud.suggest import refresh_suggest_index
+from app.jobs import job_runner
+from app.tasks import PeriodicTask
 from app.models import models
 
 # Create database tables if they don't exist
 models.Base.metadata.create_all(bind=engine)
 
+# Apply set changes to the search suggestion index and rebuild it when due
+suggest_refresh = PeriodicTask(
+    "suggest-refresh",
+    int(os.getenv("SUGGEST_REFRESH_SECONDS", "10")),
+    refresh_suggest_index
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start this worker's background services, warming its connection pool before it reports ready."""
+    app.state.pool_warm = False
+    await run_in_threadpool(warm_pool)
+    await run_in_threadpool(run_in_session, refresh_suggest_index)
+    app.state.pool_warm = True
+    progress_buffer.start()
+    suggest_refresh.start()
+    job_runner.start()
+    yield
+    await run_in_threadpool(job_runner.stop)
+    await run_in_threadpool(suggest_refresh.stop)
+    # Buffered progress updates must reach the database before the worker exits
+    await run_in_threadpool(progress_buffer.stop)
+
+
 # Create FastAPI app
 app = FastAPI(
     title="StudySprout API",
     description="API for StudySprout, a flashcard learning application",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -29,6 +62,11 @@ app.include_router(sets.router)
 app.include_router(cards.router)
 app.include_router(progress.router)
 app.include_router(search.router)
+app.include_router(sync.router)
+app.include_router(match.router)
+app.include_router(classes.router)
+app.include_router(live.router)
+app.include_router(jobs.router)
 
 
 @app.get("/")
@@ -37,6 +75,19 @@ def read_root():
     return {"message": "Welcome to StudySprout API"}
 
 
+@app.get("/health/ready")
+def readiness(response: Response):
+    """Readiness check reporting whether this worker's connection pool is warm."""
+    ready = getattr(app.state, "pool_warm", False)
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "status": "ready" if ready else "starting",
+        "pid": os.getpid(),
+        "pool": engine.pool.status()
+    }
+
+
 # If running directly with Python
 if __name__ == "__main__":
     import uvicorn
@@ -1,3 +1,13 @@
-from app.models.models import Base, User, Set, Card, UserCardProgress
+from app.models.models import (
+    Base, User, Set, Card, UserCardProgress, MatchScore, ChangeLog,
+    ReviewEvent, DailyReviewStats, CardDifficulty, ProgressArchive, SetPopularity, SetStudier, Watermark,
+    SetSignature, LshBucket, TagPosting, TagCount,
+    Class, ClassMember, ClassSet, Job, JobSchedule
+)
 
-__all__ = ['Base', 'User', 'Set', 'Card', 'UserCardProgress']
+__all__ = [
+    'Base', 'User', 'Set', 'Card', 'UserCardProgress', 'MatchScore', 'ChangeLog',
+    'ReviewEvent', 'DailyReviewStats', 'CardDifficulty', 'ProgressArchive', 'SetPopularity', 'SetStudier', 'Watermark',
+    'SetSignature', 'LshBucket', 'TagPosting', 'TagCount',
+    'Class', 'ClassMember', 'ClassSet', 'Job', 'JobSchedule'
+]
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Text, Table
+from sqlalchemy import DDL, event, Column, Integer, SmallInteger, BigInteger, String, Boolean, ForeignKey, Text, Table, Float, LargeBinary, JSON
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from sqlalchemy.sql.sqltypes import DateTime
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.schema import UniqueConstraint
+from sqlalchemy.schema import Index
 
 Base = declarative_base()
 
@@ -14,10 +14,22 @@ class User(Base):
     email = Column(String, unique=True, index=True, nullable=False)
     password_hash = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set when the account is deleted; the rows are purged in the background
+    deleted_at = Column(DateTime(timezone=True))
 
     # Relationships
-    sets = relationship("Set", back_populates="owner", cascade="all, delete-orphan")
-    progress = relationship("UserCardProgress", back_populates="user", cascade="all, delete-orphan")
+    # Child rows are removed by ON DELETE CASCADE rather than loaded by the ORM
+    sets = relationship("Set", back_populates="owner", cascade="all, delete-orphan", passive_deletes=True)
+    progress = relationship("UserCardProgress", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+
+    # Partial, so the planner never picks it for the usual deleted_at IS NULL filter
+    __table_args__ = (
+        Index(
+            'ix_users_deleted_at', 'deleted_at',
+            sqlite_where=text('deleted_at IS NOT NULL'),
+            postgresql_where=text('deleted_at IS NOT NULL')
+        ),
+    )
 
 
 class Set(Base):
@@ -26,39 +38,62 @@ class Set(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     description = Column(Text)
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     is_public = Column(Boolean, default=False)
+    forked_from_id = Column(Integer, ForeignKey('sets.id', ondelete='SET NULL'))
+    # Normalized subject tags, in the order the owner gave them
+    tags = Column(JSON, nullable=False, default=list, server_default='[]')
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Set when the set is deleted; the rows are purged in the background
+    deleted_at = Column(DateTime(timezone=True))
 
     # Relationships
     owner = relationship("User", back_populates="sets")
-    cards = relationship("Card", back_populates="set", cascade="all, delete-orphan")
+    cards = relationship("Card", back_populates="set", cascade="all, delete-orphan", passive_deletes=True)
+
+    # Partial, so the planner never picks it for the usual deleted_at IS NULL filter
+    __table_args__ = (
+        Index(
+            'ix_sets_deleted_at', 'deleted_at',
+            sqlite_where=text('deleted_at IS NOT NULL'),
+            postgresql_where=text('deleted_at IS NOT NULL')
+        ),
+    )
 
 
 class Card(Base):
     __tablename__ = 'cards'
 
     id = Column(Integer, primary_key=True, index=True)
-    set_id = Column(Integer, ForeignKey('sets.id'), nullable=False)
+    set_id = Column(Integer, ForeignKey('sets.id', ondelete='CASCADE'), nullable=False)
     term = Column(String, nullable=False)
     definition = Column(Text, nullable=False)
     image_url = Column(String)
     audio_url = Column(String)
+    # Fractional index key; compared bytewise so Postgres needs the C collation
+    position = Column(String().with_variant(String(collation='C'), 'postgresql'), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
     # Relationships
     set = relationship("Set", back_populates="cards")
-    progress = relationship("UserCardProgress", back_populates="card", cascade="all, delete-orphan")
+    progress = relationship("UserCardProgress", back_populates="card", cascade="all, delete-orphan", passive_deletes=True)
+
+    # Ordered reads of a set's cards walk this index instead of sorting
+    __table_args__ = (
+        Index('ix_cards_set_id_position', 'set_id', 'position'),
+    )
 
 
 class UserCardProgress(Base):
     __tablename__ = 'user_card_progress'
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
-    card_id = Column(Integer, ForeignKey('cards.id'), nullable=False)
+    # A user can only have one progress record per card, so (user_id, card_id)
+    # is the key. It is the table itself on SQLite (WITHOUT ROWID), which keeps
+    # each user's rows together, and on Postgres rows are hash partitioned by user.
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    card_id = Column(Integer, ForeignKey('cards.id', ondelete='CASCADE'), primary_key=True)
     mastery_level = Column(Integer, default=0)  # 0=unknown, 1=known
     last_studied = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
@@ -66,7 +101,293 @@ class UserCardProgress(Base):
     user = relationship("User", back_populates="progress")
     card = relationship("Card", back_populates="progress")
 
-    # Ensure a user can only have one progress record per card
     __table_args__ = (
-        UniqueConstraint('user_id', 'card_id', name='uix_user_card'),
+        # Needed to delete a card's progress without scanning every user
+        Index('ix_user_card_progress_card_id', 'card_id'),
+        {'sqlite_with_rowid': False, 'postgresql_partition_by': 'HASH (user_id)'},
+    )
+
+
+PROGRESS_PARTITIONS = 16
+
+for remainder in range(PROGRESS_PARTITIONS):
+    event.listen(
+        UserCardProgress.__table__,
+        'after_create',
+        DDL(
+            f"CREATE TABLE user_card_progress_p{remainder} PARTITION OF user_card_progress "
+            f"FOR VALUES WITH (MODULUS {PROGRESS_PARTITIONS}, REMAINDER {remainder})"
+        ).execute_if(dialect='postgresql')
+    )
+
+
+class ReviewEvent(Base):
+    __tablename__ = 'review_events'
+
+    # Append-only: one row per progress update, never changed afterwards.
+    # Integers only to keep rows small; created_at is Unix seconds and day
+    # is the UTC day number it falls on.
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    card_id = Column(Integer, nullable=False)
+    set_id = Column(Integer, nullable=False)
+    mastery_level = Column(SmallInteger, nullable=False)
+    is_new = Column(SmallInteger, nullable=False, default=0)  # first review of the card by the user
+    day = Column(Integer, nullable=False)
+    created_at = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('ix_review_events_user_id', 'user_id'),
+    )
+
+
+class DailyReviewStats(Base):
+    __tablename__ = 'daily_review_stats'
+
+    # Review events rolled up per user per UTC day
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    day = Column(Integer, primary_key=True)
+    reviews = Column(Integer, nullable=False, default=0)
+    known = Column(Integer, nullable=False, default=0)  # reviews that marked the card known
+    new_cards = Column(Integer, nullable=False, default=0)
+
+
+class CardDifficulty(Base):
+    __tablename__ = 'card_difficulty'
+
+    # Review counters for a card across all learners, split over a few shard
+    # rows so concurrent reviews of a popular card don't queue on one row.
+    # A card's totals are the sums over its shards.
+    card_id = Column(Integer, ForeignKey('cards.id', ondelete='CASCADE'), primary_key=True)
+    shard = Column(SmallInteger, primary_key=True, autoincrement=False)
+    set_id = Column(Integer, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    known = Column(Integer, nullable=False, default=0)  # attempts that marked the card known
+    learned = Column(Integer, nullable=False, default=0)  # unknown -> known transitions
+    forgotten = Column(Integer, nullable=False, default=0)  # known -> unknown transitions
+    learners = Column(Integer, nullable=False, default=0)  # distinct users who reviewed the card
+
+    __table_args__ = (
+        Index('ix_card_difficulty_set_id_card_id', 'set_id', 'card_id'),
+    )
+
+
+class ProgressArchive(Base):
+    __tablename__ = 'user_card_progress_archive'
+
+    # Progress rows of a user who stopped studying, packed into one compressed
+    # blob. They move back into user_card_progress when the user returns.
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    row_count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class MatchScore(Base):
+    __tablename__ = 'match_scores'
+
+    # One row per player per set, holding that player's best match time
+    set_id = Column(Integer, ForeignKey('sets.id', ondelete='CASCADE'), primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    best_time_ms = Column(Integer, nullable=False)
+    plays = Column(Integer, nullable=False, default=1)
+    achieved_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Leaderboards read a set's bests in time order straight off this index
+    __table_args__ = (
+        Index('ix_match_scores_set_id_best_time_ms', 'set_id', 'best_time_ms'),
+    )
+
+
+class ChangeLog(Base):
+    __tablename__ = 'change_log'
+
+    # Monotonic version; clients pass the last one they saw back as their sync token
+    id = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)  # 'set', 'card' or 'progress'
+    entity_id = Column(Integer, nullable=False)  # card_id for progress entries
+    set_id = Column(Integer)
+    user_id = Column(Integer)  # set owner, or the learner for progress entries
+    deleted = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # No foreign keys: entries have to outlive the rows they describe
+    __table_args__ = (
+        Index('ix_change_log_set_id_id', 'set_id', 'id'),
+        Index('ix_change_log_user_id_id', 'user_id', 'id'),
+        Index('ix_change_log_created_at', 'created_at'),
+        {'sqlite_autoincrement': True},
+    )
+
+
+class TagPosting(Base):
+    __tablename__ = 'tag_postings'
+
+    # Inverted index from tag to the public, non-deleted sets carrying it.
+    # The key keeps each tag's posting list sorted by set id.
+    tag = Column(String, primary_key=True)
+    set_id = Column(Integer, ForeignKey('sets.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        Index('ix_tag_postings_set_id', 'set_id'),
+    )
+
+
+class TagCount(Base):
+    __tablename__ = 'tag_counts'
+
+    # Length of each tag's posting list, kept up to date as sets change
+    tag = Column(String, primary_key=True)
+    set_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index('ix_tag_counts_set_count', 'set_count'),
     )
+
+
+class SetPopularity(Base):
+    __tablename__ = 'set_popularity'
+
+    # Rows only exist for public sets with study activity
+    set_id = Column(Integer, ForeignKey('sets.id', ondelete='CASCADE'), primary_key=True)
+    studiers = Column(Integer, nullable=False, default=0)  # distinct learners
+    reviews = Column(Integer, nullable=False, default=0)
+    # log2 of the time-decayed activity score, measured from a fixed epoch so
+    # sets without new activity never need rescoring to stay comparable
+    trending_score = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index('ix_set_popularity_trending_score', 'trending_score'),
+        Index('ix_set_popularity_studiers_reviews', 'studiers', 'reviews'),
+    )
+
+
+class SetStudier(Base):
+    __tablename__ = 'set_studiers'
+
+    # Everyone who has studied a set, so set_popularity.studiers only grows by
+    # the learners who are new to it
+    set_id = Column(Integer, ForeignKey('sets.id', ondelete='CASCADE'), primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        Index('ix_set_studiers_user_id', 'user_id'),
+    )
+
+
+class Watermark(Base):
+    __tablename__ = 'watermarks'
+
+    # Position up to which an incremental job has processed its source
+    name = Column(String, primary_key=True)
+    position = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class SetSignature(Base):
+    __tablename__ = 'set_signatures'
+
+    # MinHash signature of a public set's normalized card terms and definitions
+    set_id = Column(Integer, ForeignKey('sets.id', ondelete='CASCADE'), primary_key=True)
+    signature = Column(LargeBinary, nullable=False)  # packed uint32 per hash function
+    element_count = Column(Integer, nullable=False, default=0)
+    # Older public set this one nearly duplicates, if any
+    duplicate_of = Column(Integer, ForeignKey('sets.id', ondelete='SET NULL'))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class LshBucket(Base):
+    __tablename__ = 'lsh_buckets'
+
+    # One row per band of a set's signature; sets sharing a bucket are candidates
+    bucket = Column(BigInteger, primary_key=True, autoincrement=False)
+    band = Column(Integer, nullable=False)
+    set_id = Column(Integer, ForeignKey('sets.id', ondelete='CASCADE'), primary_key=True)
+
+    __table_args__ = (
+        Index('ix_lsh_buckets_set_id', 'set_id'),
+    )
+
+
+class Class(Base):
+    __tablename__ = 'classes'
+
+    # A teacher's group of students, who are assigned sets to study
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    owner_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    # Students join with this code; nobody is added to a class without it
+    join_code = Column(String, nullable=False)
+    # Bumped whenever membership changes, so cached progress matrices are rebuilt
+    version = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_classes_owner_id', 'owner_id'),
+        Index('ix_classes_join_code', 'join_code', unique=True),
+    )
+
+
+class ClassMember(Base):
+    __tablename__ = 'class_members'
+
+    class_id = Column(Integer, ForeignKey('classes.id', ondelete='CASCADE'), primary_key=True)
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    joined_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_class_members_user_id', 'user_id'),
+    )
+
+
+class ClassSet(Base):
+    __tablename__ = 'class_sets'
+
+    # A set assigned to a class
+    class_id = Column(Integer, ForeignKey('classes.id', ondelete='CASCADE'), primary_key=True)
+    set_id = Column(Integer, ForeignKey('sets.id', ondelete='CASCADE'), primary_key=True)
+    assigned_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_class_sets_set_id', 'set_id'),
+    )
+
+class Job(Base):
+    __tablename__ = 'jobs'
+
+    # Work queued for the background job runner; see app/jobs.py
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    args = Column(JSON, nullable=False, default=dict)
+    # User the job runs on behalf of, who may check on it
+    user_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'))
+    status = Column(String, nullable=False, default='queued')  # queued, running, succeeded or failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    # Earliest time the job may run, pushed back after a failed attempt
+    run_at = Column(DateTime(timezone=True), nullable=False)
+    # Runner holding the job and when its claim lapses if it stops renewing it
+    locked_by = Column(String)
+    locked_until = Column(DateTime(timezone=True))
+    # While queued, at most one job holds a given key
+    dedupe_key = Column(String)
+    result = Column(JSON)
+    last_error = Column(Text)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index('ix_jobs_status_run_at', 'status', 'run_at'),
+        Index('ix_jobs_user_id_id', 'user_id', 'id'),
+        Index('ix_jobs_dedupe_key', 'dedupe_key', unique=True),
+    )
+
+
+class JobSchedule(Base):
+    __tablename__ = 'job_schedules'
+
+    # When a periodic job is next due, claimed by one runner per run
+    name = Column(String, primary_key=True)
+    next_run_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,3 +1,3 @@
-from app.routers import auth, sets, cards, progress, search
+from app.routers import auth, sets, cards, progress, search, sync, match, classes, live, jobs
 
-__all__ = ['auth', 'sets', 'cards', 'progress', 'search']
+__all__ = ['auth', 'sets', 'cards', 'progress', 'search', 'sync', 'match', 'classes', 'live', 'jobs']
@@ -5,8 +5,9 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas import UserCreate, UserResponse, Token
 from app.models.models import User
-from app.crud import create_user, get_user_by_email
+from app.crud import create_user, get_user_by_email, delete_user
 from app.auth import authenticate_user, create_access_token, get_current_user
+from app.jobs import job_runner
 import os
 from dotenv import load_dotenv
 
@@ -88,3 +89,17 @@ def logout(current_user: User = Depends(get_current_user)):
 def read_users_me(current_user: User = Depends(get_current_user)):
     """Get the current user's information."""
     return current_user
+
+
+@router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
+def delete_account(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Delete the current user's account and all of their sets.
+    The account stops working immediately; its data is removed in the background.
+    """
+    delete_user(db, current_user.id)
+    job_runner.enqueue(db, "purge_deleted_users", dedupe_key="purge_deleted_users")
+    return None
@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 from app.database import get_db
-from app.schemas import CardCreate, CardResponse, CardUpdate
+from app.schemas import CardCreate, CardResponse, CardUpdate, CardMove
 from app.models.models import User
 from app.crud import (
     create_card, get_cards_by_set, get_card_by_id,
-    update_card, delete_card
+    update_card, delete_card, move_card, needs_rebalance
 )
 from app.auth import get_current_user
+from app.routers.fields import Fields, sparse_response
+from app.jobs import job_runner
 
 router = APIRouter(
     prefix="/sets/{set_id}/cards",
@@ -39,23 +41,30 @@ def create_new_card(
 @router.get("/", response_model=List[CardResponse])
 def read_cards(
     set_id: int,
+    skip: int = 0,
+    limit: Optional[int] = None,
+    fields: Optional[Tuple[str, ...]] = Depends(Fields(CardResponse)),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get all flashcards for a set."""
-    cards = get_cards_by_set(db, set_id, current_user.id)
-    return cards
+    """
+    Get the flashcards for a set in order. Omit limit to get all of them.
+    Study modes can ask for just the fields they show, e.g. fields=id,term,definition.
+    """
+    cards = get_cards_by_set(db, set_id, current_user.id, skip, limit, fields)
+    return sparse_response(CardResponse, fields, cards)
 
 
 @router.get("/{card_id}", response_model=CardResponse)
 def read_card(
     set_id: int,
     card_id: int,
+    fields: Optional[Tuple[str, ...]] = Depends(Fields(CardResponse)),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get a specific flashcard by ID."""
-    card = get_card_by_id(db, card_id, set_id, current_user.id)
+    card = get_card_by_id(db, card_id, set_id, current_user.id, fields)
     
     if card is None:
         raise HTTPException(
@@ -63,7 +72,7 @@ def read_card(
             detail=f"Card with ID {card_id} not found or you don't have access"
         )
     
-    return card
+    return sparse_response(CardResponse, fields, card)
 
 
 @router.put("/{card_id}", response_model=CardResponse)
@@ -86,6 +95,32 @@ def update_existing_card(
     return updated_card
 
 
+@router.put("/{card_id}/move", response_model=CardResponse)
+def move_existing_card(
+    set_id: int,
+    card_id: int,
+    move: CardMove,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Move a flashcard to directly after another card, or to the start of the set."""
+    moved_card = move_card(db, card_id, set_id, move, current_user.id)
+    
+    if moved_card is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Card with ID {card_id} not found or you don't have access"
+        )
+    
+    if needs_rebalance(moved_card):
+        job_runner.enqueue(
+            db, "rebalance_card_positions", {"set_id": set_id},
+            user_id=current_user.id, dedupe_key=f"rebalance_card_positions:{set_id}"
+        )
+    
+    return moved_card
+
+
 @router.delete("/{card_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_existing_card(
     set_id: int,
@@ -0,0 +1,193 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.database import get_db
+from app.schemas import ClassCreate, ClassResponse, ClassDetail, ClassJoin, ClassSetProgress
+from app.models.models import User
+from app.crud import (
+    create_class, get_user_classes, get_class, delete_class, join_class, reset_class_join_code, remove_class_member,
+    assign_class_set, unassign_class_set, get_class_set_progress, can_access_set
+)
+from app.auth import get_current_user
+
+router = APIRouter(
+    prefix="/classes",
+    tags=["classes"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+def _class_not_found(class_id: int):
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Class with ID {class_id} not found or you don't have access"
+    )
+
+
+@router.post("/", response_model=ClassResponse, status_code=status.HTTP_201_CREATED)
+def create_new_class(
+    class_data: ClassCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Create a class that you teach. Students join it with the returned join_code."""
+    return create_class(db, class_data.name, current_user.id)
+
+
+@router.get("/", response_model=List[ClassResponse])
+def read_classes(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the classes you teach or are a member of."""
+    return get_user_classes(db, current_user.id)
+
+
+@router.post("/join", response_model=ClassResponse)
+def join_existing_class(
+    join_data: ClassJoin,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Join a class with the code your teacher gave you. Its teacher then sees
+    your progress on the sets assigned to the class until you leave it.
+    """
+    db_class = join_class(db, join_data.join_code, current_user.id)
+
+    if db_class is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No class has that join code"
+        )
+
+    return db_class
+
+
+@router.get("/{class_id}", response_model=ClassDetail)
+def read_class(
+    class_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get a class you teach, with its members and assigned sets."""
+    db_class = get_class(db, class_id, current_user.id)
+
+    if db_class is None:
+        raise _class_not_found(class_id)
+
+    return db_class
+
+
+@router.delete("/{class_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_existing_class(
+    class_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Delete a class you teach. Its members keep their progress."""
+    if not delete_class(db, class_id, current_user.id):
+        raise _class_not_found(class_id)
+
+    return None
+
+
+@router.post("/{class_id}/join-code", response_model=ClassResponse)
+def reset_join_code(
+    class_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Replace the join code of a class you teach. Current members stay."""
+    db_class = reset_class_join_code(db, class_id, current_user.id)
+
+    if db_class is None:
+        raise _class_not_found(class_id)
+
+    return db_class
+
+
+@router.delete("/{class_id}/members/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+def remove_member(
+    class_id: int,
+    user_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Remove a student from a class you teach, or leave a class by passing your own user ID."""
+    if not remove_class_member(db, class_id, user_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User with ID {user_id} is not a member of class {class_id} or you don't have access"
+        )
+
+    return None
+
+
+@router.put("/{class_id}/sets/{set_id}", status_code=status.HTTP_204_NO_CONTENT)
+def assign_set(
+    class_id: int,
+    set_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Assign one of your sets, or a public one, to a class you teach."""
+    if not can_access_set(db, set_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Set with ID {set_id} not found or you don't have access"
+        )
+
+    if not assign_class_set(db, class_id, set_id, current_user.id):
+        raise _class_not_found(class_id)
+
+    return None
+
+
+@router.delete("/{class_id}/sets/{set_id}", status_code=status.HTTP_204_NO_CONTENT)
+def unassign_set(
+    class_id: int,
+    set_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Remove a set from a class you teach."""
+    if not unassign_class_set(db, class_id, set_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Set with ID {set_id} is not assigned to class {class_id} or you don't have access"
+        )
+
+    return None
+
+
+@router.get("/{class_id}/sets/{set_id}/progress", response_model=ClassSetProgress)
+def read_class_set_progress(
+    class_id: int,
+    set_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get every student's progress on a set assigned to a class you teach.
+    card_ids lists the set's cards in order; each student's studied_bits and
+    known_bits are base64 bitsets over that list, where bit i (byte i // 8,
+    bit i % 8, least significant first) stands for card_ids[i]. The response
+    carries an ETag, so a dashboard polling with If-None-Match gets 304 until
+    something changes.
+    """
+    progress = get_class_set_progress(db, class_id, set_id, current_user.id)
+
+    if progress is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Set with ID {set_id} is not assigned to class {class_id} or you don't have access"
+        )
+
+    version, body = progress
+    etag = f'"{version}"'
+    if if_none_match == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    return Response(body, media_type="application/json", headers={"ETag": etag})
@@ -0,0 +1,67 @@
+"""
+Sparse fieldsets for read endpoints.
+
+`?fields=id,term,definition` picks which response fields come back. The
+crud layer loads only the matching columns, and the response is built from
+a copy of the endpoint's schema pruned down to those fields.
+"""
+from functools import lru_cache
+from typing import List, Optional
+from fastapi import HTTPException, Query, Response, status
+from pydantic import ConfigDict, TypeAdapter, create_model
+
+
+class Fields:
+    """Dependency parsing the `fields` query parameter against a response schema."""
+
+    def __init__(self, model):
+        self.model = model
+
+    def __call__(
+        self,
+        fields: Optional[str] = Query(
+            None, description="Comma-separated response fields to return; omit for all of them"
+        )
+    ):
+        if fields is None:
+            return None
+
+        requested = {name.strip() for name in fields.split(",") if name.strip()}
+        unknown = requested - set(self.model.model_fields)
+        if not requested or unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown fields: {', '.join(sorted(unknown))}" if unknown else "No fields requested"
+            )
+
+        # Schema order, so each combination maps to one cached model
+        return tuple(name for name in self.model.model_fields if name in requested)
+
+
+@lru_cache(maxsize=256)
+def sparse_model(model, fields):
+    """A copy of a response schema with only the given fields."""
+    return create_model(
+        f"{model.__name__}Fields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (model.model_fields[name].annotation, model.model_fields[name]) for name in fields}
+    )
+
+
+@lru_cache(maxsize=256)
+def _adapter(model, fields, many):
+    pruned = sparse_model(model, fields)
+    return TypeAdapter(List[pruned] if many else pruned)
+
+
+def sparse_response(model, fields, data):
+    """
+    Serialize ORM data with just the requested fields. Returns the data as is
+    when no fields were requested, leaving it to the route's response_model.
+    """
+    if fields is None:
+        return data
+
+    adapter = _adapter(model, fields, isinstance(data, list))
+    content = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return Response(content=content, media_type="application/json")
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List
+from app.database import get_db
+from app.schemas import JobResponse
+from app.models.models import User
+from app.crud import get_job, get_user_jobs
+from app.auth import get_current_user
+
+router = APIRouter(
+    prefix="/jobs",
+    tags=["jobs"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.get("/", response_model=List[JobResponse])
+def read_jobs(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the background jobs run for you, newest first, such as purging sets you deleted."""
+    return get_user_jobs(db, current_user.id, limit)
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+def read_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the status of a background job run for you: queued, running,
+    succeeded or failed. A job that failed an attempt is queued again with
+    a later run_at until it runs out of attempts.
+    """
+    job = get_job(db, job_id, current_user.id)
+    
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with ID {job_id} not found or you don't have access"
+        )
+    
+    return job
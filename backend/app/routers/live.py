@@ -0,0 +1,121 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import Optional
+from app.database import run_in_session
+from app.schemas import LiveGameCreate, LiveGameResponse
+from app.models.models import User
+from app.crud import get_set_by_id, get_cards_by_set
+from app.auth import get_current_user, user_from_token
+from app.live import live_games, build_questions, CLOSE_UNAUTHORIZED, CLOSE_NOT_FOUND, CLOSE_FULL
+
+router = APIRouter(
+    prefix="/live",
+    tags=["live"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+def _load_set(db: Session, set_id: int, user_id: int):
+    """The title and (term, definition) pairs of a set the user can access, or None."""
+    set_item = get_set_by_id(db, set_id, user_id, fields=('title',))
+    if not set_item:
+        return None
+    cards = get_cards_by_set(db, set_id, user_id, fields=('term', 'definition'))
+    return set_item.title, [(card.term, card.definition) for card in cards]
+
+
+def _game_not_found(code: str):
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Live game {code} not found"
+    )
+
+
+@router.post("/games", response_model=LiveGameResponse, status_code=status.HTTP_201_CREATED)
+async def create_live_game(
+    game_data: LiveGameCreate,
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Open a live game on one of your sets, or a public one, with questions
+    picked from its cards. Share the returned code with the players, then
+    connect to the game's WebSocket as its host.
+    """
+    loaded = await run_in_threadpool(run_in_session, _load_set, game_data.set_id, current_user.id)
+
+    if loaded is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Set with ID {game_data.set_id} not found or you don't have access"
+        )
+
+    title, cards = loaded
+    if len(cards) < 2:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A live game needs a set with at least 2 cards"
+        )
+
+    questions = build_questions(cards, game_data.questions)
+    game = live_games.create(current_user.id, game_data.set_id, title, questions, game_data.question_seconds)
+    return game.summary()
+
+
+@router.get("/games/{code}", response_model=LiveGameResponse)
+async def read_live_game(
+    code: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Get a live game by its code, e.g. to show its title before joining."""
+    game = live_games.get(code)
+
+    if game is None:
+        raise _game_not_found(code)
+
+    return game.summary()
+
+
+@router.websocket("/games/{code}")
+async def play_live_game(
+    websocket: WebSocket,
+    code: str,
+    token: str = Query(..., description="Access token; browsers can't set headers on WebSockets"),
+    name: Optional[str] = Query(None, max_length=30, description="Name shown on the leaderboard")
+):
+    """
+    Join a live game. The host sends {"type": "start"}, {"type": "next"} and
+    {"type": "end"}; players send {"type": "answer", "index": i, "option": k}
+    for the open question. The server sends joined, lobby, question, answers,
+    answered, results, score and ended messages as JSON text frames.
+    """
+    await websocket.accept()
+    user = await run_in_threadpool(run_in_session, user_from_token, token)
+
+    if user is None:
+        await websocket.close(CLOSE_UNAUTHORIZED, "Could not validate credentials")
+        return
+
+    game = live_games.get(code)
+    if game is None:
+        await websocket.close(CLOSE_NOT_FOUND, f"Live game {code} not found")
+        return
+
+    connection = game.join(websocket, user.id, name or user.email.split('@')[0])
+    if connection is None:
+        await websocket.close(CLOSE_FULL, "The game is full or over")
+        return
+
+    try:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                message = json.loads(text)
+            except ValueError:
+                continue
+            game.handle(connection, message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        game.leave(connection)
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.schemas import MatchScoreCreate, MatchScoreResult, LeaderboardResponse
+from app.models.models import User
+from app.crud import can_access_set, submit_match_score, get_match_leaderboard
+from app.crud.leaderboard import LEADERBOARD_SIZE
+from app.auth import get_current_user
+
+router = APIRouter(
+    prefix="/sets/{set_id}/match",
+    tags=["match"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+def _check_set_access(db: Session, set_id: int, user_id: int):
+    if not can_access_set(db, set_id, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Set with ID {set_id} not found or you don't have access"
+        )
+
+
+@router.post("/scores", response_model=MatchScoreResult, status_code=status.HTTP_201_CREATED)
+def create_match_score(
+    set_id: int,
+    score_data: MatchScoreCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Submit the time of a finished match game."""
+    _check_set_access(db, set_id, current_user.id)
+    return submit_match_score(db, set_id, current_user.id, score_data.time_ms)
+
+
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+def read_match_leaderboard(
+    set_id: int,
+    limit: int = Query(10, ge=1, le=LEADERBOARD_SIZE),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the fastest match times for a set, with your own best time and rank."""
+    _check_set_access(db, set_id, current_user.id)
+    return get_match_leaderboard(db, set_id, current_user.id, limit)
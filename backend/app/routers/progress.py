@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
 from typing import List
 from app.database import get_db
-from app.schemas import ProgressCreate, ProgressResponse
+from app.schemas import ProgressCreate, ProgressResponse, ReviewStatsResponse
 from app.models.models import User
-from app.crud import update_card_progress, get_user_progress, get_set_progress
+from app.crud import update_card_progress, get_user_progress, get_set_progress, get_review_stats
+from app.crud.review_stats import MAX_STATS_DAYS
 from app.auth import get_current_user
 
 router = APIRouter(
@@ -41,6 +42,26 @@ def get_all_progress(
     return get_user_progress(db, current_user.id)
 
 
+@router.get("/stats", response_model=ReviewStatsResponse)
+def get_progress_stats(
+    range: str = Query("90d", pattern=r"^\d{1,3}d$", description="Number of days to cover, e.g. 30d"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get daily review counts and study streaks for the current user.
+    Built from daily rollups that are refreshed every minute.
+    """
+    days = int(range[:-1])
+    if not 1 <= days <= MAX_STATS_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"range must be between 1d and {MAX_STATS_DAYS}d"
+        )
+    
+    return get_review_stats(db, current_user.id, days)
+
+
 @router.get("/set/{set_id}", response_model=List[ProgressResponse])
 def get_progress_by_set(
     set_id: int,
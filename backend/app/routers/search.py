@@ -1,9 +1,14 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Tuple
 from app.database import get_db
-from app.schemas import SearchQuery, SetResponse
-from app.crud import search_public_sets
+from app.schemas import SearchQuery, SetResponse, Suggestion, BrowseResponse
+from app.crud import (
+    search_public_sets, browse_public_sets, get_tag_facets,
+    get_trending_sets, get_popular_sets, get_suggestions
+)
+from app.crud.tags import MAX_BROWSE_TAGS
+from app.routers.fields import Fields, sparse_response
 
 router = APIRouter(
     prefix="/search",
@@ -17,10 +22,74 @@ def search_sets(
     q: str = Query(..., description="Search query for finding sets by title or description"),
     skip: int = 0,
     limit: int = 20,
+    fields: Optional[Tuple[str, ...]] = Depends(Fields(SetResponse)),
     db: Session = Depends(get_db)
 ):
     """
     Search for public flashcard sets by title or description.
     This endpoint is public and does not require authentication.
     """
-    return search_public_sets(db, q, skip, limit)
+    return sparse_response(SetResponse, fields, search_public_sets(db, q, skip, limit, fields))
+
+
+@router.get("/browse", response_model=BrowseResponse)
+def browse_sets(
+    tags: str = Query("", description="Comma-separated tags a set must all have; omit for just the facets"),
+    before: Optional[int] = Query(None, description="next_before from the previous page"),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Browse public sets by subject tags, newest first, along with the most
+    used tags and how many public sets carry each.
+    """
+    selected = [tag for tag in tags.split(",") if tag.strip()]
+    if len(selected) > MAX_BROWSE_TAGS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BROWSE_TAGS} tags can be combined"
+        )
+    
+    sets = browse_public_sets(db, selected, before, limit) if selected else []
+    return {
+        'sets': sets,
+        'facets': get_tag_facets(db),
+        'next_before': sets[-1].id if len(sets) == limit else None,
+    }
+
+
+@router.get("/trending", response_model=List[SetResponse])
+def trending_sets(
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[Tuple[str, ...]] = Depends(Fields(SetResponse)),
+    db: Session = Depends(get_db)
+):
+    """
+    Get public sets with the most recent study activity.
+    Scores are recomputed periodically, so new activity shows up within minutes.
+    """
+    return sparse_response(SetResponse, fields, get_trending_sets(db, skip, limit, fields))
+
+
+@router.get("/popular", response_model=List[SetResponse])
+def popular_sets(
+    skip: int = 0,
+    limit: int = Query(20, ge=1, le=100),
+    fields: Optional[Tuple[str, ...]] = Depends(Fields(SetResponse)),
+    db: Session = Depends(get_db)
+):
+    """Get the public sets studied by the most learners."""
+    return sparse_response(SetResponse, fields, get_popular_sets(db, skip, limit, fields))
+
+
+@router.get("/suggest", response_model=List[Suggestion])
+def suggest(
+    prefix: str = Query(..., max_length=100, description="What the user has typed so far"),
+    limit: int = Query(10, ge=1, le=20)
+):
+    """
+    Get typeahead suggestions from public set titles and popular card terms.
+    Served from an in-memory index without touching the database.
+    """
+    return get_suggestions(prefix, limit)
@@ -1,14 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import List, Optional, Tuple
 from app.database import get_db
-from app.schemas import SetCreate, SetResponse, SetUpdate, SetWithCards
+from app.schemas import SetCreate, SetResponse, SetUpdate, SetWithCards, SimilarSet, DifficultCard, ChangesResponse
 from app.models.models import User
 from app.crud import (
-    create_set, get_sets_by_user, get_set_by_id, update_set, delete_set,
-    get_cards_by_set
+    create_set, get_sets_by_user, get_set_by_id, can_access_set, update_set, delete_set,
+    fork_set, get_cards_by_set, get_set_changes, is_deleted_own_set, get_similar_sets, get_card_difficulty
 )
 from app.auth import get_current_user
+from app.routers.fields import Fields, sparse_response
+from app.jobs import job_runner
 
 router = APIRouter(
     prefix="/sets",
@@ -31,36 +34,99 @@ def create_new_set(
 def read_sets(
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[Tuple[str, ...]] = Depends(Fields(SetResponse)),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get all flashcard sets for the current user."""
-    sets = get_sets_by_user(db, current_user.id, skip, limit)
-    return sets
+    sets = get_sets_by_user(db, current_user.id, skip, limit, fields)
+    return sparse_response(SetResponse, fields, sets)
 
 
 @router.get("/{set_id}", response_model=SetWithCards)
 def read_set(
     set_id: int,
+    fields: Optional[Tuple[str, ...]] = Depends(Fields(SetWithCards)),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Get a specific flashcard set by ID, including its cards."""
-    db_set = get_set_by_id(db, set_id, current_user.id)
+    """Get a specific flashcard set by ID, including its cards unless fields leaves them out."""
+    db_set = get_set_by_id(db, set_id, current_user.id, fields)
     if db_set is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Set with ID {set_id} not found or you don't have access"
         )
     
-    # Get the cards for this set
-    cards = get_cards_by_set(db, set_id, current_user.id)
+    if fields is None or "cards" in fields:
+        # Combine set and cards without lazy-loading the relationship again
+        cards = get_cards_by_set(db, set_id, current_user.id)
+        set_committed_value(db_set, "cards", cards)
     
-    # Combine set and cards
-    result = SetWithCards.model_validate(db_set)
-    result.cards = cards
+    return sparse_response(SetWithCards, fields, db_set)
+
+
+@router.get("/{set_id}/changes", response_model=ChangesResponse)
+def read_set_changes(
+    set_id: int,
+    since: int = Query(0, description="Version returned by the previous sync, or 0 for everything"),
+    limit: int = Query(1000, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the set, cards and your progress that changed since a version, plus
+    deleted card IDs. Keep calling with the returned version while has_more
+    is true. Once your own set is deleted, its ID comes back in
+    deleted_sets; a 404 means the set is gone or no longer shared.
+    """
+    if not can_access_set(db, set_id, current_user.id) and not is_deleted_own_set(db, set_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Set with ID {set_id} not found or you don't have access"
+        )
+    
+    return get_set_changes(db, set_id, current_user.id, since, limit)
+
+
+@router.get("/{set_id}/similar", response_model=List[SimilarSet])
+def read_similar_sets(
+    set_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get public sets whose cards overlap most with this set's, best first.
+    near_duplicate marks sets with almost the same cards.
+    """
+    if not can_access_set(db, set_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Set with ID {set_id} not found or you don't have access"
+        )
+    
+    return get_similar_sets(db, set_id, limit)
+
+
+@router.get("/{set_id}/difficulty", response_model=List[DifficultCard])
+def read_card_difficulty(
+    set_id: int,
+    limit: int = Query(20, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the set's hardest cards across all learners, hardest first.
+    Cards nobody has reviewed yet are left out.
+    """
+    if not can_access_set(db, set_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Set with ID {set_id} not found or you don't have access"
+        )
     
-    return result
+    return get_card_difficulty(db, set_id, limit)
 
 
 @router.put("/{set_id}", response_model=SetResponse)
@@ -88,7 +154,7 @@ def delete_existing_set(
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Delete a flashcard set."""
+    """Delete a flashcard set. Its cards are removed in the background."""
     success = delete_set(db, set_id, current_user.id)
     
     if not success:
@@ -97,4 +163,26 @@ def delete_existing_set(
             detail=f"Set with ID {set_id} not found or you don't have access"
         )
     
+    job_runner.enqueue(
+        db, "purge_deleted_sets", {"user_id": current_user.id},
+        user_id=current_user.id, dedupe_key=f"purge_deleted_sets:{current_user.id}"
+    )
     return None
+
+
+@router.post("/{set_id}/fork", response_model=SetResponse, status_code=status.HTTP_201_CREATED)
+def fork_existing_set(
+    set_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Copy a public set (or one of your own) into a new private set you own."""
+    forked_set = fork_set(db, set_id, current_user.id)
+
+    if forked_set is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Set with ID {set_id} not found or you don't have access"
+        )
+
+    return forked_set
@@ -0,0 +1,28 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.schemas import ChangesResponse
+from app.models.models import User
+from app.crud import get_user_changes
+from app.auth import get_current_user
+
+router = APIRouter(
+    prefix="/sync",
+    tags=["sync"],
+    responses={401: {"description": "Not authorized"}},
+)
+
+
+@router.get("/", response_model=ChangesResponse)
+def sync_changes(
+    since: int = Query(0, description="Version returned by the previous sync, or 0 for everything"),
+    limit: int = Query(1000, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get your sets, cards and progress that changed since a version, plus IDs
+    of deleted sets and cards. Keep calling with the returned version while
+    has_more is true.
+    """
+    return get_user_changes(db, current_user.id, since, limit)
@@ -1,17 +1,27 @@
 from app.schemas.schemas import (
     UserBase, UserCreate, UserResponse,
     Token, TokenData,
-    SetBase, SetCreate, SetResponse, SetUpdate, SetWithCards,
-    CardBase, CardCreate, CardResponse, CardUpdate,
-    ProgressBase, ProgressCreate, ProgressResponse,
-    SearchQuery
+    SetBase, SetCreate, SetResponse, SetUpdate, SetWithCards, SimilarSet, TagFacet, BrowseResponse,
+    CardBase, CardCreate, CardResponse, CardUpdate, CardMove, DifficultCard,
+    ProgressBase, ProgressCreate, ProgressResponse, ReviewDay, ReviewStatsResponse,
+    MatchScoreCreate, MatchScoreResult, LeaderboardEntry, LeaderboardResponse,
+    LiveGameCreate, LiveGameResponse,
+    ClassCreate, ClassResponse, ClassMemberResponse, ClassDetail, ClassJoin,
+    StudentProgress, ClassSetProgress,
+    ChangesResponse, JobResponse,
+    SearchQuery, Suggestion
 )
 
 __all__ = [
     'UserBase', 'UserCreate', 'UserResponse',
     'Token', 'TokenData',
-    'SetBase', 'SetCreate', 'SetResponse', 'SetUpdate', 'SetWithCards',
-    'CardBase', 'CardCreate', 'CardResponse', 'CardUpdate',
-    'ProgressBase', 'ProgressCreate', 'ProgressResponse',
-    'SearchQuery'
+    'SetBase', 'SetCreate', 'SetResponse', 'SetUpdate', 'SetWithCards', 'SimilarSet', 'TagFacet', 'BrowseResponse',
+    'CardBase', 'CardCreate', 'CardResponse', 'CardUpdate', 'CardMove', 'DifficultCard',
+    'ProgressBase', 'ProgressCreate', 'ProgressResponse', 'ReviewDay', 'ReviewStatsResponse',
+    'MatchScoreCreate', 'MatchScoreResult', 'LeaderboardEntry', 'LeaderboardResponse',
+    'LiveGameCreate', 'LiveGameResponse',
+    'ClassCreate', 'ClassResponse', 'ClassMemberResponse', 'ClassDetail', 'ClassJoin',
+    'StudentProgress', 'ClassSetProgress',
+    'ChangesResponse', 'JobResponse',
+    'SearchQuery', 'Suggestion'
 ]
@@ -1,6 +1,6 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional, List
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field, constr
+from typing import Any, Optional, List
+from datetime import date, datetime
 
 # User schemas
 class UserBase(BaseModel):
@@ -29,10 +29,13 @@ class TokenData(BaseModel):
 
 
 # Set schemas
+Tag = constr(min_length=1, max_length=30)
+
 class SetBase(BaseModel):
     title: str
     description: Optional[str] = None
     is_public: bool = False
+    tags: List[Tag] = Field([], max_length=10)
 
 class SetCreate(SetBase):
     pass
@@ -41,10 +44,12 @@ class SetUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     is_public: Optional[bool] = None
+    tags: Optional[List[Tag]] = Field(None, max_length=10)
 
 class SetResponse(SetBase):
     id: int
     user_id: int
+    forked_from_id: Optional[int] = None
     created_at: datetime
     updated_at: datetime
     card_count: Optional[int] = 0
@@ -53,6 +58,23 @@ class SetResponse(SetBase):
         from_attributes = True
 
 
+class SimilarSet(SetResponse):
+    similarity: float
+    near_duplicate: bool = False
+
+
+class TagFacet(BaseModel):
+    tag: str
+    count: int
+
+
+class BrowseResponse(BaseModel):
+    sets: List[SetResponse] = []
+    facets: List[TagFacet] = []
+    # Pass as before to get the next page; None on the last page
+    next_before: Optional[int] = None
+
+
 # Card schemas
 class CardBase(BaseModel):
     term: str
@@ -72,12 +94,28 @@ class CardUpdate(BaseModel):
 class CardResponse(CardBase):
     id: int
     set_id: int
+    position: str
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
 
+class CardMove(BaseModel):
+    # Card to place the moved card after; None moves it to the start of the set
+    after_id: Optional[int] = None
+
+class DifficultCard(BaseModel):
+    card_id: int
+    term: str
+    definition: str
+    attempts: int
+    known: int
+    learned: int
+    forgotten: int
+    learners: int
+    difficulty: float
+
 
 # Progress schemas
 class ProgressBase(BaseModel):
@@ -87,7 +125,6 @@ class ProgressCreate(ProgressBase):
     card_id: int
 
 class ProgressResponse(ProgressBase):
-    id: int
     user_id: int
     card_id: int
     last_studied: datetime
@@ -96,6 +133,26 @@ class ProgressResponse(ProgressBase):
         from_attributes = True
 
 
+class ReviewDay(BaseModel):
+    date: date
+    reviews: int
+    known: int
+    new_cards: int
+
+
+class ReviewStatsResponse(BaseModel):
+    range_days: int
+    start_date: date
+    end_date: date
+    total_reviews: int
+    total_known: int
+    new_cards: int
+    active_days: int
+    current_streak: int
+    longest_streak: int
+    days: List[ReviewDay] = []
+
+
 # Set with cards included
 class SetWithCards(SetResponse):
     cards: List[CardResponse] = []
@@ -104,6 +161,121 @@ class SetWithCards(SetResponse):
         from_attributes = True
 
 
+# Match game schemas
+class MatchScoreCreate(BaseModel):
+    time_ms: int = Field(..., gt=0, description="Time taken to match every pair, in milliseconds")
+
+class MatchScoreResult(BaseModel):
+    time_ms: int
+    best_time_ms: int
+    is_personal_best: bool
+    rank: int
+    plays: int
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    time_ms: int
+
+class LeaderboardResponse(BaseModel):
+    players: int
+    entries: List[LeaderboardEntry] = []
+    personal_best: Optional[LeaderboardEntry] = None
+
+
+# Live game schemas
+class LiveGameCreate(BaseModel):
+    set_id: int
+    questions: int = Field(10, ge=1, le=100)
+    question_seconds: int = Field(20, ge=5, le=120)
+
+class LiveGameResponse(BaseModel):
+    code: str
+    set_id: int
+    title: str
+    questions: int
+    question_seconds: int
+    state: str
+    players: int
+
+
+# Class schemas
+class ClassCreate(BaseModel):
+    name: constr(min_length=1, max_length=100)
+
+class ClassResponse(BaseModel):
+    id: int
+    name: str
+    owner_id: int
+    join_code: str
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class ClassMemberResponse(BaseModel):
+    user_id: int
+    email: str
+
+class ClassDetail(ClassResponse):
+    members: List[ClassMemberResponse] = []
+    set_ids: List[int] = []
+
+class ClassJoin(BaseModel):
+    join_code: constr(min_length=1, max_length=20)
+
+class StudentProgress(BaseModel):
+    user_id: int
+    email: str
+    studied: int
+    known: int
+    completion: float
+    # Base64 bitsets over card_ids: bit i is byte i // 8, bit i % 8 (least significant first)
+    studied_bits: str
+    known_bits: str
+
+class ClassSetProgress(BaseModel):
+    class_id: int
+    set_id: int
+    version: str
+    card_ids: List[int] = []
+    students: List[StudentProgress] = []
+
+
+# Delta sync schemas
+class ChangesResponse(BaseModel):
+    version: int
+    has_more: bool = False
+    sets: List[SetResponse] = []
+    cards: List[CardResponse] = []
+    progress: List[ProgressResponse] = []
+    deleted_sets: List[int] = []
+    deleted_cards: List[int] = []
+
+
+# Background job schemas
+class JobResponse(BaseModel):
+    id: int
+    name: str
+    status: str
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Optional[Any] = None
+
+    class Config:
+        from_attributes = True
+
+
 # Search schemas
 class SearchQuery(BaseModel):
     query: str
+
+
+class Suggestion(BaseModel):
+    text: str
+    kind: str
+    set_id: Optional[int] = None
@@ -0,0 +1,37 @@
+import logging
+import threading
+from app.database import run_in_session
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """Runs a crud function with its own session every interval seconds on a daemon thread."""
+
+    def __init__(self, name: str, interval: float, func, enabled: bool = True):
+        self.name = name
+        self.enabled = enabled
+        self._interval = interval
+        self._func = func
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stopping.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.wait(self._interval):
+            try:
+                run_in_session(self._func)
+            except Exception:
+                logger.exception("Periodic task %s failed", self.name)
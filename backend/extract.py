@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Update the analytics extract.
+
+Copies users, sets, cards, progress and review events changed since the
+previous run into a DuckDB file, so reporting queries don't scan the live
+database. Run it from cron, or pass --interval to keep it running:
+
+    python extract.py --path analytics.duckdb --interval 300
+
+Then query the copy with the duckdb CLI or Python package, e.g.
+    duckdb analytics.duckdb "SELECT mastery_level, count(*) FROM user_card_progress GROUP BY 1"
+"""
+import argparse
+import logging
+import time
+from app.analytics import ANALYTICS_DB_PATH, EXTRACT_BATCH_SIZE, run_extract
+from app.database import SessionLocal
+
+logger = logging.getLogger("extract")
+
+
+def extract_once(path: str, batch_size: int):
+    started = time.monotonic()
+    db = SessionLocal()
+    try:
+        copied = run_extract(db, path, batch_size)
+    finally:
+        db.close()
+    summary = ", ".join(f"{name}={count}" for name, count in copied.items())
+    logger.info("Extracted to %s in %.1fs: %s", path, time.monotonic() - started, summary)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally extract study data into DuckDB")
+    parser.add_argument("--path", default=ANALYTICS_DB_PATH, help="DuckDB file to update")
+    parser.add_argument("--batch-size", type=int, default=EXTRACT_BATCH_SIZE,
+                        help="Rows or change log entries copied per transaction")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="Seconds between runs; 0 runs once and exits")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    while True:
+        try:
+            extract_once(args.path, args.batch_size)
+        except Exception:
+            if not args.interval:
+                raise
+            logger.exception("Extract failed")
+        if not args.interval:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
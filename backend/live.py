@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Serve live games from a single process.
+
+Live games are kept in the memory of the process that runs them, so all of a
+game's sockets have to reach the same process. serve.py spreads connections
+over several workers and recycles them, so route /live (both the HTTP and the
+WebSocket requests) to this process instead and everything else to serve.py.
+One process holds a few thousand sockets.
+
+    python live.py
+"""
+import os
+import uvicorn
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+HOST = os.getenv("HOST", "0.0.0.0")
+LIVE_PORT = int(os.getenv("LIVE_PORT", "8001"))
+
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "app.main:app",
+        host=HOST,
+        port=LIVE_PORT,
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        # Game messages are small; anything bigger is a broken or hostile client
+        ws_max_size=4096,
+        ws_ping_interval=20,
+        ws_ping_timeout=20,
+        backlog=4096,
+    )
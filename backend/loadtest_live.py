@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Load test for live games.
+
+Opens a host socket and --players student sockets to a running server, plays
+--questions questions with every student answering after a random delay, and
+reports how long it took to connect everyone and for each broadcast to reach
+every socket. Student accounts are created directly in the database and their
+tokens signed with SECRET_KEY, so run it on a host with the server's .env:
+
+    python live.py &
+    python loadtest_live.py --url http://localhost:8001 --players 1200
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import requests
+from sqlalchemy import insert
+from websockets.asyncio.client import connect
+from app.auth import create_access_token, get_password_hash
+from app.database import SessionLocal
+from app.models.models import User
+
+
+def seed_users(count: int):
+    """(user_id, token) for a host and count players, creating their accounts if needed."""
+    emails = [f"loadtest-{number}@example.com" for number in range(count + 1)]
+    db = SessionLocal()
+    try:
+        ids = dict(db.query(User.email, User.id).filter(User.email.in_(emails)))
+        missing = [email for email in emails if email not in ids]
+        if missing:
+            password_hash = get_password_hash("loadtest")
+            db.execute(insert(User), [{'email': email, 'password_hash': password_hash} for email in missing])
+            db.commit()
+            ids = dict(db.query(User.email, User.id).filter(User.email.in_(emails)))
+    finally:
+        db.close()
+    return [(ids[email], create_access_token({"sub": email, "user_id": ids[email]})) for email in emails]
+
+
+def create_game(url: str, token: str, questions: int):
+    headers = {"Authorization": f"Bearer {token}"}
+    set_id = requests.post(f"{url}/sets/", json={"title": "Live load test"}, headers=headers).json()["id"]
+    for number in range(max(questions, 4)):
+        requests.post(
+            f"{url}/sets/{set_id}/cards/",
+            json={"term": f"term {number}", "definition": f"definition {number}"},
+            headers=headers
+        )
+    response = requests.post(
+        f"{url}/live/games", json={"set_id": set_id, "questions": questions, "question_seconds": 30}, headers=headers
+    )
+    response.raise_for_status()
+    return response.json()["code"]
+
+
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return "none"
+    pick = lambda share: values[min(len(values) - 1, int(share * len(values)))] * 1000
+    return f"p50 {pick(0.5):.1f} ms, p99 {pick(0.99):.1f} ms, max {values[-1] * 1000:.1f} ms"
+
+
+class Stats:
+    def __init__(self, players: int):
+        self.players = players
+        self.connected = 0
+        self.failed = 0
+        self.all_connected = asyncio.Event()
+        self.sent = {}  # question index -> when the host asked for it
+        self.question_latency = []
+        self.results_received = {}  # question index -> receive times
+        self.scores = 0
+        self.ended = 0
+        self.final_players = None
+
+
+async def answer(websocket, index: int, options: int, delay: float):
+    await asyncio.sleep(delay)
+    await websocket.send(json.dumps({"type": "answer", "index": index, "option": random.randrange(options)}))
+
+
+async def play(ws_url: str, token: str, stats: Stats, handshakes: asyncio.Semaphore, spread: float):
+    try:
+        async with handshakes:
+            websocket = await connect(f"{ws_url}&token={token}", open_timeout=60, ping_interval=None)
+    except Exception:
+        stats.failed += 1
+        return
+
+    stats.connected += 1
+    if stats.connected == stats.players:
+        stats.all_connected.set()
+
+    tasks = []
+    async with websocket:
+        async for raw in websocket:
+            received = time.perf_counter()
+            message = json.loads(raw)
+            kind = message["type"]
+            if kind == "question":
+                stats.question_latency.append(received - stats.sent[message["index"]])
+                tasks.append(asyncio.create_task(
+                    answer(websocket, message["index"], len(message["options"]), random.uniform(0, spread))
+                ))
+            elif kind == "results":
+                stats.results_received.setdefault(message["index"], []).append(received)
+            elif kind == "score":
+                stats.scores += 1
+            elif kind == "ended":
+                stats.ended += 1
+                break
+
+
+async def host(ws_url: str, token: str, stats: Stats, questions: int):
+    async with connect(f"{ws_url}&token={token}", open_timeout=60, ping_interval=None) as websocket:
+        await stats.all_connected.wait()
+        for index in range(questions):
+            stats.sent[index] = time.perf_counter()
+            await websocket.send(json.dumps({"type": "start" if index == 0 else "next"}))
+            async for raw in websocket:
+                message = json.loads(raw)
+                if message["type"] == "results" and message["index"] == index:
+                    break
+            # Give every player time to get the results before moving on
+            await asyncio.sleep(0.5)
+        await websocket.send(json.dumps({"type": "end"}))
+        async for raw in websocket:
+            message = json.loads(raw)
+            if message["type"] == "ended":
+                stats.final_players = message["players"]
+                break
+
+
+async def run(url: str, players: int, questions: int, spread: float, concurrency: int):
+    accounts = seed_users(players)
+    code = create_game(url, accounts[0][1], questions)
+    ws_url = url.replace("http", "ws", 1) + f"/live/games/{code}?name=player"
+    stats = Stats(players)
+    handshakes = asyncio.Semaphore(concurrency)
+
+    started = time.perf_counter()
+    host_task = asyncio.create_task(host(ws_url, accounts[0][1], stats, questions))
+    player_tasks = [
+        asyncio.create_task(play(ws_url, token, stats, handshakes, spread))
+        for _, token in accounts[1:]
+    ]
+    await asyncio.wait_for(stats.all_connected.wait(), 120)
+    connect_seconds = time.perf_counter() - started
+    await asyncio.wait_for(asyncio.gather(host_task, *player_tasks), 60 + questions * (spread + 35))
+
+    print(f"game {code}: {stats.connected} players connected in {connect_seconds:.1f}s, {stats.failed} failed")
+    print(f"question fan-out ({len(stats.question_latency)} deliveries): {percentiles(stats.question_latency)}")
+    spreads = [max(times) - min(times) for times in stats.results_received.values()]
+    delivered = sum(len(times) for times in stats.results_received.values())
+    print(f"results fan-out ({delivered} deliveries): spread across sockets {percentiles(spreads)}")
+    print(f"score messages {stats.scores}/{players * questions}, "
+          f"ended {stats.ended}/{players}, final leaderboard players {stats.final_players}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test live games over WebSockets")
+    parser.add_argument("--url", default="http://localhost:8001", help="Server running live.py")
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=5)
+    parser.add_argument("--answer-spread", type=float, default=2.0,
+                        help="Players answer after a random delay of up to this many seconds")
+    parser.add_argument("--connect-concurrency", type=int, default=200,
+                        help="WebSocket handshakes in flight at once")
+    args = parser.parse_args()
+
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    asyncio.run(run(args.url, args.players, args.questions, args.answer_spread, args.connect_concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -17,14 +17,8 @@ config = context.config
 # Interpret the config file for Python logging
 fileConfig(config.config_file_name)
 
-# Get DB URL from environment
-POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
-POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password")
-POSTGRES_SERVER = os.getenv("POSTGRES_SERVER", "localhost")
-POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
-POSTGRES_DB = os.getenv("POSTGRES_DB", "postgres")
-
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
+# Migrate the database the app uses
+from app.database import DATABASE_URL
 
 # Set SQLAlchemy URL
 config.set_main_option("sqlalchemy.url", DATABASE_URL)
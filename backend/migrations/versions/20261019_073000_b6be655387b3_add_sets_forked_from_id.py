@@ -0,0 +1,40 @@
+"""Add sets.forked_from_id
+
+Revision ID: b6be655387b3
+Revises: 12dc3673efc8
+Create Date: 2026-10-19 07:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b6be655387b3"
+down_revision: Union[str, None] = "12dc3673efc8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("sets") as batch_op:
+        batch_op.add_column(
+            sa.Column("forked_from_id", sa.Integer(), nullable=True)
+        )
+        batch_op.create_foreign_key(
+            "fk_sets_forked_from_id_sets",
+            "sets",
+            ["forked_from_id"],
+            ["id"],
+            ondelete="SET NULL",
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("sets") as batch_op:
+        batch_op.drop_constraint(
+            "fk_sets_forked_from_id_sets", type_="foreignkey"
+        )
+        batch_op.drop_column("forked_from_id")
@@ -0,0 +1,75 @@
+"""Add cards.position
+
+Revision ID: 0e0a40102f93
+Revises: b6be655387b3
+Create Date: 2026-10-19 07:40:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+from itertools import groupby
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.crud.ordering import sequential_keys
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0e0a40102f93"
+down_revision: Union[str, None] = "b6be655387b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+position_type = sa.String().with_variant(
+    sa.String(collation="C"), "postgresql"
+)
+
+
+def upgrade() -> None:
+    op.add_column(
+        "cards", sa.Column("position", position_type, nullable=True)
+    )
+
+    # Existing cards keep their insertion order
+    cards = sa.table(
+        "cards",
+        sa.column("id", sa.Integer),
+        sa.column("set_id", sa.Integer),
+        sa.column("position", position_type),
+    )
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(cards.c.id, cards.c.set_id).order_by(
+            cards.c.set_id, cards.c.id
+        )
+    ).fetchall()
+    for _, set_rows in groupby(rows, key=lambda row: row.set_id):
+        card_ids = [row.id for row in set_rows]
+        connection.execute(
+            cards.update()
+            .where(cards.c.id == sa.bindparam("card_id"))
+            .values(position=sa.bindparam("key")),
+            [
+                {"card_id": card_id, "key": key}
+                for card_id, key in zip(
+                    card_ids, sequential_keys(len(card_ids))
+                )
+            ],
+        )
+
+    with op.batch_alter_table("cards") as batch_op:
+        batch_op.alter_column(
+            "position", existing_type=position_type, nullable=False
+        )
+    op.create_index(
+        "ix_cards_set_id_position",
+        "cards",
+        ["set_id", "position"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_cards_set_id_position", table_name="cards")
+    with op.batch_alter_table("cards") as batch_op:
+        batch_op.drop_column("position")
@@ -0,0 +1,66 @@
+"""Soft delete columns and cascading foreign keys
+
+Revision ID: 3bcc58a3bc57
+Revises: 0e0a40102f93
+Create Date: 2026-10-19 07:50:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3bcc58a3bc57"
+down_revision: Union[str, None] = "0e0a40102f93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Gives the unnamed foreign keys from the initial schema a name on SQLite
+naming_convention = {
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}
+
+foreign_keys = [
+    ("sets", "user_id", "users"),
+    ("cards", "set_id", "sets"),
+    ("user_card_progress", "user_id", "users"),
+    ("user_card_progress", "card_id", "cards"),
+]
+
+
+def _replace_foreign_keys(ondelete) -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    for table, column, referred in foreign_keys:
+        if postgres:
+            name = f"{table}_{column}_fkey"
+        else:
+            name = f"fk_{table}_{column}_{referred}"
+        with op.batch_alter_table(
+            table, naming_convention=naming_convention
+        ) as batch_op:
+            batch_op.drop_constraint(name, type_="foreignkey")
+            batch_op.create_foreign_key(
+                name, referred, [column], ["id"], ondelete=ondelete
+            )
+
+
+def upgrade() -> None:
+    for table in ("users", "sets"):
+        op.add_column(
+            table,
+            sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index(
+            op.f(f"ix_{table}_deleted_at"), table, ["deleted_at"], unique=False
+        )
+    _replace_foreign_keys("CASCADE")
+
+
+def downgrade() -> None:
+    _replace_foreign_keys(None)
+    for table in ("sets", "users"):
+        op.drop_index(op.f(f"ix_{table}_deleted_at"), table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("deleted_at")
@@ -0,0 +1,53 @@
+"""Add change_log
+
+Revision ID: bc8e12a89e56
+Revises: 3bcc58a3bc57
+Create Date: 2026-10-19 08:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "bc8e12a89e56"
+down_revision: Union[str, None] = "3bcc58a3bc57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "change_log",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("entity", sa.String(), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("set_id", sa.Integer(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("deleted", sa.Boolean(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sqlite_autoincrement=True,
+    )
+    op.create_index(
+        "ix_change_log_set_id_id", "change_log", ["set_id", "id"], unique=False
+    )
+    op.create_index(
+        "ix_change_log_user_id_id",
+        "change_log",
+        ["user_id", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_change_log_user_id_id", table_name="change_log")
+    op.drop_index("ix_change_log_set_id_id", table_name="change_log")
+    op.drop_table("change_log")
@@ -0,0 +1,52 @@
+"""Add match_scores
+
+Revision ID: 65a2a91386d9
+Revises: bc8e12a89e56
+Create Date: 2026-10-19 08:10:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "65a2a91386d9"
+down_revision: Union[str, None] = "bc8e12a89e56"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "match_scores",
+        sa.Column("set_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("best_time_ms", sa.Integer(), nullable=False),
+        sa.Column("plays", sa.Integer(), nullable=False),
+        sa.Column(
+            "achieved_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["set_id"], ["sets.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(
+            ["user_id"], ["users.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("set_id", "user_id"),
+    )
+    op.create_index(
+        "ix_match_scores_set_id_best_time_ms",
+        "match_scores",
+        ["set_id", "best_time_ms"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_match_scores_set_id_best_time_ms", table_name="match_scores"
+    )
+    op.drop_table("match_scores")
@@ -0,0 +1,86 @@
+"""Add set_popularity and watermarks, make deleted_at indexes partial
+
+Revision ID: c9f55f483d39
+Revises: 65a2a91386d9
+Create Date: 2026-10-19 08:20:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c9f55f483d39"
+down_revision: Union[str, None] = "65a2a91386d9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "set_popularity",
+        sa.Column("set_id", sa.Integer(), nullable=False),
+        sa.Column("studiers", sa.Integer(), nullable=False),
+        sa.Column("reviews", sa.Integer(), nullable=False),
+        sa.Column("trending_score", sa.Float(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["set_id"], ["sets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("set_id"),
+    )
+    op.create_index(
+        "ix_set_popularity_trending_score",
+        "set_popularity",
+        ["trending_score"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_set_popularity_studiers_reviews",
+        "set_popularity",
+        ["studiers", "reviews"],
+        unique=False,
+    )
+    op.create_table(
+        "watermarks",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.PrimaryKeyConstraint("name"),
+    )
+    for table in ("users", "sets"):
+        op.drop_index(f"ix_{table}_deleted_at", table_name=table)
+        op.create_index(
+            f"ix_{table}_deleted_at",
+            table,
+            ["deleted_at"],
+            unique=False,
+            sqlite_where=sa.text("deleted_at IS NOT NULL"),
+            postgresql_where=sa.text("deleted_at IS NOT NULL"),
+        )
+
+
+def downgrade() -> None:
+    for table in ("sets", "users"):
+        op.drop_index(f"ix_{table}_deleted_at", table_name=table)
+        op.create_index(
+            f"ix_{table}_deleted_at", table, ["deleted_at"], unique=False
+        )
+    op.drop_table("watermarks")
+    op.drop_index(
+        "ix_set_popularity_studiers_reviews", table_name="set_popularity"
+    )
+    op.drop_index(
+        "ix_set_popularity_trending_score", table_name="set_popularity"
+    )
+    op.drop_table("set_popularity")
@@ -0,0 +1,56 @@
+"""Add set_signatures and lsh_buckets
+
+Revision ID: 4f1d2a7c9e60
+Revises: c9f55f483d39
+Create Date: 2026-10-19 08:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4f1d2a7c9e60"
+down_revision: Union[str, None] = "c9f55f483d39"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "set_signatures",
+        sa.Column("set_id", sa.Integer(), nullable=False),
+        sa.Column("signature", sa.LargeBinary(), nullable=False),
+        sa.Column("element_count", sa.Integer(), nullable=False),
+        sa.Column("duplicate_of", sa.Integer(), nullable=True),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["set_id"], ["sets.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(
+            ["duplicate_of"], ["sets.id"], ondelete="SET NULL"
+        ),
+        sa.PrimaryKeyConstraint("set_id"),
+    )
+    op.create_table(
+        "lsh_buckets",
+        sa.Column("bucket", sa.BigInteger(), nullable=False),
+        sa.Column("band", sa.Integer(), nullable=False),
+        sa.Column("set_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["set_id"], ["sets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("bucket", "set_id"),
+    )
+    op.create_index(
+        "ix_lsh_buckets_set_id", "lsh_buckets", ["set_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_lsh_buckets_set_id", table_name="lsh_buckets")
+    op.drop_table("lsh_buckets")
+    op.drop_table("set_signatures")
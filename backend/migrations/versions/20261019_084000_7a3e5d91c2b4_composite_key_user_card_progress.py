@@ -0,0 +1,287 @@
+"""Key user_card_progress by (user_id, card_id) and add its archive
+
+Revision ID: 7a3e5d91c2b4
+Revises: 4f1d2a7c9e60
+Create Date: 2026-10-19 08:40:00.000000+00:00
+
+The new table is filled while the old one stays in use: triggers mirror
+every write into it, existing rows are copied over in committed chunks,
+and the tables are swapped in one short transaction at the end.
+"""
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7a3e5d91c2b4"
+down_revision: Union[str, None] = "4f1d2a7c9e60"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+CHUNK_SIZE = 10000
+
+POSTGRES_MIRROR = """
+CREATE FUNCTION user_card_progress_mirror() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM user_card_progress_new
+        WHERE user_id = OLD.user_id AND card_id = OLD.card_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO user_card_progress_new
+        VALUES (NEW.user_id, NEW.card_id, NEW.mastery_level, NEW.last_studied)
+        ON CONFLICT (user_id, card_id) DO UPDATE
+        SET mastery_level = EXCLUDED.mastery_level,
+            last_studied = EXCLUDED.last_studied;
+    END IF;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER user_card_progress_mirror
+AFTER INSERT OR UPDATE OR DELETE ON user_card_progress
+FOR EACH ROW EXECUTE FUNCTION user_card_progress_mirror();
+"""
+
+SQLITE_MIRROR = [
+    """
+    CREATE TRIGGER user_card_progress_mirror_insert
+    AFTER INSERT ON user_card_progress BEGIN
+        INSERT OR REPLACE INTO user_card_progress_new VALUES (
+            NEW.user_id, NEW.card_id, NEW.mastery_level, NEW.last_studied
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER user_card_progress_mirror_update
+    AFTER UPDATE ON user_card_progress BEGIN
+        DELETE FROM user_card_progress_new
+        WHERE user_id = OLD.user_id AND card_id = OLD.card_id;
+        INSERT OR REPLACE INTO user_card_progress_new VALUES (
+            NEW.user_id, NEW.card_id, NEW.mastery_level, NEW.last_studied
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER user_card_progress_mirror_delete
+    AFTER DELETE ON user_card_progress BEGIN
+        DELETE FROM user_card_progress_new
+        WHERE user_id = OLD.user_id AND card_id = OLD.card_id;
+    END
+    """,
+]
+
+# FOR SHARE makes a chunk wait for writers still holding its rows, so a row
+# deleted mid-copy can't be copied after its mirror trigger already ran
+POSTGRES_COPY = """
+INSERT INTO user_card_progress_new
+SELECT user_id, card_id, mastery_level, last_studied
+FROM user_card_progress WHERE id > :low AND id <= :high
+FOR SHARE
+ON CONFLICT (user_id, card_id) DO NOTHING
+"""
+
+SQLITE_COPY = """
+INSERT OR IGNORE INTO user_card_progress_new
+SELECT user_id, card_id, mastery_level, last_studied
+FROM user_card_progress WHERE id > :low AND id <= :high
+"""
+
+
+def _foreign_keys(table, postgres):
+    keys = []
+    for column, referred in (("user_id", "users"), ("card_id", "cards")):
+        if postgres:
+            name = f"{table}_{column}_fkey"
+        else:
+            name = f"fk_{table}_{column}_{referred}"
+        keys.append(
+            sa.ForeignKeyConstraint(
+                [column], [f"{referred}.id"], name=name, ondelete="CASCADE"
+            )
+        )
+    return keys
+
+
+def _columns():
+    return [
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("card_id", sa.Integer(), nullable=False),
+        sa.Column("mastery_level", sa.Integer(), nullable=True),
+        sa.Column(
+            "last_studied",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+    ]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    postgres = bind.dialect.name == "postgresql"
+
+    # Foreign keys are named as if the table were already swapped in
+    op.create_table(
+        "user_card_progress_new",
+        *_columns(),
+        *_foreign_keys("user_card_progress", postgres),
+        sa.PrimaryKeyConstraint(
+            "user_id",
+            "card_id",
+            name="user_card_progress_new_pkey" if postgres else None,
+        ),
+        sqlite_with_rowid=False,
+        postgresql_partition_by="HASH (user_id)",
+    )
+    if postgres:
+        for remainder in range(PARTITIONS):
+            op.execute(
+                f"CREATE TABLE user_card_progress_p{remainder} "
+                "PARTITION OF user_card_progress_new FOR VALUES WITH "
+                f"(MODULUS {PARTITIONS}, REMAINDER {remainder})"
+            )
+        op.execute(POSTGRES_MIRROR)
+    else:
+        for statement in SQLITE_MIRROR:
+            op.execute(statement)
+    op.create_index(
+        "ix_user_card_progress_card_id",
+        "user_card_progress_new",
+        ["card_id"],
+        unique=False,
+    )
+
+    # Copy existing rows while the app keeps writing to the old table
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        low, high = bind.execute(
+            sa.text("SELECT MIN(id) - 1, MAX(id) FROM user_card_progress")
+        ).one()
+        copy = sa.text(POSTGRES_COPY if postgres else SQLITE_COPY)
+        while high is not None and low < high:
+            bind.execute(copy, {"low": low, "high": low + CHUNK_SIZE})
+            low += CHUNK_SIZE
+
+    if postgres:
+        op.execute("LOCK TABLE user_card_progress IN ACCESS EXCLUSIVE MODE")
+        op.execute(
+            "DROP TRIGGER user_card_progress_mirror ON user_card_progress"
+        )
+        op.execute("DROP FUNCTION user_card_progress_mirror()")
+    op.drop_table("user_card_progress")
+    op.rename_table("user_card_progress_new", "user_card_progress")
+    if postgres:
+        op.execute(
+            "ALTER TABLE user_card_progress RENAME CONSTRAINT "
+            "user_card_progress_new_pkey TO user_card_progress_pkey"
+        )
+
+    op.create_table(
+        "user_card_progress_archive",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+
+
+def _unpack(data):
+    """Archived (card_id, mastery_level, last_studied) rows."""
+    epoch = datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return [
+        (card_id, mastery_level, epoch + timedelta(microseconds=micros))
+        for card_id, mastery_level, micros in struct.iter_unpack(
+            "<IBq", zlib.decompress(data)
+        )
+    ]
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    postgres = bind.dialect.name == "postgresql"
+
+    # Archived progress goes back into the table rather than being lost
+    archive = sa.table(
+        "user_card_progress_archive",
+        sa.column("user_id", sa.Integer()),
+        sa.column("data", sa.LargeBinary()),
+    )
+    restored = []
+    for user_id, data in bind.execute(sa.select(archive)):
+        restored += [
+            {
+                "user_id": user_id,
+                "card_id": card_id,
+                "mastery_level": mastery_level,
+                "last_studied": last_studied,
+            }
+            for card_id, mastery_level, last_studied in _unpack(data)
+        ]
+    op.drop_table("user_card_progress_archive")
+
+    op.create_table(
+        "user_card_progress_old",
+        sa.Column("id", sa.Integer(), nullable=False),
+        *_columns(),
+        *_foreign_keys("user_card_progress", postgres),
+        sa.PrimaryKeyConstraint(
+            "id", name="user_card_progress_old_pkey" if postgres else None
+        ),
+        sa.UniqueConstraint("user_id", "card_id", name="uix_user_card"),
+    )
+    op.execute(
+        "INSERT INTO user_card_progress_old "
+        "(user_id, card_id, mastery_level, last_studied) "
+        "SELECT user_id, card_id, mastery_level, last_studied "
+        "FROM user_card_progress ORDER BY user_id, card_id"
+    )
+    if restored:
+        old = sa.table(
+            "user_card_progress_old",
+            sa.column("user_id", sa.Integer()),
+            sa.column("card_id", sa.Integer()),
+            sa.column("mastery_level", sa.Integer()),
+            sa.column("last_studied", sa.DateTime(timezone=True)),
+        )
+        cards = sa.table("cards", sa.column("id", sa.Integer()))
+        existing = {
+            card_id for (card_id,) in bind.execute(sa.select(cards.c.id))
+        }
+        op.bulk_insert(
+            old, [row for row in restored if row["card_id"] in existing]
+        )
+
+    op.drop_index(
+        "ix_user_card_progress_card_id", table_name="user_card_progress"
+    )
+    op.drop_table("user_card_progress")
+    op.rename_table("user_card_progress_old", "user_card_progress")
+    if postgres:
+        op.execute(
+            "ALTER TABLE user_card_progress RENAME CONSTRAINT "
+            "user_card_progress_old_pkey TO user_card_progress_pkey"
+        )
+        op.execute(
+            "ALTER SEQUENCE user_card_progress_old_id_seq "
+            "RENAME TO user_card_progress_id_seq"
+        )
+    op.create_index(
+        op.f("ix_user_card_progress_id"),
+        "user_card_progress",
+        ["id"],
+        unique=False,
+    )
@@ -0,0 +1,52 @@
+"""Add review_events and daily_review_stats
+
+Revision ID: d28b6f0e7a15
+Revises: 7a3e5d91c2b4
+Create Date: 2026-10-19 08:50:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d28b6f0e7a15"
+down_revision: Union[str, None] = "7a3e5d91c2b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "review_events",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("card_id", sa.Integer(), nullable=False),
+        sa.Column("set_id", sa.Integer(), nullable=False),
+        sa.Column("mastery_level", sa.SmallInteger(), nullable=False),
+        sa.Column("is_new", sa.SmallInteger(), nullable=False),
+        sa.Column("day", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_review_events_user_id", "review_events", ["user_id"], unique=False
+    )
+    op.create_table(
+        "daily_review_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Integer(), nullable=False),
+        sa.Column("reviews", sa.Integer(), nullable=False),
+        sa.Column("known", sa.Integer(), nullable=False),
+        sa.Column("new_cards", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "day"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("daily_review_stats")
+    op.drop_index("ix_review_events_user_id", table_name="review_events")
+    op.drop_table("review_events")
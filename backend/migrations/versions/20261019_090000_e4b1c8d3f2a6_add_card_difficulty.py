@@ -0,0 +1,63 @@
+"""Add card_difficulty counters
+
+Revision ID: e4b1c8d3f2a6
+Revises: d28b6f0e7a15
+Create Date: 2026-10-19 09:00:00.000000+00:00
+
+Counters start from the progress rows already stored: each learner counts
+once towards attempts and learners, and towards known if the card is
+currently known. Earlier transitions weren't recorded, so learned and
+forgotten start at 0.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4b1c8d3f2a6"
+down_revision: Union[str, None] = "d28b6f0e7a15"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "card_difficulty",
+        sa.Column("card_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "shard", sa.SmallInteger(), autoincrement=False, nullable=False
+        ),
+        sa.Column("set_id", sa.Integer(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("known", sa.Integer(), nullable=False),
+        sa.Column("learned", sa.Integer(), nullable=False),
+        sa.Column("forgotten", sa.Integer(), nullable=False),
+        sa.Column("learners", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["card_id"], ["cards.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("card_id", "shard"),
+    )
+    op.create_index(
+        "ix_card_difficulty_set_id_card_id",
+        "card_difficulty",
+        ["set_id", "card_id"],
+        unique=False,
+    )
+    op.execute(
+        "INSERT INTO card_difficulty (card_id, shard, set_id, attempts, "
+        "known, learned, forgotten, learners) "
+        "SELECT cards.id, 0, cards.set_id, COUNT(*), "
+        "SUM(CASE WHEN user_card_progress.mastery_level = 1 "
+        "THEN 1 ELSE 0 END), 0, 0, COUNT(*) "
+        "FROM user_card_progress "
+        "JOIN cards ON cards.id = user_card_progress.card_id "
+        "GROUP BY cards.id, cards.set_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_card_difficulty_set_id_card_id", table_name="card_difficulty"
+    )
+    op.drop_table("card_difficulty")
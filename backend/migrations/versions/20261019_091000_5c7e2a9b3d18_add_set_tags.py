@@ -0,0 +1,54 @@
+"""Add set tags with their index and facet counts
+
+Revision ID: 5c7e2a9b3d18
+Revises: e4b1c8d3f2a6
+Create Date: 2026-10-19 09:10:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5c7e2a9b3d18"
+down_revision: Union[str, None] = "e4b1c8d3f2a6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing sets start without tags, so the index starts out empty
+    op.add_column(
+        "sets",
+        sa.Column("tags", sa.JSON(), server_default="[]", nullable=False),
+    )
+    op.create_table(
+        "tag_postings",
+        sa.Column("tag", sa.String(), nullable=False),
+        sa.Column("set_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["set_id"], ["sets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("tag", "set_id"),
+    )
+    op.create_index(
+        "ix_tag_postings_set_id", "tag_postings", ["set_id"], unique=False
+    )
+    op.create_table(
+        "tag_counts",
+        sa.Column("tag", sa.String(), nullable=False),
+        sa.Column("set_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("tag"),
+    )
+    op.create_index(
+        "ix_tag_counts_set_count", "tag_counts", ["set_count"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tag_counts_set_count", table_name="tag_counts")
+    op.drop_table("tag_counts")
+    op.drop_index("ix_tag_postings_set_id", table_name="tag_postings")
+    op.drop_table("tag_postings")
+    with op.batch_alter_table("sets") as batch_op:
+        batch_op.drop_column("tags")
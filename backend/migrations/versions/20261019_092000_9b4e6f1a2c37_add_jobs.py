@@ -0,0 +1,76 @@
+"""Add jobs and job_schedules for the background job runner
+
+Revision ID: 9b4e6f1a2c37
+Revises: 5c7e2a9b3d18
+Create Date: 2026-10-19 09:20:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9b4e6f1a2c37"
+down_revision: Union[str, None] = "5c7e2a9b3d18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("args", sa.JSON(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("locked_by", sa.String(), nullable=True),
+        sa.Column(
+            "locked_until", sa.DateTime(timezone=True), nullable=True
+        ),
+        sa.Column("dedupe_key", sa.String(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_jobs_id"), "jobs", ["id"], unique=False)
+    op.create_index(
+        "ix_jobs_status_run_at", "jobs", ["status", "run_at"], unique=False
+    )
+    op.create_index(
+        "ix_jobs_user_id_id", "jobs", ["user_id", "id"], unique=False
+    )
+    op.create_index(
+        "ix_jobs_dedupe_key", "jobs", ["dedupe_key"], unique=True
+    )
+    op.create_table(
+        "job_schedules",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column(
+            "next_run_at", sa.DateTime(timezone=True), nullable=False
+        ),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("job_schedules")
+    op.drop_index("ix_jobs_dedupe_key", table_name="jobs")
+    op.drop_index("ix_jobs_user_id_id", table_name="jobs")
+    op.drop_index("ix_jobs_status_run_at", table_name="jobs")
+    op.drop_index(op.f("ix_jobs_id"), table_name="jobs")
+    op.drop_table("jobs")
@@ -0,0 +1,90 @@
+"""Add classes with their members and assigned sets
+
+Revision ID: 3f8a1d6c5e29
+Revises: 9b4e6f1a2c37
+Create Date: 2026-10-19 09:30:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3f8a1d6c5e29"
+down_revision: Union[str, None] = "9b4e6f1a2c37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "classes",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["owner_id"], ["users.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_classes_id"), "classes", ["id"], unique=False)
+    op.create_index(
+        "ix_classes_owner_id", "classes", ["owner_id"], unique=False
+    )
+    op.create_table(
+        "class_members",
+        sa.Column("class_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "joined_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["class_id"], ["classes.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("class_id", "user_id"),
+    )
+    op.create_index(
+        "ix_class_members_user_id", "class_members", ["user_id"], unique=False
+    )
+    op.create_table(
+        "class_sets",
+        sa.Column("class_id", sa.Integer(), nullable=False),
+        sa.Column("set_id", sa.Integer(), nullable=False),
+        sa.Column(
+            "assigned_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(
+            ["class_id"], ["classes.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(["set_id"], ["sets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("class_id", "set_id"),
+    )
+    op.create_index(
+        "ix_class_sets_set_id", "class_sets", ["set_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_class_sets_set_id", table_name="class_sets")
+    op.drop_table("class_sets")
+    op.drop_index("ix_class_members_user_id", table_name="class_members")
+    op.drop_table("class_members")
+    op.drop_index("ix_classes_owner_id", table_name="classes")
+    op.drop_index(op.f("ix_classes_id"), table_name="classes")
+    op.drop_table("classes")
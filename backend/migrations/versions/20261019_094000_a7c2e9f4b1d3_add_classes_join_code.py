@@ -0,0 +1,67 @@
+"""Add classes.join_code
+
+Revision ID: a7c2e9f4b1d3
+Revises: 3f8a1d6c5e29
+Create Date: 2026-10-19 09:40:00.000000+00:00
+
+"""
+import secrets
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a7c2e9f4b1d3"
+down_revision: Union[str, None] = "3f8a1d6c5e29"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+JOIN_CODE_ALPHABET = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+JOIN_CODE_LENGTH = 8
+
+
+def upgrade() -> None:
+    op.add_column(
+        "classes", sa.Column("join_code", sa.String(), nullable=True)
+    )
+
+    # Existing classes get a code of their own
+    classes = sa.table(
+        "classes",
+        sa.column("id", sa.Integer),
+        sa.column("join_code", sa.String),
+    )
+    connection = op.get_bind()
+    class_ids = connection.execute(sa.select(classes.c.id)).scalars().all()
+    if class_ids:
+        connection.execute(
+            classes.update()
+            .where(classes.c.id == sa.bindparam("class_id"))
+            .values(join_code=sa.bindparam("code")),
+            [
+                {
+                    "class_id": class_id,
+                    "code": "".join(
+                        secrets.choice(JOIN_CODE_ALPHABET)
+                        for _ in range(JOIN_CODE_LENGTH)
+                    ),
+                }
+                for class_id in class_ids
+            ],
+        )
+
+    with op.batch_alter_table("classes") as batch_op:
+        batch_op.alter_column(
+            "join_code", existing_type=sa.String(), nullable=False
+        )
+    op.create_index(
+        "ix_classes_join_code", "classes", ["join_code"], unique=True
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_classes_join_code", table_name="classes")
+    with op.batch_alter_table("classes") as batch_op:
+        batch_op.drop_column("join_code")
@@ -0,0 +1,45 @@
+"""Add set_studiers
+
+Revision ID: e1d4b7a2c9f8
+Revises: a7c2e9f4b1d3
+Create Date: 2026-10-19 09:50:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e1d4b7a2c9f8"
+down_revision: Union[str, None] = "a7c2e9f4b1d3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "set_studiers",
+        sa.Column("set_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["set_id"], ["sets.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("set_id", "user_id"),
+    )
+    op.create_index(
+        "ix_set_studiers_user_id", "set_studiers", ["user_id"], unique=False
+    )
+
+    # Everyone with progress on a set has studied it
+    op.execute(
+        "INSERT INTO set_studiers (set_id, user_id) "
+        "SELECT DISTINCT cards.set_id, user_card_progress.user_id "
+        "FROM user_card_progress "
+        "JOIN cards ON cards.id = user_card_progress.card_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_set_studiers_user_id", table_name="set_studiers")
+    op.drop_table("set_studiers")
@@ -0,0 +1,30 @@
+"""Add change_log created_at index
+
+Revision ID: 5b9e3c7d2a14
+Revises: e1d4b7a2c9f8
+Create Date: 2026-10-19 10:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b9e3c7d2a14"
+down_revision: Union[str, None] = "e1d4b7a2c9f8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_change_log_created_at",
+        "change_log",
+        ["created_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_change_log_created_at", table_name="change_log")
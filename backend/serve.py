@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Production launcher for the StudySprout API.
+
+Runs the app under gunicorn with uvicorn workers. The app is imported once in
+the master before forking so workers share its pages copy-on-write, workers
+are recycled after a number of requests to cap memory growth, and SIGTERM
+drains in-flight requests before exiting.
+
+For local development use run.py instead.
+"""
+import multiprocessing
+import os
+from dotenv import load_dotenv
+from gunicorn.app.base import BaseApplication
+
+# Load environment variables
+load_dotenv()
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+WORKERS = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count() * 2 + 1)))
+MAX_REQUESTS = int(os.getenv("MAX_REQUESTS", "10000"))
+MAX_REQUESTS_JITTER = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+GRACEFUL_TIMEOUT = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+WORKER_TIMEOUT = int(os.getenv("WORKER_TIMEOUT", "60"))
+KEEPALIVE = int(os.getenv("KEEPALIVE", "5"))
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master without closing them."""
+    from app.database import engine
+    engine.dispose(close=False)
+
+
+class StudySproutServer(BaseApplication):
+    """Gunicorn application that serves an already imported ASGI app."""
+
+    def __init__(self, app, options=None):
+        self.application = app
+        self.options = options or {}
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+
+def main():
+    # Import before forking so workers share the loaded app
+    from app.main import app
+
+    options = {
+        "bind": f"{HOST}:{PORT}",
+        "workers": WORKERS,
+        # UvicornWorker picks uvloop and httptools when they are installed
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "max_requests": MAX_REQUESTS,
+        "max_requests_jitter": MAX_REQUESTS_JITTER,
+        "graceful_timeout": GRACEFUL_TIMEOUT,
+        "timeout": WORKER_TIMEOUT,
+        "keepalive": KEEPALIVE,
+        "post_fork": post_fork,
+        "accesslog": "-",
+    }
+    StudySproutServer(app, options).run()
+
+
+if __name__ == "__main__":
+    main()
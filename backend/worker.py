@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Run background jobs outside the API processes.
+
+Every API worker already runs JOB_WORKER_THREADS job threads. To keep slow
+jobs off the machines serving requests, set JOB_WORKER_THREADS=0 for the API
+and run one or more of these instead, on any host that can reach the
+database:
+
+    python worker.py --threads 4
+
+Any number of API workers and job workers can share the jobs table; each job
+is claimed by one of them at a time.
+"""
+import argparse
+import logging
+import signal
+import threading
+from app.jobs import job_runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued and periodic background jobs")
+    parser.add_argument("--threads", type=int, default=max(job_runner.threads, 1),
+                        help="Jobs run at once by this process")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+
+    job_runner.threads = args.threads
+    job_runner.start()
+    logging.getLogger("worker").info("Running jobs as %s on %s threads", job_runner.worker, args.threads)
+    stopping.wait()
+    # Let running jobs finish; their claims would otherwise have to lapse first
+    job_runner.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 import axios from 'axios';
 
 const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
+// Live games are served by a single process (backend/live.py); defaults to the API when /live is routed to it
+const LIVE_URL = process.env.REACT_APP_LIVE_URL || API_URL;
 
 // Create an axios instance with default config
 const api = axios.create({
@@ -36,24 +38,33 @@ export const auth = {
       },
     });
   },
-  logout: () => api.post('/auth/logout')
+  logout: () => api.post('/auth/logout'),
+  deleteAccount: () => api.delete('/auth/me')
 };
 
 // Sets endpoints
 export const sets = {
-  getAll: () => api.get('/sets'),
+  getAll: (fields?: string[]) => api.get('/sets', { params: { fields: fields?.join(',') } }),
   getById: (id: number) => api.get(`/sets/${id}`),
-  create: (data: { title: string; description: string; is_public: boolean }) => 
+  create: (data: { title: string; description: string; is_public: boolean; tags?: string[] }) => 
     api.post('/sets', data),
-  update: (id: number, data: { title?: string; description?: string; is_public?: boolean }) => 
+  update: (id: number, data: { title?: string; description?: string; is_public?: boolean; tags?: string[] }) => 
     api.put(`/sets/${id}`, data),
   delete: (id: number) => api.delete(`/sets/${id}`),
-  getPublic: (query: string) => api.get('/search', { params: { q: query } })
+  fork: (id: number) => api.post(`/sets/${id}/fork`),
+  getPublic: (query: string) => api.get('/search', { params: { q: query } }),
+  getTrending: () => api.get('/search/trending'),
+  getPopular: () => api.get('/search/popular'),
+  browse: (tags: string[], before?: number) =>
+    api.get('/search/browse', { params: { tags: tags.join(','), before } }),
+  suggest: (prefix: string) => api.get('/search/suggest', { params: { prefix } }),
+  getDifficulty: (id: number) => api.get(`/sets/${id}/difficulty`)
 };
 
 // Cards endpoints
 export const cards = {
-  getAllForSet: (setId: number) => api.get(`/sets/${setId}/cards`),
+  getAllForSet: (setId: number, fields?: string[]) =>
+    api.get(`/sets/${setId}/cards`, { params: { fields: fields?.join(',') } }),
   create: (setId: number, data: { term: string; definition: string; image_url?: string; audio_url?: string }) => 
     api.post(`/sets/${setId}/cards`, data),
   update: (setId: number, cardId: number, data: { term?: string; definition?: string; image_url?: string; audio_url?: string }) => 
@@ -65,14 +76,54 @@ export const cards = {
 export const progress = {
   updateCardProgress: (cardId: number, data: { mastery_level: number }) => 
     api.post(`/progress`, { card_id: cardId, ...data }),
-  getUserProgress: () => api.get('/progress')
+  getUserProgress: () => api.get('/progress'),
+  getStats: (range: string = '90d') => api.get('/progress/stats', { params: { range } })
+};
+
+// Match game endpoints
+export const match = {
+  submitScore: (setId: number, timeMs: number) =>
+    api.post(`/sets/${setId}/match/scores`, { time_ms: timeMs }),
+  getLeaderboard: (setId: number, limit = 10) =>
+    api.get(`/sets/${setId}/match/leaderboard`, { params: { limit } })
+};
+
+// Class endpoints
+export const classes = {
+  getAll: () => api.get('/classes'),
+  getById: (id: number) => api.get(`/classes/${id}`),
+  create: (data: { name: string }) => api.post('/classes', data),
+  delete: (id: number) => api.delete(`/classes/${id}`),
+  join: (joinCode: string) => api.post('/classes/join', { join_code: joinCode }),
+  resetJoinCode: (id: number) => api.post(`/classes/${id}/join-code`),
+  removeMember: (id: number, userId: number) => api.delete(`/classes/${id}/members/${userId}`),
+  assignSet: (id: number, setId: number) => api.put(`/classes/${id}/sets/${setId}`),
+  unassignSet: (id: number, setId: number) => api.delete(`/classes/${id}/sets/${setId}`),
+  // studied_bits and known_bits are base64 bitsets over card_ids, least significant bit first
+  getSetProgress: (id: number, setId: number) => api.get(`/classes/${id}/sets/${setId}/progress`)
+};
+
+// Live game endpoints
+export const live = {
+  create: (data: { set_id: number; questions?: number; question_seconds?: number }) =>
+    api.post('/live/games', data, { baseURL: LIVE_URL }),
+  get: (code: string) => api.get(`/live/games/${code}`, { baseURL: LIVE_URL }),
+  // Messages both ways are JSON; see the backend's /live/games/{code} WebSocket for their types
+  connect: (code: string, name?: string) => {
+    const params = new URLSearchParams({ token: localStorage.getItem('token') || '' });
+    if (name) params.set('name', name);
+    return new WebSocket(`${LIVE_URL.replace(/^http/, 'ws')}/live/games/${code}?${params}`);
+  }
 };
 
 const apiService = {
   auth,
   sets,
   cards,
-  progress
+  progress,
+  match,
+  classes,
+  live
 };
 
 export default apiService;
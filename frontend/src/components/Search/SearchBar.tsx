@@ -13,11 +13,18 @@ interface Set {
   card_count?: number;
 }
 
+interface Suggestion {
+  text: string;
+  kind: string;
+  set_id?: number;
+}
+
 const SearchBar: React.FC = () => {
   const [query, setQuery] = useState('');
   const [searchResults, setSearchResults] = useState<Set[]>([]);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState('');
+  const [suggestions, setSuggestions] = useState<Suggestion[]>([]);
 
   useEffect(() => {
     // If the search bar is empty, fetch popular/recent public sets as suggestions
@@ -26,10 +33,27 @@ const SearchBar: React.FC = () => {
     }
   }, [query]);
 
+  useEffect(() => {
+    // Typeahead suggestions as the user types, debounced to one request per pause
+    if (!query.trim()) {
+      setSuggestions([]);
+      return;
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const response = await sets.suggest(query);
+        setSuggestions(response.data);
+      } catch (err: any) {
+        console.error('Error fetching suggestions:', err);
+      }
+    }, 150);
+    return () => clearTimeout(timer);
+  }, [query]);
+
   const fetchPopularSets = async () => {
     setIsLoading(true);
     try {
-      const response = await sets.getPublic('');
+      const response = await sets.getPopular();
       setSearchResults(response.data);
     } catch (err: any) {
       console.error('Error fetching popular sets:', err);
@@ -77,7 +101,13 @@ const SearchBar: React.FC = () => {
             value={query}
             onChange={(e) => setQuery(e.target.value)}
             onKeyPress={handleKeyPress}
+            list="search-suggestions"
           />
+          <datalist id="search-suggestions">
+            {suggestions.map((suggestion) => (
+              <option key={`${suggestion.kind}-${suggestion.set_id ?? suggestion.text}`} value={suggestion.text} />
+            ))}
+          </datalist>
           <div className="absolute inset-y-0 right-0 flex items-center pr-3">
             {isLoading && (
               <svg className="animate-spin h-5 w-5 text-gray-400" xmlns="http://www.w3.org/2000/svg" fill="none" viewBox="0 0 24 24">
@@ -20,7 +20,7 @@ const SetList: React.FC = () => {
     const fetchSets = async () => {
       setIsLoading(true);
       try {
-        const response = await sets.getAll();
+        const response = await sets.getAll(['id', 'title', 'description', 'is_public', 'card_count']);
         setUserSets(response.data);
         setError('');
       } catch (err: any) {
@@ -1,6 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
-import { cards } from '../../api/api';
+import { cards, match } from '../../api/api';
 
 // Type definitions
 interface Card {
@@ -11,6 +11,12 @@ interface Card {
   audio_url?: string;
 }
 
+interface ScoreResult {
+  best_time_ms: number;
+  is_personal_best: boolean;
+  rank: number;
+}
+
 interface MatchItem {
   id: string;
   content: string;
@@ -32,6 +38,7 @@ const MatchGame: React.FC = () => {
   const [timerRunning, setTimerRunning] = useState(false);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState('');
+  const [scoreResult, setScoreResult] = useState<ScoreResult | null>(null);
 
   useEffect(() => {
     const fetchCards = async () => {
@@ -39,7 +46,7 @@ const MatchGame: React.FC = () => {
       
       setIsLoading(true);
       try {
-        const response = await cards.getAllForSet(parseInt(setId));
+        const response = await cards.getAllForSet(parseInt(setId), ['id', 'term', 'definition']);
         setCardsList(response.data);
         
         if (response.data.length < 2) {
@@ -81,6 +88,15 @@ const MatchGame: React.FC = () => {
     };
   }, [timerRunning]);
 
+  // Submit the finishing time once the game is complete
+  useEffect(() => {
+    if (!isGameComplete || !setId) return;
+
+    match.submitScore(parseInt(setId), timeElapsed * 1000)
+      .then(response => setScoreResult(response.data))
+      .catch(err => console.error('Error submitting score:', err));
+  }, [isGameComplete, setId, timeElapsed]);
+
   const initializeGame = (cards: Card[]) => {
     // Limit to 10 cards for better gameplay
     const gameCards = cards.slice(0, 10);
@@ -186,6 +202,7 @@ const MatchGame: React.FC = () => {
     if (cardsList.length > 0) {
       initializeGame(cardsList);
       setIsGameComplete(false);
+      setScoreResult(null);
     }
   };
 
@@ -221,6 +238,14 @@ const MatchGame: React.FC = () => {
           <p className="text-xl mb-6">
             You matched all pairs in <span className="font-bold">{formatTime(timeElapsed)}</span>!
           </p>
+          {scoreResult && (
+            <p className="text-gray-600 mb-6">
+              {scoreResult.is_personal_best
+                ? 'New personal best! '
+                : `Your best is ${formatTime(Math.round(scoreResult.best_time_ms / 1000))}. `}
+              You are ranked #{scoreResult.rank} on this set.
+            </p>
+          )}
           <div className="flex justify-center space-x-4">
             <button
               onClick={restartGame}
@@ -39,7 +39,7 @@ const TestMode: React.FC = () => {
       
       setIsLoading(true);
       try {
-        const response = await cards.getAllForSet(parseInt(setId));
+        const response = await cards.getAllForSet(parseInt(setId), ['id', 'term', 'definition']);
         setCardsList(response.data);
         
         if (response.data.length < 3) {